@@ -0,0 +1,76 @@
+"""
+벤치마크용 합성 색소폰 오디오.
+
+시드가 같으면 항상 같은 단선율과 같은 샘플이 나온다 (외부 음원/네트워크 없이 NumPy로 생성).
+"""
+import wave
+from pathlib import Path
+
+import numpy as np
+
+SAMPLE_RATE = 22050
+# 색소폰다운 음색: 홀수 배음이 조금 강한 배음 구조
+HARMONIC_AMPLITUDES = np.array([1.0, 0.55, 0.45, 0.25, 0.2, 0.1, 0.08, 0.05])
+NOTE_BEATS = [0.25, 0.5, 0.5, 1.0, 1.0, 1.5, 2.0]
+
+
+def melody(seconds: float, tempo_bpm: int = 120, seed: int = 0) -> list[tuple[float, float, int]]:
+    """알토 색소폰 음역(D♭3~A♭5) 안에서 움직이는 단선율 (start_sec, end_sec, midi)."""
+    rng = np.random.default_rng(seed)
+    sec_per_beat = 60.0 / tempo_bpm
+    notes = []
+    t = 0.0
+    midi = 66
+    while t < seconds:
+        length = float(rng.choice(NOTE_BEATS)) * sec_per_beat
+        midi = int(np.clip(midi + rng.integers(-5, 6), 49, 80))
+        end = min(t + length * 0.92, seconds)   # 음 사이에 짧은 틈 (텅잉)
+        notes.append((t, end, midi))
+        t += length
+        if rng.random() < 0.1:
+            t += sec_per_beat   # 쉼표
+    return notes
+
+
+def synthesize(
+    notes: list[tuple[float, float, int]],
+    seconds: float,
+    sample_rate: int = SAMPLE_RATE,
+    seed: int = 0,
+) -> np.ndarray:
+    """음표마다 배음 + 비브라토 + 어택/릴리스 엔벨로프를 입힌 mono float32 오디오."""
+    rng = np.random.default_rng(seed + 1)
+    audio = np.zeros(int(seconds * sample_rate), dtype=np.float64)
+    harmonics = np.arange(1, len(HARMONIC_AMPLITUDES) + 1)
+    for start, end, midi in notes:
+        i0, i1 = int(start * sample_rate), int(end * sample_rate)
+        n = i1 - i0
+        if n <= 0:
+            continue
+        t = np.arange(n) / sample_rate
+        f0 = 440.0 * 2 ** ((midi - 69) / 12)
+        vibrato = 1 + 0.004 * np.sin(2 * np.pi * 5.5 * t) * np.minimum(t / 0.3, 1.0)
+        phase = 2 * np.pi * np.cumsum(f0 * vibrato) / sample_rate
+        tone = HARMONIC_AMPLITUDES @ np.sin(np.outer(harmonics, phase))
+        attack = np.minimum(t / 0.02, 1.0)
+        release = np.minimum((n - 1 - np.arange(n)) / (0.03 * sample_rate), 1.0)
+        audio[i0:i1] += tone * attack * release * rng.uniform(0.5, 0.8)
+    audio += rng.normal(0, 0.003, len(audio))   # 약한 숨소리/잡음
+    audio /= max(1e-9, np.abs(audio).max()) / 0.8
+    return audio.astype(np.float32)
+
+
+def write_wav(path: Path, audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> Path:
+    pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    return path
+
+
+def saxophone_fixture(path: Path, seconds: float, tempo_bpm: int = 120, seed: int = 0) -> Path:
+    """seconds 길이의 합성 색소폰 WAV를 path에 쓴다."""
+    notes = melody(seconds, tempo_bpm, seed)
+    return write_wav(path, synthesize(notes, seconds, seed=seed))
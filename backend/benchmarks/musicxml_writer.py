@@ -0,0 +1,154 @@
+"""
+MusicXML writer 벤치마크 + 결과 동등성 검사 (native 직렬화기 vs music21).
+
+    python benchmarks/musicxml_writer.py [--seconds 60] [--repeat 3]
+
+합성한 단선율 음표 이벤트를 두 writer로 쓰고, 두 파일을 music21로 다시 읽어
+조표/박자/템포/이조 악기와 (붙임줄을 합친) 음표 목록을 비교한다.
+
+- 16분음표 격자 소재: 두 writer의 결과가 완전히 같아야 한다.
+- 셋잇단이 섞인 소재: native 결과가 양자화된 음표와 같아야 한다. music21 writer는
+  셋잇단과 16분음표가 한 박에 섞이면 음길이를 잘못 쓰는 경우가 있어 차이는 보고만 한다.
+
+검사에 실패하면 0이 아닌 코드로 끝난다.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from music21 import converter, pitch  # noqa: E402
+
+from services import music_converter  # noqa: E402
+from services.music_converter import (  # noqa: E402
+    TRANSPOSITION_MAP,
+    notes_to_musicxml,
+    quantize_note_events,
+)
+
+BINARY_BEATS = [0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0]
+TRIPLET_BEATS = BINARY_BEATS + [1 / 3, 2 / 3, 4 / 3]
+
+
+def synthetic_note_events(
+    seconds: float,
+    tempo_bpm: int,
+    triplets: bool,
+    seed: int = 0,
+) -> list[tuple]:
+    """
+    basic-pitch 출력처럼 생긴 단선율 음표 이벤트 (초 단위).
+
+    박 격자 위의 음길이에 양자화 범위 안의 흔들림과 약한 옥타브 배음을 섞는다.
+    """
+    rng = np.random.default_rng(seed)
+    sec_per_beat = 60.0 / tempo_bpm
+    choices = TRIPLET_BEATS if triplets else BINARY_BEATS
+    events = []
+    beat = 0.0
+    midi = 69
+    while beat * sec_per_beat < seconds:
+        length = float(rng.choice(choices))
+        midi = int(np.clip(midi + rng.integers(-4, 5), 55, 84))
+        start = (beat + rng.uniform(-0.03, 0.03)) * sec_per_beat
+        end = (beat + length + rng.uniform(-0.03, 0.03)) * sec_per_beat
+        events.append((max(0.0, start), end, midi, float(rng.uniform(0.4, 0.9)), None))
+        if rng.random() < 0.3:
+            events.append((max(0.0, start), start + (end - start) / 2, midi + 12, 0.2, None))
+        beat += length + float(rng.choice([0.0, 0.0, 0.0, 0.5, 1.0]))
+    return events
+
+
+def expected_notes(events: list, transposition: str, tempo_bpm: int) -> list[tuple[float, str, float]]:
+    semitones = TRANSPOSITION_MAP[transposition]
+    return [
+        (round(offset, 6), pitch.Pitch(midi + semitones).nameWithOctave, round(duration, 6))
+        for offset, duration, midi in quantize_note_events(events, tempo_bpm)
+    ]
+
+
+def merge_ties(notes) -> list[tuple[float, str, float]]:
+    """붙임줄로 이어진 음을 하나로 합친다 (music21 stripTies는 start-continue-stop 사슬을 놓친다)."""
+    merged: list[list] = []
+    open_tie = False
+    for n in notes:
+        if open_tie and merged and merged[-1][1] == n.pitch.nameWithOctave:
+            merged[-1][2] += float(n.quarterLength)
+        else:
+            merged.append([float(n.offset), n.pitch.nameWithOctave, float(n.quarterLength)])
+        open_tie = n.tie is not None and n.tie.type in ("start", "continue")
+    return [(round(offset, 6), name, round(ql, 6)) for offset, name, ql in merged]
+
+
+def summarize(path: Path) -> dict:
+    score = converter.parse(str(path))
+    part = score.parts[0]
+    flat = part.flatten()
+    key = flat.getElementsByClass("KeySignature").first()
+    instrument = part.getInstrument()
+    return {
+        "key": (key.sharps, getattr(key, "mode", None)),
+        "time": flat.getElementsByClass("TimeSignature").first().ratioString,
+        "tempo": flat.getElementsByClass("MetronomeMark").first().number,
+        "transposition": instrument.transposition.semitones if instrument.transposition else 0,
+        "notes": merge_ties(flat.notes),
+    }
+
+
+def write_with(writer: str, events: list, path: Path, transposition: str, tempo_bpm: int) -> float:
+    music_converter.MUSICXML_WRITER = writer
+    t0 = time.perf_counter()
+    notes_to_musicxml(events, path, transposition, tempo_bpm)
+    return time.perf_counter() - t0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for triplets in (False, True):
+            print("셋잇단 포함" if triplets else "16분음표 격자")
+            for transposition in TRANSPOSITION_MAP:
+                for tempo_bpm in (72, 120):
+                    events = synthetic_note_events(args.seconds, tempo_bpm, triplets)
+                    expected = expected_notes(events, transposition, tempo_bpm)
+                    timings, summaries = {}, {}
+                    for writer in ("music21", "native"):
+                        path = Path(tmp) / f"{writer}.musicxml"
+                        timings[writer] = min(
+                            write_with(writer, events, path, transposition, tempo_bpm)
+                            for _ in range(args.repeat)
+                        )
+                        summaries[writer] = summarize(path)
+
+                    native, reference = summaries["native"], summaries["music21"]
+                    problems = [k for k in native if k != "notes" and native[k] != reference[k]]
+                    if native["notes"] != expected:
+                        problems.append("native notes")
+                    drift = reference["notes"] != native["notes"]
+                    if drift and not triplets:
+                        problems.append("notes")
+                    failures += bool(problems)
+                    print(
+                        f"  {transposition:9s} {tempo_bpm:3d}bpm  "
+                        f"music21 {timings['music21'] * 1000:7.1f}ms  "
+                        f"native {timings['native'] * 1000:6.1f}ms  "
+                        f"x{timings['music21'] / timings['native']:5.1f}  "
+                        f"{len(expected)} notes  "
+                        f"{'OK' if not problems else 'DIFF: ' + ', '.join(problems)}"
+                        f"{'  (music21 writer 음길이 어긋남)' if drift and triplets else ''}"
+                    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+단계별 변환 벤치마크 (합성 색소폰 오디오, 기준값 대비 회귀 검사).
+
+    python benchmarks/stages.py [--lengths 5 30 60 180] [--repeat 1]
+                                [--update-baseline] [--time-tolerance 0.25] [--rss-tolerance 0.1]
+
+길이별로 결정적인 합성 단선율 WAV(benchmarks/fixtures.py)를 만들고
+decode → vad → detect → musicxml → simplify → midi → pdf 단계와 /api/convert 전체 흐름
+(FastAPI TestClient, 작업을 이 프로세스 안에서 실행)을 각각 잰다.
+단계마다 벽시계 시간(반복 중 최솟값)과 최대 RSS, 단계 시작 대비 RSS 증가량을 기록하고
+benchmarks/baseline.json과 비교해 시간이나 최대 RSS가 허용치를 넘으면 0이 아닌 코드로 끝난다.
+기준값은 측정한 환경(machine)과 함께 저장되므로 다른 머신에서는 --update-baseline으로 다시 만든다.
+
+모델 로드/워밍업은 측정 전에 끝낸다. pdf 단계는 서비스와 같은 백엔드(cairo, 없으면 svglib/reportlab)로
+재고 결과에 백엔드를 남긴다. 둘 다 없을 때만 건너뛰며, 기준값에 측정값이 있는데 건너뛰면 회귀로 본다.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+# 측정은 이 프로세스 안에서: 작업 워커 프로세스 없이, 긴 음원도 허용하고, 결과 캐시는 임시 디렉토리에
+_CACHE_TMP = tempfile.mkdtemp(prefix="bench-cache-")
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("AUDIO_COST_BUDGET_SEC", "600")
+os.environ["CACHE_DIR"] = _CACHE_TMP
+
+from fixtures import saxophone_fixture  # noqa: E402
+
+from config import INFERENCE_MAX_BATCH_SIZE  # noqa: E402
+from services.audio_processor import AUDIO_SAMPLE_RATE, decode_audio  # noqa: E402
+from services.model_manager import model_manager  # noqa: E402
+from services.midi_writer import write_midi  # noqa: E402
+from services.music_converter import quantize_note_events, write_score  # noqa: E402
+from services.pdf_generator import generate_pdf, pdf_backend  # noqa: E402
+from services.pitch_detector import detect_note_events  # noqa: E402
+from services.simplifier import simplify_levels  # noqa: E402
+from services.voice_activity import trim_silence  # noqa: E402
+from utils.file_manager import get_job_dir  # noqa: E402
+
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+TEMPO_BPM = 120
+TRANSPOSITION = "alto_eb"
+# 이보다 작은 차이는 잡음으로 보고 회귀로 치지 않는다
+MIN_WALL_DIFF_SEC = 0.05
+MIN_RSS_DIFF_MB = 32.0
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # /proc이 없으면 프로세스 최대 RSS (Linux는 KB, macOS는 바이트)
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+class PeakRSS:
+    """블록 실행 중 RSS를 주기적으로 읽어 최댓값을 잡는다."""
+
+    def __init__(self, interval_sec: float = 0.005):
+        self.interval_sec = interval_sec
+        self._stop = threading.Event()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __enter__(self):
+        self.start = self.peak = _rss_bytes()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def measure(fn, repeat: int) -> tuple[dict, object]:
+    walls, peaks, deltas = [], [], []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        with PeakRSS() as rss:
+            t0 = time.perf_counter()
+            result = fn()
+            walls.append(time.perf_counter() - t0)
+        peaks.append(rss.peak)
+        deltas.append(rss.peak - rss.start)
+    mb = 1024 * 1024
+    return {
+        "wall_sec": round(min(walls), 4),
+        "peak_rss_mb": round(max(peaks) / mb, 1),
+        "rss_delta_mb": round(max(deltas) / mb, 1),
+    }, result
+
+
+def run_stages(wav_path: Path, work_dir: Path, repeat: int) -> dict:
+    results = {}
+    results["decode"], audio = measure(lambda: decode_audio(wav_path), repeat)
+    results["vad"], (audio, active) = measure(lambda: trim_silence(audio, AUDIO_SAMPLE_RATE), repeat)
+    results["detect"], events = measure(lambda: active.to_original(detect_note_events(audio)), repeat)
+    del audio
+
+    def musicxml():
+        notes = quantize_note_events(events, TEMPO_BPM)
+        write_score(notes, work_dir / "score.musicxml", TRANSPOSITION, TEMPO_BPM)
+        return notes
+
+    results["musicxml"], notes = measure(musicxml, repeat)
+
+    def simplify():
+        for level, level_notes in simplify_levels(notes).items():
+            if level_notes:
+                write_score(level_notes, work_dir / f"score-{level}.musicxml", TRANSPOSITION, TEMPO_BPM)
+
+    results["simplify"], _ = measure(simplify, repeat)
+    results["midi"], _ = measure(
+        lambda: write_midi(events, work_dir / "output.mid", TEMPO_BPM), repeat
+    )
+    # 렌더러가 아예 없을 때만 건너뛴다 — 그 밖의 PDF 오류는 벤치마크 실패
+    backend = pdf_backend()
+    if backend is None:
+        results["pdf"] = {"skipped": "PDF 렌더러 없음 (cairosvg/libcairo, svglib/reportlab)"}
+    else:
+        results["pdf"], _ = measure(
+            lambda: generate_pdf(work_dir / "score.musicxml", work_dir / "score.pdf"), repeat
+        )
+        results["pdf"]["backend"] = backend
+    return results
+
+
+def run_e2e(client, wav_path: Path, repeat: int) -> dict:
+    def convert():
+        # 같은 오디오가 결과 캐시에 적중하지 않도록 매번 비운다
+        for entry in Path(_CACHE_TMP).iterdir():
+            if entry.is_dir():
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                entry.unlink()
+        with open(wav_path, "rb") as f:
+            response = client.post(
+                "/api/convert",
+                files={"audio_file": (wav_path.name, f, "audio/wav")},
+                data={"transposition": TRANSPOSITION},
+            )
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/convert {response.status_code}: {response.text[:200]}")
+        shutil.rmtree(get_job_dir(response.json()["job_id"]), ignore_errors=True)
+        return response.json()
+
+    result, body = measure(convert, repeat)
+    result["note_count"] = body["metadata"]["note_count"]
+    return result
+
+
+def compare(results: dict, baseline: dict, time_tolerance: float, rss_tolerance: float) -> list[str]:
+    regressions = []
+    for length, stages in results.items():
+        for stage, current in stages.items():
+            base = baseline.get(length, {}).get(stage)
+            if not base or "skipped" in base:
+                continue
+            if "skipped" in current:
+                regressions.append(f"{length} {stage}: 기준값은 측정됐지만 건너뜀 ({current['skipped']})")
+                continue
+            if current.get("backend") != base.get("backend"):
+                print(f"주의: {length} {stage} 백엔드가 기준값과 다릅니다 ({base.get('backend')} → {current.get('backend')})")
+            wall, base_wall = current["wall_sec"], base["wall_sec"]
+            if wall > base_wall * (1 + time_tolerance) and wall - base_wall > MIN_WALL_DIFF_SEC:
+                regressions.append(f"{length} {stage}: {base_wall:.3f}s → {wall:.3f}s")
+            # 단계별 증가량은 앞 단계가 놓아 준 메모리를 재사용하는지에 따라 크게 흔들리므로
+            # 프로세스 최대 RSS로 비교한다
+            rss, base_rss = current["peak_rss_mb"], base["peak_rss_mb"]
+            if rss > base_rss * (1 + rss_tolerance) and rss - base_rss > MIN_RSS_DIFF_MB:
+                regressions.append(f"{length} {stage}: peak RSS {base_rss:.0f}MB → {rss:.0f}MB")
+    return regressions
+
+
+def machine() -> dict:
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lengths", type=float, nargs="+", default=[5, 30, 60, 180])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--rss-tolerance", type=float, default=0.1)
+    parser.add_argument("--skip-e2e", action="store_true")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if baseline.get("machine") and baseline["machine"] != machine():
+        print(f"주의: 기준값을 다른 환경에서 측정했습니다 ({baseline['machine']})")
+
+    model_manager.warmup(INFERENCE_MAX_BATCH_SIZE)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, contextlib.ExitStack() as stack:
+        tmp = Path(tmp)
+        client = None
+        if not args.skip_e2e:
+            from fastapi.testclient import TestClient
+
+            from main import app
+            client = stack.enter_context(TestClient(app))
+        try:
+            for seconds in args.lengths:
+                length = f"{seconds:g}s"
+                wav_path = saxophone_fixture(tmp / f"sax-{length}.wav", seconds)
+                work_dir = tmp / length
+                work_dir.mkdir()
+                results[length] = run_stages(wav_path, work_dir, args.repeat)
+                if client is not None:
+                    results[length]["e2e"] = run_e2e(client, wav_path, args.repeat)
+
+                base = baseline.get("results", {}).get(length, {})
+                print(length)
+                for stage, r in results[length].items():
+                    if "skipped" in r:
+                        print(f"  {stage:9s} 건너뜀 ({r['skipped'][:60]})")
+                        continue
+                    ratio = ""
+                    if stage in base and "wall_sec" in base[stage] and base[stage]["wall_sec"]:
+                        ratio = f"  x{r['wall_sec'] / base[stage]['wall_sec']:.2f} vs 기준"
+                    backend = f"  ({r['backend']})" if "backend" in r else ""
+                    print(
+                        f"  {stage:9s} {r['wall_sec'] * 1000:9.1f}ms  "
+                        f"peak {r['peak_rss_mb']:7.1f}MB  +{r['rss_delta_mb']:6.1f}MB{ratio}{backend}"
+                    )
+        finally:
+            shutil.rmtree(_CACHE_TMP, ignore_errors=True)
+
+    if args.update_baseline:
+        merged = {**baseline.get("results", {}), **results}
+        args.baseline.write_text(
+            json.dumps({"machine": machine(), "results": merged}, indent=2, ensure_ascii=False) + "\n"
+        )
+        print(f"기준값 저장: {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline.get("results", {}), args.time_tolerance, args.rss_tolerance)
+    for line in regressions:
+        print(f"회귀: {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+API 시작 시간과 워커 메모리 측정 (spawn vs forkserver preload).
+
+    python benchmarks/startup.py [--workers 2] [--modes spawn preload]
+
+모드마다 새 인터프리터에서 main을 import하고 (import 시간, TensorFlow/music21이 올라왔는지),
+TestClient로 lifespan을 돌려 작업 워커가 준비될 때까지의 시간과
+API 프로세스/워커들(forkserver 포함)의 RSS, PSS(공유 페이지를 나눠 센 실제 점유량)를 잰다.
+PSS는 /proc/<pid>/smaps_rollup을 읽으므로 Linux에서만 나온다.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+
+MODES = {
+    "spawn": {"JOB_MP_START_METHOD": "spawn", "JOB_PRELOAD": "0"},
+    "preload": {"JOB_PRELOAD": "1"},
+}
+
+# 자식 인터프리터에서 실행: 결과를 JSON 한 줄로 출력한다
+PROBE = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - t0
+heavy = {name: name in sys.modules for name in ("tensorflow", "music21", "verovio")}
+from fastapi.testclient import TestClient
+from benchmarks.startup import memory, descendants
+t0 = time.perf_counter()
+with TestClient(main.app):
+    ready_seconds = time.perf_counter() - t0
+    workers = [
+        {**memory(pid), "role": "forkserver" if has_children else "worker"}
+        for pid, has_children in descendants(os.getpid())
+    ]
+    print(json.dumps({
+        "import_seconds": import_seconds,
+        "ready_seconds": ready_seconds,
+        "imported": heavy,
+        "api": memory(os.getpid()),
+        "workers": [w for w in workers if w["rss_mb"] > 100],
+    }))
+"""
+
+
+def memory(pid: int) -> dict:
+    """프로세스의 RSS/PSS (MB)."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in ("Rss", "Pss"):
+                    values[name] = int(rest.split()[0]) / 1024
+    except OSError:
+        pass
+    return {
+        "pid": pid,
+        "rss_mb": round(values.get("Rss", 0), 1),
+        "pss_mb": round(values.get("Pss", 0), 1),
+    }
+
+
+def descendants(pid: int) -> list[tuple[int, bool]]:
+    """pid의 자손 프로세스와 자식이 있는지 여부 (forkserver는 워커들의 부모다)."""
+    parents = {}
+    for entry in Path("/proc").iterdir():
+        if entry.name.isdigit():
+            try:
+                stat = (entry / "stat").read_text()
+                parents[int(entry.name)] = int(stat.rsplit(")", 1)[1].split()[1])
+            except (OSError, ValueError, IndexError):
+                continue
+    found, frontier = [], [pid]
+    while frontier:
+        parent = frontier.pop()
+        children = [child for child, ppid in parents.items() if ppid == parent]
+        found += children
+        frontier += children
+    return [(child, child in parents.values()) for child in found]
+
+
+def run_mode(mode: str, workers: int) -> dict:
+    env = {
+        **os.environ,
+        **MODES[mode],
+        "JOB_WORKERS": str(workers),
+        "PYTHONPATH": os.pathsep.join([str(BACKEND_DIR), os.environ.get("PYTHONPATH", "")]),
+    }
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=600,
+    )
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(f"{mode} 측정 실패:\n{proc.stderr[-2000:]}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        r = run_mode(mode, args.workers)
+        imported = ", ".join(name for name, loaded in r["imported"].items() if loaded) or "-"
+        print(mode)
+        print(f"  import main   {r['import_seconds']:7.2f}s  (import된 무거운 모듈: {imported})")
+        print(f"  워커 준비     {r['ready_seconds']:7.2f}s  (워커 {args.workers}개, 모델 로드/워밍업 포함)")
+        print(f"  API           RSS {r['api']['rss_mb']:7.1f}MB  PSS {r['api']['pss_mb']:7.1f}MB")
+        for w in r["workers"]:
+            print(f"  {w['role']:10s}    RSS {w['rss_mb']:7.1f}MB  PSS {w['pss_mb']:7.1f}MB")
+        total = r["api"]["pss_mb"] + sum(w["pss_mb"] for w in r["workers"])
+        print(f"  합계 PSS      {total:7.1f}MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
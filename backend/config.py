@@ -1,4 +1,5 @@
 import os
+import re
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -9,10 +10,44 @@ TEMP_DIR.mkdir(exist_ok=True)
 MAX_UPLOAD_SIZE_MB = 50
 MAX_UPLOAD_SIZE_BYTES = MAX_UPLOAD_SIZE_MB * 1024 * 1024
 ALLOWED_AUDIO_EXTENSIONS = {".wav", ".mp3", ".ogg", ".flac", ".m4a", ".webm"}
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 업로드 스트리밍 단위 (1MB)
+# WAV/FLAC/OGG를 ffmpeg 없이 프로세스 안에서 디코딩 (끄면 ffmpeg가 있을 때만 ffmpeg를 쓴다)
+AUDIO_NATIVE_DECODE = os.getenv("AUDIO_NATIVE_DECODE", "1").lower() in ("1", "true", "yes")
+
+# Content-addressed result cache (keyed by sha256 of the uploaded audio)
+CACHE_DIR = Path(os.getenv("CACHE_DIR", str(BASE_DIR / "cache")))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_MB", "500")) * 1024 * 1024
+
+# Batch conversion (/api/convert/batch): 요청 하나에 받을 최대 파일 수 (zip 안의 파일 포함)
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "30"))
 
 # Temp file TTL
 TEMP_FILE_TTL_SECONDS = 3600  # 1 hour
 
+# Artifact store: "filesystem" (TEMP_DIR), "tmpfs" (RAM 위의 작업 디렉토리),
+# "memory" (TEMP_DIR + 작은 산출물을 메모리에서 바로 응답하는 LRU)
+ARTIFACT_STORE = os.getenv("ARTIFACT_STORE", "memory")
+ARTIFACT_TMPFS_DIR = Path(os.getenv("ARTIFACT_TMPFS_DIR", "/dev/shm/saxophone-app"))
+ARTIFACT_MEMORY_MAX_BYTES = int(os.getenv("ARTIFACT_MEMORY_MAX_MB", "64")) * 1024 * 1024
+ARTIFACT_MEMORY_MAX_ITEM_BYTES = int(os.getenv("ARTIFACT_MEMORY_MAX_ITEM_KB", "256")) * 1024
+
+# Job registry (SQLite, WAL): 같은 호스트의 uvicorn 워커와 변환 워커가 작업 상태/만료 시각을 공유한다.
+# WAL은 호스트 안의 공유 메모리로 잠금을 맞추므로 DB는 각 호스트의 로컬 디스크에 둔다 (NFS 등 불가).
+# 여러 호스트로 나눌 때는 노드마다 JOB_NODE_ID(영문 소문자/숫자)와 JOB_PEERS("a=http://10.0.0.1:8000,b=...",
+# 다른 노드가 접근할 수 있는 내부 주소)를 지정한다. 작업 ID가 "<노드>-"로 시작하므로
+# 자기에게 없는 작업은 ID로 주인 노드를 찾아 프록시한다.
+JOB_REGISTRY_PATH = Path(os.getenv("JOB_REGISTRY_PATH", str(TEMP_DIR / "jobs.db")))
+JOB_NODE_ID = re.sub(r"[^a-z0-9]", "", os.getenv("JOB_NODE_ID", "").lower())
+JOB_PEERS = {
+    name.strip().lower(): url.strip().rstrip("/")
+    for name, _, url in (peer.partition("=") for peer in os.getenv("JOB_PEERS", "").split(","))
+    if name.strip() and url.strip()
+}
+
+# Job reaper: 만료된 작업을 지우는 주기와 작업 디렉토리 전체 용량 한도 (초과하면 오래된 작업부터 지운다)
+JOB_REAPER_INTERVAL_SEC = float(os.getenv("JOB_REAPER_INTERVAL_SEC", "60"))
+TEMP_MAX_BYTES = int(os.getenv("TEMP_MAX_MB", "2000")) * 1024 * 1024
+
 # basic-pitch settings
 PITCH_MIN_NOTE_LENGTH = 0.05  # seconds
 PITCH_ONSET_THRESHOLD = 0.5
@@ -20,3 +55,63 @@ PITCH_FRAME_THRESHOLD = 0.3
 
 # CORS
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
+
+# Inference micro-batching (windows from concurrent jobs → one model call)
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "10"))
+# 동시에 실행할 배치 수. 모으기는 항상 한 스레드가 하므로 배치 크기는 줄지 않는다;
+# 긴 음원 세그먼트가 코어 여러 개를 쓰게 하려면 코어 수에 맞춰 올린다.
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "1"))
+
+# Long audio: overlapping segments are transcribed in parallel and stitched.
+# The duration limit is a cost budget (seconds of audio one core handles per job)
+# scaled by the number of parallel segment workers, with a hard ceiling.
+LONG_AUDIO_WORKERS = int(os.getenv("LONG_AUDIO_WORKERS", str(os.cpu_count() or 1)))
+AUDIO_COST_BUDGET_SEC = float(os.getenv("AUDIO_COST_BUDGET_SEC", "60"))
+MAX_AUDIO_DURATION_CAP_SEC = float(os.getenv("MAX_AUDIO_DURATION_CAP_SEC", "600"))
+MAX_AUDIO_DURATION_SEC = min(AUDIO_COST_BUDGET_SEC * max(1, LONG_AUDIO_WORKERS), MAX_AUDIO_DURATION_CAP_SEC)
+SEGMENT_SEC = float(os.getenv("SEGMENT_SEC", "20"))
+SEGMENT_OVERLAP_SEC = float(os.getenv("SEGMENT_OVERLAP_SEC", "2"))
+
+# Voice activity (음높이 인식 전 무음 압축): VAD_MIN_SILENCE_SEC보다 긴 무음/숨소리 구간은 모델에 넘기지 않는다.
+# 연주 구간 앞뒤로 VAD_PAD_SEC씩 남기고, 잡음 바닥 + VAD_NOISE_MARGIN_DB 이상이면서
+# 가장 큰 소리 - VAD_DYNAMIC_RANGE_DB 이상인 프레임을 연주로 본다.
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1").lower() in ("1", "true", "yes")
+VAD_MIN_SILENCE_SEC = float(os.getenv("VAD_MIN_SILENCE_SEC", "1.0"))
+VAD_PAD_SEC = float(os.getenv("VAD_PAD_SEC", "0.25"))
+VAD_NOISE_MARGIN_DB = float(os.getenv("VAD_NOISE_MARGIN_DB", "12"))
+VAD_DYNAMIC_RANGE_DB = float(os.getenv("VAD_DYNAMIC_RANGE_DB", "45"))
+
+# Conversion jobs: worker processes (0 = run in-process threads) and queue bound
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "8"))
+JOB_MP_START_METHOD = os.getenv("JOB_MP_START_METHOD", "spawn")
+# Preload: 무거운 모듈(TensorFlow/basic-pitch, music21, Verovio)을 fork 서버에서 한 번만 import하고
+# 워커는 거기서 fork해 copy-on-write로 공유한다 (켜면 start method는 forkserver)
+JOB_PRELOAD = os.getenv("JOB_PRELOAD", "").lower() in ("1", "true", "yes")
+
+# MusicXML writer: "native" (단선율 전용 직렬화기) 또는 "music21"
+MUSICXML_WRITER = os.getenv("MUSICXML_WRITER", "native")
+
+# Verovio toolkit pool (PDF/페이지 미리보기 렌더링)
+VEROVIO_POOL_SIZE = int(os.getenv("VEROVIO_POOL_SIZE", "2"))
+
+# 페이지 미리보기(SVG/PNG) 응답의 브라우저/CDN 캐시 시간 — 작업 파일이 지워지기 전까지는 바뀌지 않는다
+PREVIEW_CACHE_MAX_AGE = int(os.getenv("PREVIEW_CACHE_MAX_AGE", str(TEMP_FILE_TTL_SECONDS)))
+
+# 메트릭: API/작업 워커 프로세스가 누적값 스냅샷을 남기는 디렉토리 (/api/metrics가 합친다).
+# API 프로세스는 METRICS_DUMP_INTERVAL_SEC마다 자기 스냅샷을 갱신한다 (uvicorn 워커가 여럿일 때 서로의 값을 합치도록).
+METRICS_DIR = Path(os.getenv("METRICS_DIR", str(TEMP_DIR / ".metrics")))
+METRICS_DUMP_INTERVAL_SEC = float(os.getenv("METRICS_DUMP_INTERVAL_SEC", "5"))
+
+# 프로파일링: PROFILING_ENABLED면 /api/convert의 profile=true로 작업을 cProfile + tracemalloc으로 실행하고,
+# PROFILING_SAMPLE_EVERY=N이면 N개 작업마다 하나를 자동으로 프로파일링한다 (0 = 끔).
+# 결과(profile.pstats, profile.txt, allocations.txt)는 작업 디렉토리에 남고 /api/download/<job>/profile/<name>으로 받는다.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "").lower() in ("1", "true", "yes")
+PROFILING_SAMPLE_EVERY = int(os.getenv("PROFILING_SAMPLE_EVERY", "0"))
+PROFILING_TOP_N = int(os.getenv("PROFILING_TOP_N", "40"))
+PROFILING_TRACEMALLOC_FRAMES = int(os.getenv("PROFILING_TRACEMALLOC_FRAMES", "1"))
+
+# Progress stream (SSE): events.jsonl을 따라 읽는 주기와 연결 유지용 주석 간격
+JOB_EVENTS_POLL_SEC = float(os.getenv("JOB_EVENTS_POLL_SEC", "0.2"))
+JOB_EVENTS_KEEPALIVE_SEC = float(os.getenv("JOB_EVENTS_KEEPALIVE_SEC", "15"))
@@ -1,19 +1,43 @@
+import asyncio
+import logging
+import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from routers import convert, download, health
-from utils.file_manager import cleanup_expired_jobs
+from routers import batch, convert, download, health, jobs
+from services.job_proxy import job_proxy
+from services.job_queue import job_queue
+from services.metrics import metrics
+from services.pdf_generator import toolkit_pool
+from utils.file_manager import job_reaper
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: clean expired temp files
-    cleanup_expired_jobs()
+    t0 = time.perf_counter()
+    # Startup: clean expired temp files, then keep reaping in the background
+    job_reaper.start()
+    # Startup: drop metric snapshots of dead processes, then publish this process's own
+    metrics.start()
+    # Startup: start job workers (each loads + warms up the basic-pitch model once)
+    try:
+        await asyncio.to_thread(job_queue.start)
+    except Exception as e:
+        logger.error("모델 워밍업 실패 (첫 요청 시 다시 시도): %s", e)
+    # Startup: pre-create Verovio toolkits for PDF/preview rendering
+    await asyncio.to_thread(toolkit_pool.warmup)
+    app.state.startup_seconds = time.perf_counter() - t0
+    logger.info("시작 완료: 워커/렌더러 준비 %.2fs", app.state.startup_seconds)
     yield
-    # Shutdown: clean again
-    cleanup_expired_jobs()
+    # Shutdown: stop workers, clean again
+    job_queue.shutdown()
+    await job_proxy.aclose()
+    job_reaper.stop()
+    metrics.stop()
 
 
 app = FastAPI(
@@ -36,4 +60,6 @@ app.add_middleware(
 
 app.include_router(health.router)
 app.include_router(convert.router)
+app.include_router(batch.router)
 app.include_router(download.router)
+app.include_router(jobs.router)
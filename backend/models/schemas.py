@@ -17,3 +17,19 @@ class ConvertResponse(BaseModel):
 class ErrorResponse(BaseModel):
     error: str
     detail: str | None = None
+
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status_url: str
+    events_url: str
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str  # "queued", "running", "done", "error"
+    stage: str | None = None
+    progress: int = 0
+    error: str | None = None
+    download_urls: dict[str, str] | None = None
+    metadata: dict | None = None
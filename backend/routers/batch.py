@@ -0,0 +1,223 @@
+import asyncio
+import json
+import logging
+import re
+import time
+import zipfile
+from pathlib import Path, PurePosixPath
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+
+from config import BATCH_MAX_FILES
+from routers.convert import validate_options
+from services.audio_processor import can_decode, save_upload
+from services.job_queue import job_queue
+from services.metrics import metrics
+from services.pipeline import ensure_midi, ensure_pdf
+from utils.exceptions import AppError, QueueFullError, UnsupportedFormatError
+from utils.file_manager import create_job_dir
+from utils.zip_stream import ZipStream
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed"}
+# 대기열이 다른 요청으로 가득 찼을 때 다시 넣어 보는 최대 간격 (초)
+BATCH_RETRY_MAX_SEC = 5
+
+
+def _is_zip(upload: UploadFile) -> bool:
+    suffix = Path(upload.filename or "").suffix.lower()
+    return suffix == ".zip" or upload.content_type in ZIP_CONTENT_TYPES
+
+
+def _zip_members(archive: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+    """zip 안의 파일 항목 (디렉토리, macOS 메타데이터, 숨김 파일 제외)."""
+    return [
+        info for info in archive.infolist()
+        if not info.is_dir()
+        and not info.filename.startswith("__MACOSX/")
+        and not PurePosixPath(info.filename).name.startswith(".")
+    ]
+
+
+def _archive_dir(index: int, filename: str) -> str:
+    stem = re.sub(r"[^\w.-]+", "_", Path(filename).stem).strip("._")[:60] or "audio"
+    return f"{index + 1:02d}-{stem}"
+
+
+async def _save_item(entry: dict, upload: UploadFile) -> tuple[Path, Path, str] | None:
+    """업로드 하나를 새 작업 디렉토리에 저장한다. 실패하면 manifest 항목에 오류를 남기고 None."""
+    try:
+        job_id, job_dir = create_job_dir()
+        entry["job_id"] = job_id
+        t0 = time.time()
+        upload_path, audio_hash = await save_upload(upload, job_dir, Path(entry["filename"]).suffix.lower())
+        if not can_decode(upload_path.suffix):
+            raise UnsupportedFormatError(upload_path.suffix)
+        metrics.observe("saxapp_stage_duration_seconds", time.time() - t0, stage="save")
+        return job_dir, upload_path, audio_hash
+    except AppError as e:
+        metrics.count_error(e)
+        entry.update(status="error", error=e.message, status_code=e.status_code)
+        return None
+
+
+async def _convert_item(
+    entry: dict,
+    saved: tuple[Path, Path, str],
+    options: dict,
+    slots: asyncio.Semaphore,
+) -> tuple[dict, list[tuple[str, Path]]]:
+    """작업 하나를 변환하고 (entry, 아카이브에 넣을 (이름, 경로) 목록)을 돌려준다. 오류는 entry에 남긴다."""
+    job_dir, upload_path, audio_hash = saved
+    prefix = _archive_dir(entry["index"], entry["filename"])
+
+    async with slots:
+        try:
+            while True:
+                try:
+                    future = job_queue.submit(
+                        entry["job_id"], job_dir, upload_path,
+                        options["transposition"], options["simplify"], options["tempo_bpm"],
+                        audio_hash=audio_hash,
+                    )
+                    break
+                except QueueFullError as e:
+                    # 다른 요청이 대기열을 채웠으면 배치 전체를 실패시키지 않고 기다린다
+                    await asyncio.sleep(min(e.retry_after, BATCH_RETRY_MAX_SEC))
+            result = await asyncio.wrap_future(future)
+        except AppError as e:
+            entry.update(status="error", error=e.message, status_code=e.status_code)
+            return entry, []
+        except Exception as e:
+            logger.error("[%s] 배치 변환 예외: %s", entry["job_id"], e)
+            entry.update(status="error", error=f"처리 중 오류가 발생했습니다: {e}", status_code=500)
+            return entry, []
+
+    entry.update(status="done", metadata=result["metadata"])
+    files = [(f"{prefix}/score.musicxml", job_dir / "score.musicxml")]
+    output_errors = {}
+    for name, render in (("score.mid", ensure_midi), ("score.pdf", ensure_pdf)):
+        try:
+            path = await asyncio.to_thread(render, job_dir)
+        except AppError as e:
+            output_errors[name] = e.message
+            continue
+        except Exception as e:
+            # 산출물 하나의 예외가 응답 zip 전체를 끊지 않도록 manifest에만 남긴다
+            logger.error("[%s] %s 생성 예외: %s", entry["job_id"], name, e)
+            output_errors[name] = f"처리 중 오류가 발생했습니다: {e}"
+            continue
+        if path is not None:
+            files.append((f"{prefix}/{name}", path))
+    entry["files"] = [arcname for arcname, _ in files]
+    if output_errors:
+        entry["output_errors"] = output_errors
+    return entry, files
+
+
+async def _stream_archive(items: list[tuple[dict, tuple | None]], options: dict):
+    """끝나는 순서대로 산출물을 zip에 넣어 내보내고, 마지막에 manifest.json을 붙인다."""
+    archive = ZipStream()
+    slots = asyncio.Semaphore(job_queue.concurrency)
+    tasks = [
+        asyncio.create_task(_convert_item(entry, saved, options, slots))
+        for entry, saved in items if saved is not None
+    ]
+    try:
+        for task in asyncio.as_completed(tasks):
+            entry, files = await task
+            for arcname, path in files:
+                try:
+                    await asyncio.to_thread(archive.add_file, path, arcname)
+                except Exception as e:
+                    logger.error("[%s] %s 압축 예외: %s", entry["job_id"], arcname, e)
+                    name = arcname.rsplit("/", 1)[-1]
+                    entry.setdefault("output_errors", {})[name] = f"zip에 넣지 못했습니다: {e}"
+                    entry["files"].remove(arcname)
+                yield archive.drain()
+
+        entries = [entry for entry, _ in items]
+        manifest = {
+            "total": len(entries),
+            "done": sum(1 for entry in entries if entry["status"] == "done"),
+            "error": sum(1 for entry in entries if entry["status"] == "error"),
+            "options": options,
+            "files": entries,
+        }
+        archive.add_bytes(json.dumps(manifest, ensure_ascii=False, indent=2).encode(), "manifest.json")
+        yield archive.close()
+    finally:
+        # 클라이언트가 끊으면 아직 기다리는 작업은 넣지 않는다 (이미 워커에 들어간 작업은 끝까지 돈다)
+        for task in tasks:
+            task.cancel()
+
+
+@router.post("/api/convert/batch")
+async def convert_batch(
+    audio_files: list[UploadFile] = File(...),
+    transposition: str = Form("concert"),
+    simplify: bool = Form(False),
+    tempo_bpm: int | None = Form(None),
+):
+    """
+    여러 오디오 파일(또는 오디오가 든 zip)을 한 번에 변환해 zip으로 돌려준다.
+
+    파일마다 일반 변환 작업을 하나씩 만들어 작업 워커 수만큼 동시에 돌리고, 끝나는 순서대로
+    <번호>-<파일명>/score.musicxml, score.mid, score.pdf를 응답 zip에 흘려보낸다.
+    파일별 오류는 배치를 멈추지 않고 마지막의 manifest.json에 기록된다.
+    """
+    validate_options(transposition, tempo_bpm)
+
+    archives: list[zipfile.ZipFile] = []
+    try:
+        # (파일명, 업로드 또는 zip 항목, 오류) 목록으로 펼친다
+        uploads: list[tuple[str, UploadFile | tuple[zipfile.ZipFile, zipfile.ZipInfo] | None, str | None]] = []
+        for upload in audio_files:
+            if not _is_zip(upload):
+                uploads.append((upload.filename or "audio", upload, None))
+                continue
+            try:
+                archive = await asyncio.to_thread(zipfile.ZipFile, upload.file)
+            except (zipfile.BadZipFile, OSError):
+                uploads.append((upload.filename or "archive.zip", None, "zip 파일을 열 수 없습니다."))
+                continue
+            archives.append(archive)
+            uploads += [(info.filename, (archive, info), None) for info in _zip_members(archive)]
+
+        if len(uploads) > BATCH_MAX_FILES:
+            raise HTTPException(
+                400, f"한 번에 최대 {BATCH_MAX_FILES}개 파일까지 변환할 수 있습니다. (입력: {len(uploads)}개)"
+            )
+        if not uploads:
+            raise HTTPException(400, "오디오 파일을 업로드해 주세요.")
+
+        items: list[tuple[dict, tuple | None]] = []
+        for index, (filename, upload, error) in enumerate(uploads):
+            entry = {"index": index, "filename": filename, "job_id": None, "status": "pending"}
+            if error:
+                entry.update(status="error", error=error, status_code=400)
+                items.append((entry, None))
+                continue
+            if not isinstance(upload, tuple):
+                items.append((entry, await _save_item(entry, upload)))
+                continue
+            # zip 항목도 UploadFile로 감싸 같은 저장 경로(용량 제한, 형식 판별, 해시)를 탄다
+            archive, info = upload
+            with archive.open(info) as member:
+                upload = UploadFile(member, size=info.file_size, filename=info.filename)
+                items.append((entry, await _save_item(entry, upload)))
+    finally:
+        for archive in archives:
+            archive.close()
+
+    logger.info("배치 변환 시작: %d개 파일 (동시 %d개)", len(items), job_queue.concurrency)
+    options = {"transposition": transposition, "simplify": simplify, "tempo_bpm": tempo_bpm}
+    return StreamingResponse(
+        _stream_archive(items, options),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="saxophone_scores.zip"'},
+    )
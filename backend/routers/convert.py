@@ -1,32 +1,75 @@
 import asyncio
 import logging
-import shutil
 import time
+from concurrent.futures import Future
 from pathlib import Path
 
 from fastapi import APIRouter, File, Form, UploadFile, HTTPException
 
 from models.schemas import ConvertResponse
-from services.audio_processor import validate_audio_file, check_ffmpeg
-from services.pitch_detector import detect_pitch
-from services.music_converter import midi_to_musicxml
-from services.simplifier import simplify_score
+from services.audio_processor import save_upload, can_decode
+from services.job_queue import job_queue
+from services.metrics import metrics
+from services.music_converter import TRANSPOSITION_MAP
+from services.pipeline import SCORE_LEVELS
+from services.profiler import PROFILE_FILES, job_profiler
 from utils.file_manager import create_job_dir
-from utils.exceptions import AppError
+from utils.exceptions import AppError, QueueFullError, UnsupportedFormatError
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-@router.post("/api/convert", response_model=ConvertResponse)
-async def convert_audio(
-    audio_file: UploadFile | None = File(None),
-    youtube_url: str | None = Form(None),
-    transposition: str = Form("concert"),
-    simplify: bool = Form(False),
-    tempo_bpm: int | None = Form(None),
-):
+def build_download_urls(
+    job_id: str, levels: list[str] | None = None, profiled: bool = False
+) -> dict[str, str]:
+    base_url = f"/api/download/{job_id}"
+    urls = {
+        "musicxml": f"{base_url}/musicxml",
+        "pdf": f"{base_url}/pdf",
+        "midi": f"{base_url}/midi",
+        # 첫 페이지 미리보기 (다른 페이지는 page/<n>.svg|png)
+        "preview_svg": f"{base_url}/page/1.svg",
+        "preview_png": f"{base_url}/page/1.png",
+    }
+    # 단순화 레벨별 악보 (원본 포함)
+    for level in levels if levels is not None else SCORE_LEVELS:
+        urls[f"musicxml_{level}"] = f"{base_url}/musicxml?level={level}"
+    # 같은 인식 결과로 만든 다른 조옮김 파트 (레벨은 ?level=로 함께 고를 수 있다)
+    for transposition in TRANSPOSITION_MAP:
+        urls[f"musicxml_{transposition}"] = f"{base_url}/musicxml?transposition={transposition}"
+    # 프로파일링한 작업의 cProfile/tracemalloc 결과
+    if profiled:
+        for name in PROFILE_FILES:
+            urls[f"profile_{name}"] = f"{base_url}/profile/{name}"
+    return urls
+
+
+def raise_http_error(e: AppError) -> None:
+    headers = None
+    if isinstance(e, QueueFullError):
+        headers = {"Retry-After": str(e.retry_after)}
+    raise HTTPException(e.status_code, e.message, headers=headers)
+
+
+def validate_options(transposition: str, tempo_bpm: int | None) -> None:
+    if transposition not in ("concert", "alto_eb", "tenor_bb"):
+        raise HTTPException(400, f"지원하지 않는 이조 옵션입니다: {transposition}")
+
+    if tempo_bpm is not None and not (40 <= tempo_bpm <= 240):
+        raise HTTPException(400, f"템포는 40~240 BPM 범위여야 합니다. (입력값: {tempo_bpm})")
+
+
+async def submit_conversion(
+    audio_file: UploadFile | None,
+    youtube_url: str | None,
+    transposition: str,
+    simplify: bool,
+    tempo_bpm: int | None,
+    profile: bool = False,
+) -> tuple[str, Future]:
+    """요청을 검증하고 업로드를 저장한 뒤 작업 대기열에 넣는다."""
     if youtube_url:
         raise HTTPException(
             400,
@@ -37,77 +80,77 @@ async def convert_audio(
     if not audio_file:
         raise HTTPException(400, "오디오 파일을 업로드해 주세요.")
 
-    if transposition not in ("concert", "alto_eb", "tenor_bb"):
-        raise HTTPException(400, f"지원하지 않는 이조 옵션입니다: {transposition}")
+    validate_options(transposition, tempo_bpm)
 
-    if tempo_bpm is not None and not (40 <= tempo_bpm <= 240):
-        raise HTTPException(400, f"템포는 40~240 BPM 범위여야 합니다. (입력값: {tempo_bpm})")
+    if profile and not job_profiler.enabled:
+        raise HTTPException(403, "프로파일링이 비활성화되어 있습니다. (관리자 설정 필요)")
 
-    ext = Path(audio_file.filename).suffix.lower() if audio_file.filename else ".wav"
+    ext = Path(audio_file.filename).suffix.lower() if audio_file.filename else ""
 
-    # FFmpeg 없으면 WAV만 허용
-    if ext != ".wav" and not check_ffmpeg():
+    # FFmpeg 없으면 WAV/FLAC/OGG만 허용 (확장자가 없으면 저장하면서 내용으로 판별)
+    if ext and not can_decode(ext):
         raise HTTPException(
             415,
-            "현재 서버에서 FFmpeg가 비활성화되어 WAV만 변환 가능합니다. "
+            "현재 서버에서 FFmpeg가 비활성화되어 WAV/FLAC/OGG만 변환 가능합니다. "
             "(관리자 설정 필요)",
         )
 
+    try:
+        job_queue.ensure_capacity()
+    except QueueFullError as e:
+        metrics.count_error(e)
+        raise_http_error(e)
+
     job_id, job_dir = create_job_dir()
     t0 = time.time()
 
     try:
-        # Step 1: Save uploaded file
-        upload_path = job_dir / f"upload{ext}"
-        content = await audio_file.read()
-        validate_audio_file(upload_path, len(content))
-        upload_path.write_bytes(content)
+        # Step 1: Stream uploaded file to disk (size limit + content hash on the fly)
+        upload_path, audio_hash = await save_upload(audio_file, job_dir, ext)
+        if not can_decode(upload_path.suffix):
+            raise UnsupportedFormatError(upload_path.suffix)
+        metrics.observe("saxapp_stage_duration_seconds", time.time() - t0, stage="save")
         logger.info("[%s] Step 1: 파일 저장 완료 (%.1fs)", job_id, time.time() - t0)
 
-        # Step 2: Convert to WAV (mono 22050Hz)
-        from services.audio_processor import convert_to_wav
-        wav_path = job_dir / "audio.wav"
-        await asyncio.to_thread(convert_to_wav, upload_path, wav_path)
-        logger.info("[%s] Step 2: ffmpeg 변환 완료 (%.1fs)", job_id, time.time() - t0)
-
-        # Step 3: Pitch detection (audio → MIDI)
-        midi_path = job_dir / "output.mid"
-        await asyncio.to_thread(detect_pitch, wav_path, midi_path, tempo_bpm)
-        logger.info("[%s] Step 3: detect_pitch 완료 (%.1fs)", job_id, time.time() - t0)
-
-        # Step 4: MIDI → MusicXML (with transposition)
-        musicxml_path = job_dir / "score.musicxml"
-        musicxml_path, metadata = await asyncio.to_thread(
-            midi_to_musicxml, midi_path, musicxml_path, transposition, tempo_bpm
-        )
-        logger.info("[%s] Step 4: musicxml 변환 완료 (%.1fs)", job_id, time.time() - t0)
-
-        # Step 5: Simplify if requested
-        if simplify:
-            simplified_path = job_dir / "score_simplified.musicxml"
-            await asyncio.to_thread(
-                simplify_score, musicxml_path, simplified_path, 0.25
-            )
-            shutil.copy2(str(simplified_path), str(job_dir / "score.musicxml"))
-            metadata["simplified"] = True
-
-        logger.info("[%s] 전체 완료 (%.1fs)", job_id, time.time() - t0)
-
-        base_url = f"/api/download/{job_id}"
-        download_urls = {
-            "musicxml": f"{base_url}/musicxml",
-            "midi": f"{base_url}/midi",
-        }
-
-        return ConvertResponse(
-            job_id=job_id,
-            download_urls=download_urls,
-            metadata=metadata,
+        future = job_queue.submit(
+            job_id, job_dir, upload_path, transposition, simplify, tempo_bpm,
+            audio_hash=audio_hash, profile=profile,
         )
+    except AppError as e:
+        metrics.count_error(e)
+        logger.error("[%s] AppError: %s", job_id, e.message)
+        raise_http_error(e)
+
+    return job_id, future
+
+
+@router.post("/api/convert", response_model=ConvertResponse)
+async def convert_audio(
+    audio_file: UploadFile | None = File(None),
+    youtube_url: str | None = Form(None),
+    transposition: str = Form("concert"),
+    simplify: bool = Form(False),
+    tempo_bpm: int | None = Form(None),
+    profile: bool = Form(False),
+):
+    job_id, future = await submit_conversion(
+        audio_file, youtube_url, transposition, simplify, tempo_bpm, profile
+    )
+    t0 = time.time()
 
+    try:
+        result = await asyncio.wrap_future(future)
     except AppError as e:
         logger.error("[%s] AppError (%.1fs): %s", job_id, time.time() - t0, e.message)
-        raise HTTPException(e.status_code, e.message)
+        raise_http_error(e)
     except Exception as e:
         logger.error("[%s] 예외 (%.1fs): %s", job_id, time.time() - t0, str(e))
         raise HTTPException(500, f"처리 중 오류가 발생했습니다: {str(e)}")
+
+    return ConvertResponse(
+        job_id=job_id,
+        download_urls=build_download_urls(
+            job_id, result["metadata"].get("levels"), result["metadata"].get("profiled", False)
+        ),
+        metadata=result["metadata"],
+    )
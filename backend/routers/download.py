@@ -1,6 +1,15 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Request, Response
 from fastapi.responses import FileResponse
 
+from config import PREVIEW_CACHE_MAX_AGE
+from services.music_converter import TRANSPOSITION_MAP
+from routers.jobs import forward_to_owner
+from services.pipeline import SCORE_LEVELS, ensure_midi, ensure_page, ensure_pdf, ensure_score
+from services.profiler import PROFILE_FILES, job_profiler
+from utils.artifact_store import artifact_store
+from utils.exceptions import AppError
 from utils.file_manager import get_job_dir
 
 router = APIRouter()
@@ -11,22 +20,67 @@ FORMAT_MAP = {
     "midi": {"filename": "output.mid", "media_type": "audio/midi"},
 }
 
+PAGE_MEDIA_TYPES = {"svg": "image/svg+xml", "png": "image/png"}
+
+PROFILE_MEDIA_TYPES = {
+    "stats": "application/octet-stream",
+    "summary": "text/plain; charset=utf-8",
+    "allocations": "text/plain; charset=utf-8",
+}
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match는 약한 비교 (W/ 접두어 무시)
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
 
 @router.get("/api/download/{job_id}/{fmt}")
-async def download_file(job_id: str, fmt: str):
+async def download_file(
+    request: Request,
+    job_id: str,
+    fmt: str,
+    level: str | None = None,
+    transposition: str | None = None,
+):
     if fmt not in FORMAT_MAP:
         raise HTTPException(400, f"지원하지 않는 형식입니다: {fmt}")
+    if level is not None and (fmt == "midi" or level not in SCORE_LEVELS):
+        raise HTTPException(400, f"지원하지 않는 단순화 레벨입니다: {level}")
+    if transposition is not None and (fmt == "midi" or transposition not in TRANSPOSITION_MAP):
+        raise HTTPException(400, f"지원하지 않는 조옮김입니다: {transposition}")
 
     job_dir = get_job_dir(job_id)
     if not job_dir:
-        raise HTTPException(404, "작업을 찾을 수 없습니다. 파일이 만료되었을 수 있습니다.")
+        return await forward_to_owner(request, job_id)
 
     file_info = FORMAT_MAP[fmt]
     file_path = job_dir / file_info["filename"]
+    filename = f"saxophone_score.{fmt}" if fmt != "midi" else "saxophone_score.mid"
 
-    # For simplified version, check that too
-    if not file_path.exists() and fmt == "musicxml":
-        file_path = job_dir / "score_simplified.musicxml"
+    # 다른 이조/레벨 악보, PDF, MIDI는 첫 다운로드 때 만들고 작업 디렉토리에 남긴다
+    if fmt in ("musicxml", "pdf"):
+        render = ensure_score if fmt == "musicxml" else ensure_pdf
+        try:
+            file_path = await asyncio.to_thread(render, job_dir, transposition, level) or file_path
+        except AppError as e:
+            raise HTTPException(e.status_code, e.message)
+        if transposition:
+            filename = f"saxophone_score_{transposition}.{fmt}"
+    elif fmt == "midi":
+        file_path = await asyncio.to_thread(ensure_midi, job_dir) or file_path
+
+    # 메모리에 올라와 있는 작은 산출물은 파일을 다시 열지 않고 그대로 응답한다
+    content = artifact_store.load(file_path)
+    if content is not None:
+        return Response(
+            content,
+            media_type=file_info["media_type"],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
 
     if not file_path.exists():
         raise HTTPException(404, f"{fmt} 파일을 찾을 수 없습니다.")
@@ -34,5 +88,70 @@ async def download_file(job_id: str, fmt: str):
     return FileResponse(
         path=str(file_path),
         media_type=file_info["media_type"],
-        filename=f"saxophone_score.{fmt}" if fmt != "midi" else "saxophone_score.mid",
+        filename=filename,
+    )
+
+
+@router.get("/api/download/{job_id}/page/{page}.{ext}")
+async def download_page(
+    request: Request,
+    job_id: str,
+    page: int,
+    ext: str,
+    level: str | None = None,
+    transposition: str | None = None,
+):
+    if ext not in PAGE_MEDIA_TYPES:
+        raise HTTPException(400, f"지원하지 않는 미리보기 형식입니다: {ext}")
+    if level is not None and level not in SCORE_LEVELS:
+        raise HTTPException(400, f"지원하지 않는 단순화 레벨입니다: {level}")
+    if transposition is not None and transposition not in TRANSPOSITION_MAP:
+        raise HTTPException(400, f"지원하지 않는 조옮김입니다: {transposition}")
+
+    job_dir = get_job_dir(job_id)
+    if not job_dir:
+        return await forward_to_owner(request, job_id)
+
+    # 요청된 페이지만 처음 볼 때 렌더링하고, 이후에는 작업 디렉토리의 파일을 그대로 준다
+    try:
+        page_path = await asyncio.to_thread(ensure_page, job_dir, page, ext, transposition, level)
+    except AppError as e:
+        raise HTTPException(e.status_code, e.message)
+    if page_path is None:
+        raise HTTPException(404, "악보 파일을 찾을 수 없습니다.")
+
+    # 페이지 파일은 원자적으로 한 번 만들어지고 바뀌지 않으므로 (mtime, 크기)를 강한 ETag로 쓴다.
+    # 304 응답은 stat 한 번으로 끝내고, 본문은 실제로 보낼 때만 읽는다
+    st = page_path.stat()
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={PREVIEW_CACHE_MAX_AGE}, immutable",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    content = artifact_store.load(page_path)
+    if content is None:
+        content = page_path.read_bytes()
+    return Response(content, media_type=PAGE_MEDIA_TYPES[ext], headers=headers)
+
+
+@router.get("/api/download/{job_id}/profile/{name}")
+async def download_profile(request: Request, job_id: str, name: str):
+    if not job_profiler.downloads_enabled:
+        raise HTTPException(403, "프로파일링이 비활성화되어 있습니다. (관리자 설정 필요)")
+    if name not in PROFILE_FILES:
+        raise HTTPException(400, f"지원하지 않는 프로파일 형식입니다: {name}")
+
+    job_dir = get_job_dir(job_id)
+    if not job_dir:
+        return await forward_to_owner(request, job_id)
+
+    file_path = job_dir / PROFILE_FILES[name]
+    if not file_path.exists():
+        raise HTTPException(404, "프로파일을 찾을 수 없습니다. 프로파일링한 작업이 아니거나 아직 실행 중입니다.")
+    return FileResponse(
+        path=str(file_path),
+        media_type=PROFILE_MEDIA_TYPES[name],
+        filename=f"{job_id}-{PROFILE_FILES[name]}",
     )
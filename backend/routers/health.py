@@ -1,24 +1,56 @@
-import shutil
-from pathlib import Path
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
 
-from fastapi import APIRouter
+from services.audio_processor import NATIVE_AUDIO_EXTENSIONS, check_ffmpeg
+from services.inference_scheduler import inference_scheduler
+from services.job_queue import job_queue
+from services.metrics import metrics
+from services.model_manager import model_manager
+from services.pdf_generator import toolkit_pool
+from services.profiler import job_profiler
+from services.result_cache import result_cache
+from utils.artifact_store import artifact_store
+from utils.file_manager import job_reaper
+from utils.job_registry import job_registry
 
 router = APIRouter()
 
 
 @router.get("/api/health")
-async def health_check():
-    ffmpeg_available = shutil.which("ffmpeg") is not None
+async def health_check(request: Request):
+    ffmpeg_available = check_ffmpeg()
 
-    model_ready = False
-    try:
-        from basic_pitch import ICASSP_2022_MODEL_PATH
-        model_ready = Path(ICASSP_2022_MODEL_PATH).exists()
-    except Exception:
-        model_ready = False
+    # 프로세스 워커 모드에서는 모델이 워커 안에 있으므로 워커가 보고한 상태를 쓴다
+    if job_queue.inline:
+        model_status = model_manager.status()
+    else:
+        model_status = job_queue.worker_model_status or {"loaded": False, "ready": False}
 
     return {
         "status": "ok",
         "ffmpeg": ffmpeg_available,
-        "model_ready": model_ready,
+        # ffmpeg 없이도 받는 형식
+        "native_formats": sorted(NATIVE_AUDIO_EXTENSIONS),
+        "model_ready": model_status["ready"],
+        "model": model_status,
+        "inference": inference_scheduler.status() if job_queue.inline else None,
+        "jobs": job_queue.status(),
+        "cache": result_cache.stats(),
+        "temp": job_reaper.status(),
+        "artifacts": artifact_store.status(),
+        "registry": job_registry.status(),
+        "renderer": toolkit_pool.status(),
+        "profiling": job_profiler.status(),
+        "startup_seconds": round(getattr(request.app.state, "startup_seconds", 0.0), 2),
     }
+
+
+@router.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus 텍스트 형식 메트릭 (워커 프로세스 값 포함)."""
+    body = metrics.render({
+        "saxapp_jobs_in_flight": job_queue.in_flight,
+        "saxapp_queue_depth": job_queue.queue_depth,
+        "saxapp_temp_dir_bytes": job_reaper.status()["usage_bytes"],
+    })
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
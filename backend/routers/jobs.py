@@ -0,0 +1,137 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from fastapi import APIRouter, File, Form, Header, Request, Response, UploadFile, HTTPException
+from fastapi.responses import StreamingResponse
+
+from config import JOB_EVENTS_KEEPALIVE_SEC, JOB_EVENTS_POLL_SEC
+from models.schemas import JobStatusResponse, JobSubmitResponse
+from routers.convert import build_download_urls, submit_conversion
+from services.job_proxy import job_proxy
+from utils.exceptions import AppError
+from utils.file_manager import get_job_dir, read_job_status
+from utils.job_registry import job_registry
+
+router = APIRouter()
+
+
+async def forward_to_owner(request: Request, job_id: str) -> Response:
+    """
+    이 노드에 없는 작업은 작업 ID가 가리키는 주인 노드로 넘긴다.
+    레지스트리에 만료/삭제로 남아 있는 작업은 410, 어디에도 없는 작업은 404.
+    """
+    try:
+        response = await job_proxy.forward(request, job_id)
+    except AppError as e:
+        raise HTTPException(e.status_code, e.message)
+    if response is None:
+        row = job_registry.lookup(job_id)
+        if row is not None and job_registry.is_gone(row):
+            raise HTTPException(410, "작업이 만료되어 결과 파일이 삭제되었습니다.")
+        raise HTTPException(404, "작업을 찾을 수 없습니다. 파일이 만료되었을 수 있습니다.")
+    return response
+
+
+@router.post("/api/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_job(
+    audio_file: UploadFile | None = File(None),
+    youtube_url: str | None = Form(None),
+    transposition: str = Form("concert"),
+    simplify: bool = Form(False),
+    tempo_bpm: int | None = Form(None),
+    profile: bool = Form(False),
+):
+    job_id, _ = await submit_conversion(
+        audio_file, youtube_url, transposition, simplify, tempo_bpm, profile
+    )
+    return JobSubmitResponse(
+        job_id=job_id,
+        status_url=f"/api/jobs/{job_id}",
+        events_url=f"/api/jobs/{job_id}/events",
+    )
+
+
+@router.get("/api/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(request: Request, job_id: str):
+    job_dir = get_job_dir(job_id)
+    if not job_dir:
+        return await forward_to_owner(request, job_id)
+    status = read_job_status(job_dir)
+    if not status:
+        raise HTTPException(404, "작업을 찾을 수 없습니다. 파일이 만료되었을 수 있습니다.")
+
+    response = JobStatusResponse(
+        job_id=job_id,
+        status=status["status"],
+        stage=status.get("stage"),
+        progress=status.get("progress", 0),
+        error=status.get("error"),
+    )
+    if status["status"] == "done":
+        response.metadata = status["result"]["metadata"]
+        response.download_urls = build_download_urls(
+            job_id, response.metadata.get("levels"), response.metadata.get("profiled", False)
+        )
+    return response
+
+
+async def _job_event_stream(job_id: str, job_dir: Path, last_event_id: int):
+    """
+    events.jsonl을 tail 하면서 Server-Sent Events로 내보낸다.
+
+    이벤트 id는 줄 번호라서 재연결 시 Last-Event-ID 이후부터 이어 받는다.
+    작업이 done/error가 되고 남은 줄을 모두 보내면 스트림을 닫는다.
+    """
+    events_path = job_dir / "events.jsonl"
+    position = 0
+    line_no = 0
+    pending = b""
+    last_sent = time.monotonic()
+
+    while True:
+        finished = (read_job_status(job_dir) or {}).get("status") in ("done", "error")
+        try:
+            with open(events_path, "rb") as f:
+                f.seek(position)
+                chunk = f.read()
+        except FileNotFoundError:
+            chunk = b""
+        position += len(chunk)
+        pending += chunk
+
+        # 워커가 쓰는 중인 마지막 줄은 다음 주기에 보낸다
+        *lines, pending = pending.split(b"\n")
+        for raw in lines:
+            line_no += 1
+            if line_no <= last_event_id or not raw.strip():
+                continue
+            event = json.loads(raw)
+            yield f"id: {line_no}\nevent: {event['type']}\ndata: {raw.decode()}\n\n"
+            last_sent = time.monotonic()
+
+        if finished and not chunk:
+            return
+        if time.monotonic() - last_sent >= JOB_EVENTS_KEEPALIVE_SEC:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        if not get_job_dir(job_id):
+            return
+        await asyncio.sleep(JOB_EVENTS_POLL_SEC)
+
+
+@router.get("/api/jobs/{job_id}/events")
+async def stream_job_events(request: Request, job_id: str, last_event_id: int = Header(0)):
+    """작업 진행 상황(단계 전환, 세그먼트별 부분 음표, 최종 결과)을 SSE로 보낸다."""
+    job_dir = get_job_dir(job_id)
+    if not job_dir:
+        return await forward_to_owner(request, job_id)
+    if not read_job_status(job_dir):
+        raise HTTPException(404, "작업을 찾을 수 없습니다. 파일이 만료되었을 수 있습니다.")
+
+    return StreamingResponse(
+        _job_event_stream(job_id, job_dir, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
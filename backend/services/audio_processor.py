@@ -1,116 +1,328 @@
+import functools
+import hashlib
 import logging
+import math
 import shutil
+import struct
 import subprocess
+import threading
 from pathlib import Path
 
-from config import ALLOWED_AUDIO_EXTENSIONS, MAX_UPLOAD_SIZE_BYTES
+import numpy as np
+from fastapi import UploadFile
+
+from config import (
+    ALLOWED_AUDIO_EXTENSIONS,
+    AUDIO_NATIVE_DECODE,
+    MAX_AUDIO_DURATION_SEC,
+    MAX_UPLOAD_SIZE_BYTES,
+    MAX_UPLOAD_SIZE_MB,
+    UPLOAD_CHUNK_SIZE,
+)
 from utils.exceptions import AudioTooLargeError, UnsupportedFormatError, AppError
 
 logger = logging.getLogger(__name__)
 
-MAX_AUDIO_DURATION_SEC = 60  # 서버 성능상 60초 제한
-PROCESS_TRIM_SEC = 60  # basic-pitch에 넣을 최대 길이
+AUDIO_SAMPLE_RATE = 22050  # basic-pitch 모델 입력 샘플레이트
+DECODE_CHUNK_SAMPLES = AUDIO_SAMPLE_RATE  # 제한 초과 판별용 여유 버퍼 (1초)
+DECODE_TIMEOUT_SEC = 120
+# ffmpeg 없이 프로세스 안에서 디코딩하는 형식 (WAV는 메모리 매핑, FLAC/OGG는 libsndfile)
+NATIVE_AUDIO_EXTENSIONS = {".wav", ".flac", ".ogg"}
+NATIVE_DECODE_BLOCK_FRAMES = 1 << 16  # 다운믹스 단위 (프레임)
+# 메모리 매핑으로 바로 읽는 WAV 샘플 형식: (format tag, bits) → (dtype, 0 중심 오프셋, 스케일)
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+WAV_SAMPLE_FORMATS = {
+    (WAVE_FORMAT_PCM, 8): ("u1", 128.0, 1 / 128),
+    (WAVE_FORMAT_PCM, 16): ("<i2", 0.0, 1 / 32768),
+    (WAVE_FORMAT_PCM, 32): ("<i4", 0.0, 1 / 2147483648),
+    (WAVE_FORMAT_IEEE_FLOAT, 32): ("<f4", 0.0, 1.0),
+    (WAVE_FORMAT_IEEE_FLOAT, 64): ("<f8", 0.0, 1.0),
+}
 
 
 class AudioTooLongError(AppError):
     def __init__(self):
-        super().__init__(400, "현재 서버 성능상 60초 이하 음원만 지원합니다.")
+        super().__init__(f"현재 서버 성능상 {MAX_AUDIO_DURATION_SEC:g}초 이하 음원만 지원합니다.", 400)
 
 
 class ConversionError(AppError):
     def __init__(self, detail: str = "오디오 변환에 실패했습니다."):
-        super().__init__(500, detail)
+        super().__init__(detail, 500)
 
 
+@functools.cache
 def check_ffmpeg() -> bool:
+    """FFmpeg 설치 여부 (PATH 검색은 프로세스당 한 번만 한다)."""
     return shutil.which("ffmpeg") is not None
 
 
+def can_decode(ext: str) -> bool:
+    """이 서버에서 디코딩할 수 있는 형식인지 (WAV/FLAC/OGG는 ffmpeg 없이도 가능)."""
+    return ext in NATIVE_AUDIO_EXTENSIONS or check_ffmpeg()
+
+
 def validate_audio_file(file_path: Path, file_size: int) -> None:
     if file_size > MAX_UPLOAD_SIZE_BYTES:
-        raise AudioTooLargeError()
+        raise AudioTooLargeError(MAX_UPLOAD_SIZE_MB)
 
     ext = file_path.suffix.lower()
     if ext not in ALLOWED_AUDIO_EXTENSIONS:
         raise UnsupportedFormatError(ext)
 
 
-def _get_duration_sec(file_path: Path) -> float:
-    """ffprobe로 파일 길이(초)를 구한다."""
+def sniff_audio_format(header: bytes) -> str | None:
+    """파일 앞부분의 매직 바이트로 실제 오디오 형식(확장자)을 추정한다."""
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return ".wav"
+    if header[:4] == b"fLaC":
+        return ".flac"
+    if header[:4] == b"OggS":
+        return ".ogg"
+    if header[:4] == b"\x1a\x45\xdf\xa3":
+        return ".webm"
+    if header[4:8] == b"ftyp":
+        return ".m4a"
+    if header[:3] == b"ID3" or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return ".mp3"
+    return None
+
+
+async def save_upload(
+    audio_file: UploadFile,
+    job_dir: Path,
+    fallback_ext: str,
+) -> tuple[Path, str]:
+    """
+    업로드를 청크 단위로 작업 디렉토리에 저장한다.
+
+    용량 제한은 청크를 받을 때마다 확인하고, 내용 해시(sha256)도 스트리밍하면서 계산한다.
+    저장 확장자는 첫 청크의 매직 바이트로 판별하며 알 수 없으면 파일명 확장자를 쓴다.
+    메모리 사용량은 UPLOAD_CHUNK_SIZE로 제한된다.
+
+    Returns:
+        (저장 경로, sha256 hex)
+    """
+    if audio_file.size is not None and audio_file.size > MAX_UPLOAD_SIZE_BYTES:
+        raise AudioTooLargeError(MAX_UPLOAD_SIZE_MB)
+
+    first_chunk = await audio_file.read(UPLOAD_CHUNK_SIZE)
+    ext = sniff_audio_format(first_chunk) or fallback_ext or ".wav"
+    upload_path = job_dir / f"upload{ext}"
+    validate_audio_file(upload_path, len(first_chunk))
+
+    digest = hashlib.sha256()
+    total = 0
+    chunk = first_chunk
     try:
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "error",
-                "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1",
-                str(file_path),
-            ],
-            capture_output=True, text=True, timeout=30,
-        )
-        return float(result.stdout.strip())
-    except Exception:
-        return 0.0
-
-
-def convert_to_wav(input_path: Path, output_path: Path) -> Path:
-    """subprocess ffmpeg로 직접 변환 — pydub 의존 제거."""
+        with open(upload_path, "wb") as f:
+            while chunk:
+                total += len(chunk)
+                if total > MAX_UPLOAD_SIZE_BYTES:
+                    raise AudioTooLargeError(MAX_UPLOAD_SIZE_MB)
+                digest.update(chunk)
+                f.write(chunk)
+                chunk = await audio_file.read(UPLOAD_CHUNK_SIZE)
+    except BaseException:
+        # 용량 초과뿐 아니라 클라이언트 연결 끊김/취소 때도 잘린 파일을 남기지 않는다
+        upload_path.unlink(missing_ok=True)
+        raise
+
+    return upload_path, digest.hexdigest()
+
+
+def decode_audio(input_path: Path) -> np.ndarray:
+    """
+    오디오 파일을 모델 입력 형식(mono, 22050Hz, float32)의 NumPy 배열로 디코딩한다.
+
+    WAV/FLAC/OGG는 프로세스 안에서 디코딩하고(_decode_audio_native), 그 밖의 형식이나
+    네이티브 디코딩이 지원하지 않는 변형은 ffmpeg로 넘긴다.
+    """
+    ext = input_path.suffix.lower()
+    if ext in NATIVE_AUDIO_EXTENSIONS and (AUDIO_NATIVE_DECODE or not check_ffmpeg()):
+        try:
+            return _decode_audio_native(input_path)
+        except ConversionError as e:
+            if not check_ffmpeg():
+                raise
+            logger.warning("네이티브 디코딩 실패, ffmpeg로 다시 시도합니다: %s", e.message)
+
     if not check_ffmpeg():
-        # ffmpeg 없으면 pydub fallback (WAV만 가능)
-        return _convert_to_wav_pydub(input_path, output_path)
+        raise UnsupportedFormatError(ext)
+    return _decode_audio_ffmpeg(input_path)
 
-    # 길이 체크
-    duration = _get_duration_sec(input_path)
-    if duration > MAX_AUDIO_DURATION_SEC:
-        raise AudioTooLongError()
 
-    # 90초 트림 옵션
-    trim_args: list[str] = []
-    if duration > PROCESS_TRIM_SEC:
-        logger.info("Audio %.1fs → trimmed to %ds", duration, PROCESS_TRIM_SEC)
-        trim_args = ["-t", str(PROCESS_TRIM_SEC)]
+def _decode_audio_ffmpeg(input_path: Path) -> np.ndarray:
+    """
+    ffmpeg 한 번으로 raw PCM을 파이프로 받아 미리 잡아 둔 버퍼에 바로 읽어 들인다.
 
-    # ffmpeg: 모든 포맷 → mono 22050Hz 16-bit WAV
+    별도의 ffprobe 호출이나 중간 WAV 파일 없이, 읽는 도중 MAX_AUDIO_DURATION_SEC를
+    넘으면 즉시 ffmpeg를 종료하고 AudioTooLongError를 낸다.
+    """
+    # ffmpeg: 모든 포맷 → mono 22050Hz float32 little-endian raw PCM (stdout)
     cmd = [
-        "ffmpeg", "-y",
+        "ffmpeg", "-nostdin", "-loglevel", "error",
         "-i", str(input_path),
         "-vn",
         "-ac", "1",
-        "-ar", "22050",
-        "-sample_fmt", "s16",
-        *trim_args,
-        str(output_path),
+        "-ar", str(AUDIO_SAMPLE_RATE),
+        "-f", "f32le",
+        "pipe:1",
     ]
 
     logger.info("Running: %s", " ".join(cmd))
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+    max_bytes = int(MAX_AUDIO_DURATION_SEC * AUDIO_SAMPLE_RATE) * 4
+    # 긴 음원 허용 시 상한이 커지므로 버퍼는 60초분으로 시작해 필요할 때만 늘린다
+    buffer = np.empty(min(max_bytes // 4, 60 * AUDIO_SAMPLE_RATE) + DECODE_CHUNK_SAMPLES, dtype=np.float32)
+    n_bytes = 0
 
-    if result.returncode != 0:
-        stderr_short = result.stderr[-300:] if result.stderr else "(no stderr)"
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    watchdog = threading.Timer(DECODE_TIMEOUT_SEC, proc.kill)
+    watchdog.start()
+    try:
+        while True:
+            if n_bytes == buffer.nbytes:
+                grown = np.empty(min(len(buffer) * 2, max_bytes // 4 + DECODE_CHUNK_SAMPLES), dtype=np.float32)
+                grown[:len(buffer)] = buffer
+                buffer = grown
+            read = proc.stdout.readinto(memoryview(buffer).cast("B")[n_bytes:])
+            if not read:
+                break
+            n_bytes += read
+            if n_bytes > max_bytes:
+                proc.kill()
+                raise AudioTooLongError()
+        stderr = proc.stderr.read().decode("utf-8", errors="replace")
+        returncode = proc.wait()
+    finally:
+        watchdog.cancel()
+        proc.stdout.close()
+        proc.stderr.close()
+        # 예외로 빠져나온 경우에도 ffmpeg를 끝내고 회수해 좀비 프로세스를 남기지 않는다
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+
+    if returncode != 0:
+        stderr_short = stderr[-300:] if stderr else "(no stderr)"
         logger.error("ffmpeg failed: %s", stderr_short)
         raise ConversionError(f"오디오 변환 실패: {stderr_short[:150]}")
 
-    if not output_path.exists() or output_path.stat().st_size == 0:
-        raise ConversionError("ffmpeg 변환 결과 파일이 비어 있습니다.")
+    n_samples = n_bytes // 4
+    if n_samples == 0:
+        raise ConversionError("ffmpeg 디코딩 결과가 비어 있습니다.")
 
-    return output_path
+    return buffer[:n_samples].copy()
 
 
-def _convert_to_wav_pydub(input_path: Path, output_path: Path) -> Path:
-    """ffmpeg 없을 때 pydub fallback (WAV 입력만 가능)."""
-    from pydub import AudioSegment
+def _wav_memmap(input_path: Path) -> tuple[np.ndarray, int, float, float] | None:
+    """
+    WAV의 data 청크를 (프레임, 채널) 배열로 메모리 매핑한다.
 
-    ext = input_path.suffix.lower()
-    if ext != ".wav":
-        raise UnsupportedFormatError(ext)
+    헤더(fmt/data 청크 위치)만 직접 읽고 샘플은 페이지 캐시에서 필요한 만큼만 올라온다.
+    24비트 PCM처럼 NumPy dtype으로 바로 볼 수 없는 형식이면 None (libsndfile로 읽는다).
+
+    Returns:
+        (샘플 배열, 샘플레이트, 0 중심 오프셋, 스케일) 또는 None
+    """
+    file_size = input_path.stat().st_size
+    fmt = data_offset = None
+    with open(input_path, "rb") as f:
+        riff = f.read(12)
+        if riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            raise ConversionError("WAV 헤더를 읽을 수 없습니다.")
+        while len(header := f.read(8)) == 8:
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = f.read(chunk_size)
+                f.seek(chunk_size & 1, 1)
+            elif chunk_id == b"data":
+                data_offset = f.tell()
+                # 녹음 중 잘린 파일/스트리밍으로 쓴 파일은 크기가 0이나 0xFFFFFFFF로 남아 있다
+                data_size = min(chunk_size or file_size, file_size - data_offset)
+                break
+            else:
+                f.seek(chunk_size + (chunk_size & 1), 1)
+    if fmt is None or len(fmt) < 16 or data_offset is None:
+        raise ConversionError("WAV 헤더(fmt/data 청크)를 읽을 수 없습니다.")
+
+    format_tag, channels, sample_rate, _, block_align, bits = struct.unpack("<HHIIHH", fmt[:16])
+    if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        format_tag = struct.unpack("<H", fmt[24:26])[0]  # SubFormat GUID의 앞 2바이트
+    sample_format = WAV_SAMPLE_FORMATS.get((format_tag, bits))
+    if sample_format is None or channels == 0 or sample_rate == 0 or block_align != channels * bits // 8:
+        return None
+
+    dtype, offset, scale = sample_format
+    n_frames = data_size // block_align
+    if n_frames == 0:
+        raise ConversionError("오디오 디코딩 결과가 비어 있습니다.")
+    samples = np.memmap(input_path, dtype=dtype, mode="r", offset=data_offset, shape=(n_frames, channels))
+    return samples, sample_rate, offset, scale
+
+
+def _decode_audio_native(input_path: Path) -> np.ndarray:
+    """
+    ffmpeg 없이 WAV/FLAC/OGG를 mono 22050Hz float32로 디코딩한다.
+
+    PCM/float WAV는 메모리 매핑, 그 밖(FLAC, Vorbis, 24비트 WAV 등)은 libsndfile로 블록씩 읽어
+    미리 잡아 둔 mono 버퍼에 바로 다운믹스하므로 다채널 원본 전체를 메모리에 올리지 않는다.
+    길이는 헤더로 먼저 확인해 MAX_AUDIO_DURATION_SEC를 넘으면 읽기 전에 AudioTooLongError를 낸다.
+    """
+    wav = _wav_memmap(input_path) if input_path.suffix.lower() == ".wav" else None
+    if wav is not None:
+        samples, sample_rate, offset, scale = wav
+        if len(samples) > MAX_AUDIO_DURATION_SEC * sample_rate:
+            raise AudioTooLongError()
+        mono = np.empty(len(samples), dtype=np.float32)
+        for start in range(0, len(samples), NATIVE_DECODE_BLOCK_FRAMES):
+            block = samples[start:start + NATIVE_DECODE_BLOCK_FRAMES]
+            out = mono[start:start + len(block)]
+            np.mean(block, axis=1, dtype=np.float32, out=out)
+            if offset:
+                out -= offset
+            out *= scale
+        del samples
+    else:
+        mono, sample_rate = _decode_audio_sndfile(input_path)
+
+    return _resample(mono, sample_rate)
+
+
+def _decode_audio_sndfile(input_path: Path) -> tuple[np.ndarray, int]:
+    """libsndfile(soundfile)로 블록씩 읽으며 mono로 다운믹스한다."""
+    try:
+        import soundfile
+    except ImportError as e:
+        raise ConversionError(f"soundfile을 불러올 수 없습니다: {e}")
+
+    try:
+        with soundfile.SoundFile(str(input_path)) as f:
+            sample_rate = f.samplerate
+            if f.frames > MAX_AUDIO_DURATION_SEC * sample_rate:
+                raise AudioTooLongError()
+            mono = np.empty(f.frames, dtype=np.float32)
+            n_frames = 0
+            for block in f.blocks(NATIVE_DECODE_BLOCK_FRAMES, dtype="float32", always_2d=True):
+                # Vorbis는 헤더의 프레임 수가 실제와 조금 다를 수 있다
+                block = block[:len(mono) - n_frames]
+                np.mean(block, axis=1, out=mono[n_frames:n_frames + len(block)])
+                n_frames += len(block)
+    except (RuntimeError, soundfile.SoundFileError) as e:
+        raise ConversionError(f"오디오 변환 실패: {str(e)[:150]}")
+
+    if n_frames == 0:
+        raise ConversionError("오디오 디코딩 결과가 비어 있습니다.")
+    return mono[:n_frames], sample_rate
 
-    audio = AudioSegment.from_wav(str(input_path))
 
-    duration_sec = len(audio) / 1000.0
-    if duration_sec > MAX_AUDIO_DURATION_SEC:
-        raise AudioTooLongError()
-    if duration_sec > PROCESS_TRIM_SEC:
-        audio = audio[:PROCESS_TRIM_SEC * 1000]
+def _resample(mono: np.ndarray, sample_rate: int) -> np.ndarray:
+    """polyphase FIR(scipy.signal.resample_poly)로 AUDIO_SAMPLE_RATE에 맞춘다 (float32 유지)."""
+    if sample_rate == AUDIO_SAMPLE_RATE:
+        return mono
+    from scipy.signal import resample_poly
 
-    audio = audio.set_channels(1).set_frame_rate(22050).set_sample_width(2)
-    audio.export(str(output_path), format="wav")
-    return output_path
+    g = math.gcd(sample_rate, AUDIO_SAMPLE_RATE)
+    resampled = resample_poly(mono, AUDIO_SAMPLE_RATE // g, sample_rate // g)
+    return resampled.astype(np.float32, copy=False)
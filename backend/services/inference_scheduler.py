@@ -0,0 +1,150 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from config import INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS, INFERENCE_THREADS
+from services.metrics import metrics
+from services.model_manager import ModelManager, model_manager
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    __slots__ = ("windows", "future")
+
+    def __init__(self, windows: np.ndarray):
+        self.windows = windows
+        self.future: Future = Future()
+
+
+class InferenceScheduler:
+    """
+    진행 중인 모든 작업의 오디오 윈도우를 모아 한 번의 배치 추론으로 처리한다.
+
+    각 작업은 (n_windows, AUDIO_N_SAMPLES, 1) 배열을 제출하고, 배치 결과 중
+    자기 윈도우에 해당하는 model output(note/onset/contour)만 돌려받는다.
+    요청은 항상 수집 스레드 하나가 모으고, 다 모은 배치만 threads개짜리 실행기로 넘긴다.
+    실행 슬롯이 모두 차 있으면 수집을 멈추므로 그동안 들어온 요청은 다음 배치에 함께 들어간다.
+    """
+
+    def __init__(
+        self,
+        manager: ModelManager,
+        max_batch_size: int = INFERENCE_MAX_BATCH_SIZE,
+        max_wait_ms: float = INFERENCE_MAX_WAIT_MS,
+        threads: int = INFERENCE_THREADS,
+    ):
+        self.manager = manager
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_sec = max(0.0, max_wait_ms) / 1000.0
+        self.threads = max(1, threads)
+        self._queue: queue.Queue[_Request] = queue.Queue()
+        self._collector: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots = threading.BoundedSemaphore(self.threads)
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches_run = 0
+        self.windows_run = 0
+        self.requests_run = 0
+
+    def infer(self, windows: np.ndarray) -> dict[str, np.ndarray]:
+        """윈도우를 제출하고 배치 추론이 끝날 때까지 기다린다."""
+        return self.submit(windows).result()
+
+    def submit(self, windows: np.ndarray) -> Future:
+        self._ensure_started()
+        request = _Request(np.asarray(windows, dtype=np.float32))
+        self._queue.put(request)
+        return request.future
+
+    def _ensure_started(self) -> None:
+        if self._collector is not None:
+            return
+        with self._start_lock:
+            if self._collector is not None:
+                return
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.threads, thread_name_prefix="inference-batch"
+            )
+            collector = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+            collector.start()
+            self._collector = collector
+
+    def _collect(self) -> list[_Request]:
+        """첫 요청 이후 max_wait 동안, 또는 max_batch_size가 찰 때까지 요청을 모은다."""
+        first = self._queue.get()
+        batch = [first]
+        n_windows = len(first.windows)
+        deadline = time.monotonic() + self.max_wait_sec
+
+        while n_windows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            n_windows += len(request.windows)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            self._slots.acquire()
+            batch = self._collect()
+            future = self._executor.submit(self._run_batch, batch)
+            future.add_done_callback(lambda _: self._slots.release())
+
+    def _run_batch(self, batch: list[_Request]) -> None:
+        try:
+            outputs = self._predict(np.concatenate([r.windows for r in batch]))
+        except Exception as e:
+            logger.error("배치 추론 실패 (%d개 작업): %s", len(batch), e)
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        # 배치 출력을 각 작업의 윈도우 구간으로 다시 나눠 돌려준다
+        start = 0
+        for request in batch:
+            end = start + len(request.windows)
+            request.future.set_result({k: v[start:end] for k, v in outputs.items()})
+            start = end
+
+        with self._stats_lock:
+            self.requests_run += len(batch)
+
+    def _predict(self, windows: np.ndarray) -> dict[str, np.ndarray]:
+        model = self.manager.get()
+        chunks: dict[str, list[np.ndarray]] = {}
+        n_batches = 0
+        for i in range(0, len(windows), self.max_batch_size):
+            t0 = time.perf_counter()
+            for k, v in model.predict(windows[i:i + self.max_batch_size]).items():
+                chunks.setdefault(k, []).append(v)
+            metrics.observe("saxapp_model_inference_seconds", time.perf_counter() - t0)
+            n_batches += 1
+        with self._stats_lock:
+            self.batches_run += n_batches
+            self.windows_run += len(windows)
+        return {k: np.concatenate(v) for k, v in chunks.items()}
+
+    def status(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait_sec * 1000.0, 1),
+            "threads": self.threads,
+            "pending": self._queue.qsize(),
+            "batches": self.batches_run,
+            "windows": self.windows_run,
+            "requests": self.requests_run,
+        }
+
+
+inference_scheduler = InferenceScheduler(model_manager)
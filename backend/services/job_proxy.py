@@ -0,0 +1,70 @@
+import logging
+
+import httpx
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from utils.exceptions import NodeUnavailableError
+from utils.job_registry import job_registry
+
+logger = logging.getLogger(__name__)
+
+PROXY_HEADER = "x-job-proxied"
+FORWARD_REQUEST_HEADERS = ("accept", "if-none-match", "last-event-id", "range")
+FORWARD_RESPONSE_HEADERS = (
+    "cache-control", "content-disposition", "content-encoding", "content-length",
+    "content-range", "content-type", "etag", "x-accel-buffering",
+)
+
+
+class JobProxy:
+    """
+    이 노드의 디스크에 없는 작업 요청을 작업 ID가 가리키는 주인 노드로 넘긴다.
+
+    응답은 버퍼링하지 않고 그대로 흘려보내므로 파일 다운로드와 SSE 진행 스트림 모두
+    주인 노드에서 직접 받는 것과 같다. 프록시된 요청은 다시 프록시하지 않는다.
+    """
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            # SSE 스트림은 오래 열려 있으므로 읽기 타임아웃은 두지 않는다
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=None))
+        return self._client
+
+    async def forward(self, request: Request, job_id: str) -> StreamingResponse | None:
+        """주인 노드의 응답. 다른 노드의 작업이 아니면(모르는/만료된 작업) None."""
+        owner = job_registry.owner_url(job_id)
+        if owner is None or request.headers.get(PROXY_HEADER):
+            return None
+
+        headers = {k: v for k, v in request.headers.items() if k in FORWARD_REQUEST_HEADERS}
+        headers[PROXY_HEADER] = job_registry.node
+        client = self._get_client()
+        upstream_request = client.build_request(
+            "GET", f"{owner}{request.url.path}",
+            params=request.query_params, headers=headers,
+        )
+        try:
+            upstream = await client.send(upstream_request, stream=True)
+        except httpx.HTTPError as e:
+            logger.warning("[%s] 주인 노드 %s 연결 실패: %s", job_id, owner, e)
+            raise NodeUnavailableError(owner)
+
+        return StreamingResponse(
+            upstream.aiter_raw(),
+            status_code=upstream.status_code,
+            headers={k: v for k, v in upstream.headers.items() if k in FORWARD_RESPONSE_HEADERS},
+            background=BackgroundTask(upstream.aclose),
+        )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+job_proxy = JobProxy()
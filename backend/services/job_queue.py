@@ -0,0 +1,310 @@
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from config import (
+    INFERENCE_MAX_BATCH_SIZE,
+    JOB_MP_START_METHOD,
+    JOB_PRELOAD,
+    JOB_QUEUE_SIZE,
+    JOB_WORKERS,
+)
+from services.metrics import metrics
+from services.model_manager import model_manager
+from services.profiler import job_profiler
+from services.pipeline import restore_cached_result, run_conversion
+from utils.exceptions import AppError, QueueFullError, WorkerCrashedError
+from utils.file_manager import append_job_event, write_job_status
+
+logger = logging.getLogger(__name__)
+
+# JOB_PRELOAD일 때 fork 서버가 미리 import하는 모듈.
+# 모델 로드는 넣지 않는다: TensorFlow 런타임을 초기화한 뒤 fork한 워커는 추론에서 멈춘다.
+# 모델은 워커마다 _init_worker에서 로드한다 (import가 끝나 있어 몇 초 안 걸린다).
+PRELOAD_MODULES = (
+    "services.pitch_detector",
+    "services.model_manager",
+    "services.pipeline",
+    "music21",
+)
+
+
+def _init_worker() -> None:
+    """워커 프로세스 시작 시 모델을 미리 로드/워밍업한다."""
+    metrics.role = "worker"  # fork로 띄우면 API 프로세스의 값을 물려받는다
+    try:
+        model_manager.warmup(INFERENCE_MAX_BATCH_SIZE)
+    except Exception as e:
+        logger.error("워커 모델 워밍업 실패 (첫 작업 시 다시 시도): %s", e)
+
+
+def _worker_model_status() -> dict:
+    return model_manager.status()
+
+
+def _run_job(job_dir: Path, *args, profile: bool = False) -> dict:
+    """워커에서 변환을 실행하고, 끝나면 이 프로세스의 메트릭 스냅샷을 남긴다."""
+    try:
+        if not profile:
+            return run_conversion(job_dir, *args)
+        with job_profiler.capture(job_dir) as profiled:
+            result = run_conversion(job_dir, *args)
+        if profiled:
+            result["metadata"]["profiled"] = True
+        return result
+    finally:
+        metrics.dump()
+
+
+class JobQueue:
+    """
+    변환 작업을 제한된 크기의 워커 풀에서 실행한다.
+
+    workers > 0이면 모델을 미리 로드한 ProcessPoolExecutor를, 0이면 현재 프로세스의
+    스레드 풀을 사용한다. 실행 중 + 대기 중인 작업이 queue_size에 도달하면
+    QueueFullError(429)로 거절한다.
+    """
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        queue_size: int = JOB_QUEUE_SIZE,
+        start_method: str = JOB_MP_START_METHOD,
+        preload: bool = JOB_PRELOAD,
+    ):
+        self.workers = max(0, workers)
+        self.queue_size = max(1, queue_size)
+        self.start_method = start_method
+        self.preload = preload
+        self.start_seconds: float | None = None
+        self._executor: Executor | None = None
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._avg_job_sec = 10.0
+        self.worker_model_status: dict | None = None
+
+    @property
+    def inline(self) -> bool:
+        return self.workers == 0
+
+    def _mp_context(self) -> multiprocessing.context.BaseContext:
+        if self.preload:
+            try:
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(list(PRELOAD_MODULES))
+                return context
+            except ValueError:
+                # forkserver가 없는 플랫폼 (Windows)
+                logger.warning("forkserver를 사용할 수 없어 %s로 워커를 띄웁니다.", self.start_method)
+                self.preload = False
+        return multiprocessing.get_context(self.start_method)
+
+    def start(self, wait: bool = True) -> None:
+        """워커 풀을 띄운다. wait=False면 모델 워밍업을 기다리지 않는다 (워커 재시작)."""
+        t0 = time.perf_counter()
+        with self._lock:
+            if self._executor is not None:
+                return
+            if self.inline:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.queue_size, thread_name_prefix="convert-job"
+                )
+            else:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=self._mp_context(),
+                    initializer=_init_worker,
+                )
+            executor = self._executor
+        if self.inline:
+            model_manager.warmup(INFERENCE_MAX_BATCH_SIZE)
+            self.start_seconds = time.perf_counter() - t0
+            return
+
+        # 워커를 미리 띄워 첫 요청이 모델 로드를 기다리지 않게 한다
+        warm = [executor.submit(_worker_model_status) for _ in range(self.workers)]
+        if not wait:
+            return
+        for future in warm:
+            try:
+                self.worker_model_status = future.result()
+            except Exception as e:
+                logger.error("워커 시작 실패: %s", e)
+        self.start_seconds = time.perf_counter() - t0
+        logger.info(
+            "작업 워커 %d개 준비 완료: %.2fs (%s)",
+            self.workers, self.start_seconds, "preload" if self.preload else self.start_method,
+        )
+
+    def _restart(self, broken: Executor) -> None:
+        """워커가 죽어(OOM killer 등) 깨진 프로세스 풀을 버리고 새로 띄운다."""
+        with self._lock:
+            if self._executor is not broken:
+                return  # 이미 다른 작업이 다시 띄웠다
+            self._executor = None
+        logger.error("작업 워커가 비정상 종료되어 워커 풀을 다시 시작합니다.")
+        metrics.inc("saxapp_worker_restarts_total")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start(wait=False)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def active(self) -> int:
+        return sum(1 for f in self._futures.values() if not f.done())
+
+    @property
+    def in_flight(self) -> int:
+        """워커에서 실행 중인 작업 수 (스레드 모드는 대기 없이 모두 실행된다)."""
+        return min(self.active, self.concurrency)
+
+    @property
+    def concurrency(self) -> int:
+        """동시에 실행할 수 있는 작업 수 (프로세스 워커 수, 스레드 모드는 대기열 크기)."""
+        return self.workers or self.queue_size
+
+    @property
+    def queue_depth(self) -> int:
+        return self.active - self.in_flight
+
+    def retry_after(self) -> int:
+        """대기열이 비워질 때까지의 대략적인 시간(초)."""
+        slots = max(1, self.workers)
+        waiting = max(1, self.active - slots + 1)
+        return max(1, math.ceil(self._avg_job_sec * waiting / slots))
+
+    def ensure_capacity(self) -> None:
+        """업로드를 받기 전에 대기열 여유를 미리 확인한다."""
+        if self.active >= self.queue_size:
+            raise QueueFullError(self.retry_after())
+
+    def submit(
+        self,
+        job_id: str,
+        job_dir: Path,
+        upload_path: Path,
+        transposition: str,
+        simplify: bool,
+        tempo_bpm: int | None,
+        audio_hash: str | None = None,
+        profile: bool = False,
+    ) -> Future:
+        if self._executor is None:
+            self.start()
+
+        if profile:
+            # 요청한 프로파일은 캐시를 건너뛰고 디코딩부터 전체 파이프라인을 실행한다
+            audio_hash = None
+
+        # 같은 오디오 + 같은 옵션이면 워커를 거치지 않고 캐시에서 바로 끝낸다
+        if audio_hash:
+            cached = restore_cached_result(job_dir, audio_hash, transposition, simplify, tempo_bpm)
+            if cached is not None:
+                self._finish(job_dir, status="done", stage="done", progress=100, result=cached)
+                metrics.inc("saxapp_jobs_total", status="done")
+                future = Future()
+                future.set_result(cached)
+                return future
+
+        # 캐시 적중이 아닌 작업 N개마다 하나는 자동으로 프로파일링한다
+        profile = profile or job_profiler.should_sample()
+
+        with self._lock:
+            self._futures = {k: f for k, f in self._futures.items() if not f.done()}
+            if len(self._futures) >= self.queue_size:
+                raise QueueFullError(self.retry_after())
+
+            write_job_status(job_dir, status="queued", stage="queued", progress=0)
+            append_job_event(job_dir, {"type": "queued", "position": len(self._futures)})
+            submitted_at = time.time()
+            executor = self._executor
+            try:
+                future = executor.submit(
+                    _run_job,
+                    job_dir, upload_path, transposition, simplify, tempo_bpm, audio_hash,
+                    profile=profile,
+                )
+            except BrokenProcessPool:
+                future = None
+            else:
+                self._futures[job_id] = future
+
+        if future is None:
+            self._restart(executor)
+            error = WorkerCrashedError()
+            self._finish(job_dir, status="error", error=error.message, status_code=error.status_code)
+            metrics.inc("saxapp_jobs_total", status="error")
+            raise error
+
+        # 워커 크래시를 AppError로 바꿔 전달하도록 호출자에게는 별도의 Future를 준다
+        result = Future()
+        future.add_done_callback(
+            lambda f: self._on_done(job_dir, f, time.time() - submitted_at, executor, result)
+        )
+        return result
+
+    @staticmethod
+    def _finish(job_dir: Path, **fields) -> None:
+        """스트림에 마지막 이벤트(done/error)를 남기고 최종 상태를 기록한다."""
+        event = {"type": fields["status"]}
+        if "result" in fields:
+            event.update(fields["result"])
+        if "error" in fields:
+            event.update(error=fields["error"], status_code=fields["status_code"])
+        # SSE 스트림은 상태가 끝난 것을 본 뒤 남은 줄을 모두 읽고 닫으므로 이벤트를 먼저 쓴다
+        append_job_event(job_dir, event)
+        write_job_status(job_dir, **fields)
+
+    def _on_done(self, job_dir: Path, future: Future, elapsed: float, executor: Executor, result: Future) -> None:
+        self._avg_job_sec = 0.8 * self._avg_job_sec + 0.2 * elapsed
+        error = None if future.cancelled() else future.exception()
+        if isinstance(error, BrokenProcessPool):
+            # 작업 중에 워커 프로세스가 죽었다: 풀을 다시 띄우고 이 작업은 503으로 끝낸다
+            self._restart(executor)
+            error = WorkerCrashedError()
+        try:
+            metrics.inc("saxapp_jobs_total", status="error" if future.cancelled() or error else "done")
+            if error is not None:
+                metrics.count_error(error)
+            if future.cancelled():
+                self._finish(job_dir, status="error", error="작업이 취소되었습니다.", status_code=503)
+            elif error is None:
+                self._finish(
+                    job_dir, status="done", stage="done", progress=100, result=future.result()
+                )
+            elif isinstance(error, AppError):
+                self._finish(job_dir, status="error", error=error.message, status_code=error.status_code)
+            else:
+                self._finish(
+                    job_dir, status="error",
+                    error=f"처리 중 오류가 발생했습니다: {error}", status_code=500,
+                )
+        finally:
+            if future.cancelled():
+                result.cancel()
+            elif error is not None:
+                result.set_exception(error)
+            else:
+                result.set_result(future.result())
+
+    def status(self) -> dict:
+        return {
+            "mode": "inline" if self.inline else "process",
+            "start_method": None if self.inline else ("forkserver+preload" if self.preload else self.start_method),
+            "start_seconds": round(self.start_seconds, 2) if self.start_seconds is not None else None,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "avg_job_seconds": round(self._avg_job_sec, 2),
+        }
+
+
+job_queue = JobQueue()
@@ -0,0 +1,215 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from config import METRICS_DIR, METRICS_DUMP_INTERVAL_SEC
+
+logger = logging.getLogger(__name__)
+
+# 단계/추론 지연 시간 히스토그램 버킷 (초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+METRICS = {
+    "saxapp_stage_duration_seconds": ("histogram", "변환 단계별 소요 시간 (save, decode, vad, detect, musicxml, simplify, pdf)"),
+    "saxapp_model_inference_seconds": ("histogram", "basic-pitch 배치 추론 한 번의 소요 시간"),
+    "saxapp_audio_seconds_total": ("counter", "디코딩한 오디오 길이 (초)"),
+    "saxapp_active_audio_seconds_total": ("counter", "무음 압축 후 음높이 인식에 넘긴 오디오 길이 (초)"),
+    "saxapp_jobs_total": ("counter", "끝난 변환 작업 수 (status=done|error)"),
+    "saxapp_errors_total": ("counter", "AppError 종류별 오류 수"),
+    "saxapp_worker_restarts_total": ("counter", "워커 프로세스가 죽어 워커 풀을 다시 띄운 횟수"),
+    "saxapp_jobs_in_flight": ("gauge", "워커에서 실행 중인 변환 작업 수"),
+    "saxapp_queue_depth": ("gauge", "워커를 기다리는 변환 작업 수"),
+    "saxapp_process_resident_memory_bytes": ("gauge", "프로세스 RSS (process=api-<pid>|worker-<pid>)"),
+    "saxapp_temp_dir_bytes": ("gauge", "작업 디렉토리 전체 크기 (job reaper 마지막 측정값)"),
+}
+
+
+def process_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class MetricsRegistry:
+    """
+    카운터와 히스토그램을 프로세스 안에 모으고 Prometheus 텍스트 형식으로 내보낸다.
+
+    변환 단계와 모델 추론은 작업 워커 프로세스에서 일어나므로, 워커는 작업이 끝날 때마다
+    자기 값 전체를 METRICS_DIR/<pid>.json에 덮어쓴다. API 프로세스(uvicorn 워커마다 하나)도
+    start() 이후 주기적으로 같은 형식의 스냅샷을 남기므로, /api/metrics는 어느 프로세스가
+    응답하든 자기 값과 다른 프로세스들의 파일을 합친다 (결과 캐시의 .stats.json처럼 공유 상태는 디스크에 둔다).
+    """
+
+    def __init__(self, snapshot_dir: Path = METRICS_DIR, dump_interval_sec: float = METRICS_DUMP_INTERVAL_SEC):
+        self.snapshot_dir = snapshot_dir
+        self.dump_interval_sec = dump_interval_sec
+        self.role = "worker"
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._histograms: dict[tuple[str, tuple], list] = {}   # [버킷별 개수, 합, 개수]
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, _labels_key(labels))
+        with self._lock:
+            hist = self._histograms.setdefault(key, [[0] * len(LATENCY_BUCKETS), 0.0, 0])
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    hist[0][i] += 1
+                    break
+            hist[1] += value
+            hist[2] += 1
+
+    def count_error(self, error: Exception) -> None:
+        self.inc("saxapp_errors_total", type=type(error).__name__)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+                "histograms": [
+                    [name, dict(labels), list(buckets), total, count]
+                    for (name, labels), (buckets, total, count) in self._histograms.items()
+                ],
+                "role": self.role,
+                "rss_bytes": process_rss_bytes(),
+            }
+
+    def dump(self) -> None:
+        """이 프로세스의 누적값을 스냅샷 파일로 남긴다 (작업 워커는 작업마다, API 프로세스는 주기적으로)."""
+        try:
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.snapshot_dir / f".{os.getpid()}.tmp"
+            tmp.write_text(json.dumps(self.snapshot()))
+            os.replace(tmp, self.snapshot_dir / f"{os.getpid()}.json")
+        except OSError as e:
+            logger.warning("메트릭 스냅샷 저장 실패: %s", e)
+
+    def start(self, role: str = "api") -> None:
+        """API 프로세스 시작: 죽은 프로세스의 스냅샷을 지우고 자기 스냅샷을 주기적으로 남긴다."""
+        self.role = role
+        self.remove_stale_snapshots()
+        self.dump()
+        if self._thread is None and self.dump_interval_sec > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.dump()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.dump_interval_sec):
+            self.dump()
+
+    def remove_stale_snapshots(self) -> None:
+        """이미 끝난 프로세스의 스냅샷만 지운다 (살아 있는 다른 API 프로세스와 그 워커의 값은 남긴다)."""
+        if not self.snapshot_dir.is_dir():
+            return
+        for path in self.snapshot_dir.glob("*.json"):
+            try:
+                pid = int(path.stem)
+            except ValueError:
+                continue
+            if not _alive(pid):
+                path.unlink(missing_ok=True)
+
+    def _other_snapshots(self) -> list[tuple[int, dict]]:
+        snapshots = []
+        if not self.snapshot_dir.is_dir():
+            return snapshots
+        for path in self.snapshot_dir.glob("*.json"):
+            try:
+                pid = int(path.stem)
+                if pid != os.getpid():
+                    snapshots.append((pid, json.loads(path.read_text())))
+            except (ValueError, OSError):
+                continue
+        return snapshots
+
+    def render(self, gauges: dict[str, float]) -> str:
+        """이 프로세스 + 다른 프로세스 스냅샷을 합쳐 텍스트 형식으로 만든다. gauges는 수집 시점의 값."""
+        counters: dict[tuple[str, tuple], float] = {}
+        histograms: dict[tuple[str, tuple], list] = {}
+        samples: dict[str, list[tuple[tuple, float]]] = {"saxapp_process_resident_memory_bytes": []}
+
+        for pid, snapshot in [(os.getpid(), self.snapshot()), *self._other_snapshots()]:
+            for name, labels, value in snapshot["counters"]:
+                key = (name, _labels_key(labels))
+                counters[key] = counters.get(key, 0.0) + value
+            for name, labels, buckets, total, count in snapshot["histograms"]:
+                hist = histograms.setdefault((name, _labels_key(labels)), [[0] * len(LATENCY_BUCKETS), 0.0, 0])
+                hist[0] = [a + b for a, b in zip(hist[0], buckets)]
+                hist[1] += total
+                hist[2] += count
+            if pid == os.getpid() or _alive(pid):
+                process = f"{snapshot.get('role', 'worker')}-{pid}"
+                samples["saxapp_process_resident_memory_bytes"].append(
+                    ((("process", process),), snapshot.get("rss_bytes", 0))
+                )
+        for name, value in gauges.items():
+            samples[name] = [((), value)]
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            if kind == "counter":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            elif kind == "histogram":
+                for (metric, labels), (buckets, total, count) in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, n in zip(LATENCY_BUCKETS, buckets):
+                        cumulative += n
+                        lines.append(f"{name}_bucket{_format_labels(labels, (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+            else:
+                for labels, value in samples.get(name, []):
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+metrics = MetricsRegistry()
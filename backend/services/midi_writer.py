@@ -0,0 +1,53 @@
+"""
+음표 이벤트 → MIDI 파일.
+
+basic_pitch.note_creation.note_events_to_midi와 같은 결과(악기, 벨로시티, 피치 벤드)를
+pretty_midi로 직접 만든다. basic-pitch는 import만으로 TensorFlow를 올리므로,
+MIDI 다운로드를 처리하는 API 프로세스가 모델 런타임 없이 쓸 수 있게 따로 둔다.
+"""
+from pathlib import Path
+
+import numpy as np
+import pretty_midi
+
+# basic_pitch.constants와 같은 값
+CONTOURS_BINS_PER_SEMITONE = 3
+N_PITCH_BEND_TICKS = 8192
+MIDI_PROGRAM = pretty_midi.instrument_name_to_program("Electric Piano 1")
+
+
+def _drop_overlapping_pitch_bends(note_events: list[tuple]) -> list[tuple]:
+    """시간이 겹치는 음들의 피치 벤드는 버린다 (한 악기 트랙에 벤드는 하나뿐이므로)."""
+    note_events = sorted(note_events)
+    for i in range(len(note_events) - 1):
+        for j in range(i + 1, len(note_events)):
+            if note_events[j][0] >= note_events[i][1]:
+                break
+            note_events[i] = note_events[i][:-1] + (None,)
+            note_events[j] = note_events[j][:-1] + (None,)
+    return note_events
+
+
+def write_midi(note_events: list[tuple], midi_output_path: Path, tempo_bpm: int | None = None) -> Path:
+    effective_tempo = float(tempo_bpm) if tempo_bpm else 120.0
+    # JSON 캐시에서 읽은 이벤트는 list이므로 tuple로 맞춘다
+    events = _drop_overlapping_pitch_bends([tuple(event) for event in note_events])
+
+    midi_data = pretty_midi.PrettyMIDI(initial_tempo=effective_tempo)
+    track = pretty_midi.Instrument(program=MIDI_PROGRAM)
+    for start, end, pitch, amplitude, pitch_bend in events:
+        track.notes.append(
+            pretty_midi.Note(velocity=int(np.round(127 * amplitude)), pitch=pitch, start=start, end=end)
+        )
+        if not pitch_bend:
+            continue
+        # ±2반음까지만 표현되므로 범위를 넘는 벤드는 잘라낸다
+        ticks = np.round(np.array(pitch_bend) * 4096 / CONTOURS_BINS_PER_SEMITONE).astype(int)
+        ticks = np.clip(ticks, -N_PITCH_BEND_TICKS, N_PITCH_BEND_TICKS - 1)
+        for time, tick in zip(np.linspace(start, end, len(pitch_bend)), ticks):
+            track.pitch_bends.append(pretty_midi.PitchBend(tick, time))
+    if events:
+        midi_data.instruments.append(track)
+
+    midi_data.write(str(midi_output_path))
+    return midi_output_path
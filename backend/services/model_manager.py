@@ -0,0 +1,98 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from utils.exceptions import PitchDetectionError
+
+logger = logging.getLogger(__name__)
+
+
+class ModelManager:
+    """
+    basic-pitch 모델을 워커 프로세스당 한 번만 로드해 모든 작업에서 재사용한다.
+
+    basic-pitch는 import만으로 TensorFlow를 올리므로 모델이 처음 필요할 때 불러온다
+    (프로세스 워커 모드의 API 프로세스는 끝까지 TensorFlow를 올리지 않는다).
+    """
+
+    def __init__(self, model_path=None):
+        self.model_path = model_path  # None이면 basic-pitch 기본 모델 (ICASSP 2022)
+        self._model = None
+        self._lock = threading.Lock()
+        self.import_seconds: float | None = None
+        self.load_seconds: float | None = None
+        self.warmup_seconds: float | None = None
+        self.error: str | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._model is not None and self.warmup_seconds is not None
+
+    def get(self):
+        if self._model is not None:
+            return self._model
+        return self.load()
+
+    def load(self):
+        with self._lock:
+            if self._model is not None:
+                return self._model
+
+            t0 = time.perf_counter()
+            try:
+                from basic_pitch import ICASSP_2022_MODEL_PATH
+                from basic_pitch.inference import Model
+            except Exception as e:
+                self.error = str(e)
+                raise PitchDetectionError(f"모델 로드 실패: {e}")
+            self.import_seconds = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            try:
+                model = Model(self.model_path or ICASSP_2022_MODEL_PATH)
+            except Exception as e:
+                self.error = str(e)
+                raise PitchDetectionError(f"모델 로드 실패: {e}")
+
+            self.load_seconds = time.perf_counter() - t0
+            self.error = None
+            self._model = model
+            logger.info(
+                "basic-pitch 모델 로드 완료: import %.2fs, 로드 %.2fs",
+                self.import_seconds, self.load_seconds,
+            )
+            return model
+
+    def warmup(self, max_batch_size: int = 1) -> None:
+        """
+        더미 윈도우로 추론해 그래프/세션 초기화를 미리 끝낸다.
+
+        배치 크기가 바뀔 때마다 그래프가 다시 트레이스되므로 1~max_batch_size를 모두 돌린다.
+        """
+        model = self.get()
+        from basic_pitch.constants import AUDIO_N_SAMPLES
+
+        t0 = time.perf_counter()
+        try:
+            for batch_size in range(1, max_batch_size + 1):
+                model.predict(np.zeros((batch_size, AUDIO_N_SAMPLES, 1), dtype=np.float32))
+        except Exception as e:
+            self.error = str(e)
+            raise PitchDetectionError(f"모델 워밍업 실패: {e}")
+        self.warmup_seconds = time.perf_counter() - t0
+        logger.info("basic-pitch 모델 워밍업 완료: %.2fs", self.warmup_seconds)
+
+    def status(self) -> dict:
+        return {
+            "loaded": self._model is not None,
+            "ready": self.ready,
+            "import_seconds": round(self.import_seconds, 3) if self.import_seconds is not None else None,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            "error": self.error,
+        }
+
+
+model_manager = ModelManager()
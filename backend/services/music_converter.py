@@ -1,124 +1,160 @@
+import logging
 from pathlib import Path
 
-import music21
-from music21 import converter, instrument, key, meter, tempo
+import numpy as np
 
+from config import MUSICXML_WRITER
+from services.musicxml_writer import write_musicxml
+from services.score_analyzer import analyze_notes
 from utils.exceptions import ConversionError
 
+logger = logging.getLogger(__name__)
+
 TRANSPOSITION_MAP = {
     "concert": 0,        # Concert pitch (C)
     "alto_eb": 9,        # Alto sax: up major 6th (9 semitones)
     "tenor_bb": 2,       # Tenor sax: up major 2nd (2 semitones)
 }
 
+# music21의 MIDI 가져오기 기본값과 같은 양자화 격자 (16분음표, 셋잇단 8분음표)
+QUANTIZE_DIVISORS = (4, 3)
 
-def midi_to_musicxml(
-    midi_path: Path,
-    output_path: Path,
-    transposition: str = "concert",
-    tempo_bpm: int | None = None,
-) -> tuple[Path, dict]:
-    effective_tempo = tempo_bpm if tempo_bpm else 120
 
-    try:
-        score = converter.parse(str(midi_path))
-    except Exception as e:
-        raise ConversionError(f"MIDI 파싱 실패: {e}")
+def _snap(values: np.ndarray, divisors: tuple[int, ...]) -> np.ndarray:
+    """각 값을 1/d 격자들 중 가장 가까운 점으로 맞춘다."""
+    candidates = np.stack([np.round(values * d) / d for d in divisors])
+    best = np.argmin(np.abs(candidates - values), axis=0)
+    return np.round(candidates[best, np.arange(len(values))], 9)
 
-    # Extract the first part (melody)
-    parts = score.parts
-    if not parts:
-        raise ConversionError("MIDI에서 파트를 찾을 수 없습니다.")
 
-    part = parts[0]
+def quantize_note_events(
+    note_events: list,
+    tempo_bpm: int,
+    divisors: tuple[int, ...] = QUANTIZE_DIVISORS,
+) -> list[tuple[float, float, int]]:
+    """
+    basic-pitch 음표 이벤트(초 단위)를 단선율 (offset_ql, duration_ql, midi) 목록으로 바꾼다.
 
-    # Create a new clean score
-    new_score = music21.stream.Score()
-    new_part = music21.stream.Part()
+    - 시작/끝 시각을 가장 가까운 격자에 맞춘다 (최소 길이는 가장 작은 격자 한 칸)
+    - 같은 시각에 시작하는 음(배음 등)은 가장 큰 음 하나만 남긴다
+    - 다음 음이 시작하면 앞 음을 거기서 자른다 (색소폰은 한 번에 한 음)
+    """
+    if not note_events:
+        return []
+
+    events = np.array([event[:4] for event in note_events], dtype=np.float64)
+    beats_per_sec = tempo_bpm / 60.0
+    onsets = _snap(events[:, 0] * beats_per_sec, divisors)
+    ends = _snap(events[:, 1] * beats_per_sec, divisors)
+    ends = np.maximum(ends, onsets + 1.0 / max(divisors))
+
+    # 시작 시각 오름차순, 같은 시각이면 amplitude 내림차순
+    order = np.lexsort((-events[:, 3], onsets))
+    onsets, ends, pitches = onsets[order], ends[order], events[order, 2].astype(int)
+
+    first = np.ones(len(onsets), dtype=bool)
+    first[1:] = onsets[1:] != onsets[:-1]
+    onsets, ends, pitches = onsets[first], ends[first], pitches[first]
+    ends[:-1] = np.minimum(ends[:-1], onsets[1:])
+
+    return list(zip(onsets.tolist(), np.round(ends - onsets, 9).tolist(), pitches.tolist()))
+
+
+def _saxophone(transposition: str):
+    from music21 import instrument
 
-    # Set saxophone instrument
     if transposition == "alto_eb":
-        sax = instrument.AltoSaxophone()
-    elif transposition == "tenor_bb":
-        sax = instrument.TenorSaxophone()
-    else:
-        sax = instrument.Saxophone()
-    new_part.insert(0, sax)
-
-    # Add time signature if missing
-    existing_ts = part.recurse().getElementsByClass(meter.TimeSignature)
-    if not existing_ts:
-        new_part.insert(0, meter.TimeSignature("4/4"))
-
-    # Add tempo (use effective_tempo)
-    existing_tempo = part.recurse().getElementsByClass(tempo.MetronomeMark)
-    if not existing_tempo:
-        new_part.insert(0, tempo.MetronomeMark(number=effective_tempo))
-    elif tempo_bpm:
-        # User specified tempo: override existing
-        new_part.insert(0, tempo.MetronomeMark(number=effective_tempo))
-
-    # Copy notes from the original part
-    for element in part.recurse().notesAndRests:
-        new_part.append(element)
-
-    # Apply transposition
+        return instrument.AltoSaxophone()
+    if transposition == "tenor_bb":
+        return instrument.TenorSaxophone()
+    return instrument.Saxophone()
+
+
+def write_score(
+    notes: list[tuple[float, float, int]],
+    output_path: Path,
+    transposition: str = "concert",
+    tempo_bpm: int | None = None,
+) -> dict:
+    """
+    양자화된 단선율 (offset_ql, duration_ql, concert midi)을 색소폰 파트 MusicXML로 쓰고
+    메타데이터를 돌려준다.
+
+    기본은 musicxml_writer로 직접 쓰고, 실패하거나 MUSICXML_WRITER=music21이면 music21로 쓴다.
+    """
+    effective_tempo = tempo_bpm if tempo_bpm else 120
     semitones = TRANSPOSITION_MAP.get(transposition, 0)
-    if semitones != 0:
-        new_part = new_part.transpose(semitones)
+    if not notes:
+        raise ConversionError("변환할 음표가 없습니다.")
+
+    # 조/음역/길이/경고는 음표 배열에서 한 번에 구한다 (music21에는 조만 넘긴다)
+    analysis = analyze_notes(notes, effective_tempo, semitones)
+    key_fifths, key_mode = analysis["key"]["fifths"], analysis["key"]["mode"]
+    metadata = {**analysis, "transposition": transposition, "tempo_bpm": effective_tempo}
+
+    if MUSICXML_WRITER == "native":
+        try:
+            write_musicxml(
+                notes, output_path, transposition, effective_tempo,
+                key_fifths, key_mode, semitones,
+            )
+            return metadata
+        except Exception as e:
+            logger.warning("MusicXML 직접 쓰기 실패, music21로 다시 씁니다: %s", e)
+
+    _write_with_music21(
+        notes, output_path, transposition, effective_tempo, semitones, key_fifths, key_mode,
+    )
+    return metadata
+
+
+def notes_to_musicxml(
+    note_events: list,
+    output_path: Path,
+    transposition: str = "concert",
+    tempo_bpm: int | None = None,
+) -> tuple[Path, dict]:
+    """
+    basic-pitch 음표 이벤트에서 바로 색소폰 파트를 만들어 MusicXML로 쓴다.
 
-    # Try key analysis
-    try:
-        detected_key = new_part.analyze("key")
-        new_part.insert(0, detected_key)
-    except Exception:
-        pass
+    MIDI 파일을 썼다가 music21로 다시 파싱하지 않고, 양자화한 단선율을 그대로 배치한다.
+    """
+    notes = quantize_note_events(note_events, tempo_bpm if tempo_bpm else 120)
+    return output_path, write_score(notes, output_path, transposition, tempo_bpm)
 
-    new_score.insert(0, new_part)
 
-    # Collect metadata
-    all_notes = list(new_part.recurse().notes)
-    pitches = [n.pitch.midi for n in all_notes if hasattr(n, "pitch")]
-
-    # Duration calculation: quarterLength / beatsPerMinute * 60
-    total_ql = float(new_score.duration.quarterLength)
-    duration_seconds = total_ql / effective_tempo * 60.0
-
-    # Build warnings
-    warnings: list[str] = []
-    note_count = len(all_notes)
-    lowest = min(pitches) if pitches else 0
-    highest = max(pitches) if pitches else 0
-
-    if note_count < 20:
-        warnings.append(
-            "인식된 음표가 너무 적습니다. 음질이 선명한 단선율 WAV를 사용해 주세요."
-        )
-    if duration_seconds < 5:
-        warnings.append(
-            "음원이 너무 짧아 악보 품질이 낮을 수 있습니다."
-        )
-    if pitches and (highest - lowest) < 6:
-        warnings.append(
-            "음역 변화가 작아 인식 결과가 단순하게 나올 수 있습니다."
-        )
-
-    metadata = {
-        "note_count": note_count,
-        "duration_seconds": round(duration_seconds, 1),
-        "pitch_range": {
-            "lowest": lowest,
-            "highest": highest,
-        },
-        "transposition": transposition,
-        "tempo_bpm": effective_tempo,
-        "warnings": warnings,
-    }
+def _write_with_music21(
+    notes: list[tuple[float, float, int]],
+    output_path: Path,
+    transposition: str,
+    effective_tempo: int,
+    semitones: int,
+    key_fifths: int,
+    key_mode: str,
+) -> None:
+    # music21은 import만 해도 무거우므로 대체 경로로 쓸 때 불러온다
+    from music21 import key, meter, note, stream, tempo
+
+    new_score = stream.Score()
+    new_part = stream.Part()
+    new_part.insert(0, _saxophone(transposition))
+    new_part.insert(0, meter.TimeSignature("4/4"))
+    new_part.insert(0, tempo.MetronomeMark(number=effective_tempo))
+    new_part.insert(0, key.KeySignature(key_fifths).asKey(key_mode))
+
+    # 음표 사이의 빈 곳은 쉼표로 채운다 (이조는 MIDI 번호에 바로 더한다)
+    cursor = 0.0
+    for offset, duration, midi in notes:
+        if offset > cursor:
+            new_part.coreInsert(cursor, note.Rest(quarterLength=offset - cursor))
+        new_part.coreInsert(offset, note.Note(midi + semitones, quarterLength=duration))
+        cursor = offset + duration
+    new_part.coreElementsChanged()
+
+    new_score.insert(0, new_part)
 
     # Write MusicXML
     try:
         new_score.write("musicxml", fp=str(output_path))
     except Exception as e:
         raise ConversionError(f"MusicXML 쓰기 실패: {e}")
-
-    return output_path, metadata
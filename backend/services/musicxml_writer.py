@@ -0,0 +1,243 @@
+"""
+단선율 색소폰 파트 전용 MusicXML 직렬화기.
+
+music21 Score를 만들고 makeNotation/exporter를 거치지 않고, 양자화된
+(offset_ql, duration_ql, midi) 목록을 마디 단위로 바로 XML 문자열로 써 내려간다.
+지원 범위: 4/4 한 파트, 마디선을 넘는 음의 붙임줄, 조표/박자표, 이조 악기 <transpose>,
+16분음표 격자와 셋잇단 격자(1/3, 1/6, 1/12박)의 음길이.
+"""
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+# 1박(4분음표)을 12로 나누면 16분음표(3)와 셋잇단 음표(4, 2, 1)를 모두 정수로 표현할 수 있다
+DIVISIONS = 12
+MEASURE_DIVISIONS = 4 * DIVISIONS
+
+# (길이(divisions), type, 점 개수, 셋잇단 여부) — 긴 것부터 탐욕적으로 나눈다
+NOTE_VALUES = [
+    (48, "whole", 0, False),
+    (36, "half", 1, False),
+    (24, "half", 0, False),
+    (18, "quarter", 1, False),
+    (16, "half", 0, True),
+    (12, "quarter", 0, False),
+    (9, "eighth", 1, False),
+    (8, "quarter", 0, True),
+    (6, "eighth", 0, False),
+    (4, "eighth", 0, True),
+    (3, "16th", 0, False),
+    (2, "16th", 0, True),
+    (1, "32nd", 0, True),
+]
+
+# music21의 MIDI 번호 → 음이름 기본 표기 (C# E- F# G# B-)
+PITCH_SPELLING = [
+    ("C", 0), ("C", 1), ("D", 0), ("E", -1), ("E", 0), ("F", 0),
+    ("F", 1), ("G", 0), ("G", 1), ("A", 0), ("B", -1), ("B", 0),
+]
+SHARP_ORDER = "FCGDAEB"
+ACCIDENTAL_NAMES = {-1: "flat", 0: "natural", 1: "sharp"}
+
+# transposition → (악기 이름, 약어, MIDI program(1부터), <transpose> (diatonic, chromatic, octave-change))
+INSTRUMENTS = {
+    "alto_eb": ("Alto Saxophone", "A Sax", 66, (-5, -9, 0)),
+    "tenor_bb": ("Tenor Saxophone", "T Sax", 67, (-1, -2, -1)),
+    "concert": ("Saxophone", "Sax", 66, None),
+}
+
+
+def split_duration(length: int) -> list[tuple[int, str, int, bool]]:
+    """divisions 단위 길이를 붙임줄로 이을 표기 가능한 음가들로 나눈다."""
+    pieces = []
+    while length > 0:
+        value = next(v for v in NOTE_VALUES if v[0] <= length)
+        pieces.append(value)
+        length -= value[0]
+    return pieces
+
+
+def _key_alters(fifths: int) -> dict[str, int]:
+    if fifths >= 0:
+        return {step: 1 for step in SHARP_ORDER[:fifths]}
+    return {step: -1 for step in SHARP_ORDER[::-1][:-fifths]}
+
+
+class _MeasureWriter:
+    """한 마디 안의 임시표 상태를 추적하면서 <note> 요소를 만든다."""
+
+    def __init__(self, key_alters: dict[str, int]):
+        self.key_alters = key_alters
+        self.shown: dict[tuple[str, int], int] = {}
+
+    def note(self, midi: int | None, piece: tuple, tie_start: bool, tie_stop: bool) -> str:
+        length, note_type, dots, triplet = piece
+        out = ["      <note>\n"]
+        accidental = None
+        if midi is None:
+            out.append("        <rest />\n")
+        else:
+            step, alter = PITCH_SPELLING[midi % 12]
+            octave = midi // 12 - 1
+            out.append(f"        <pitch>\n          <step>{step}</step>\n")
+            if alter:
+                out.append(f"          <alter>{alter}</alter>\n")
+            out.append(f"          <octave>{octave}</octave>\n        </pitch>\n")
+            # 붙임줄로 이어진 음은 임시표를 다시 쓰지 않는다
+            current = self.shown.get((step, octave), self.key_alters.get(step, 0))
+            if current != alter and not tie_stop:
+                accidental = ACCIDENTAL_NAMES[alter]
+            self.shown[(step, octave)] = alter
+
+        out.append(f"        <duration>{length}</duration>\n")
+        if tie_stop:
+            out.append('        <tie type="stop" />\n')
+        if tie_start:
+            out.append('        <tie type="start" />\n')
+        out.append(f"        <type>{note_type}</type>\n")
+        out.append("        <dot />\n" * dots)
+        if accidental:
+            out.append(f"        <accidental>{accidental}</accidental>\n")
+        if triplet:
+            out.append(
+                "        <time-modification>\n"
+                "          <actual-notes>3</actual-notes>\n"
+                "          <normal-notes>2</normal-notes>\n"
+                "        </time-modification>\n"
+            )
+        if tie_start or tie_stop:
+            out.append("        <notations>\n")
+            if tie_stop:
+                out.append('          <tied type="stop" />\n')
+            if tie_start:
+                out.append('          <tied type="start" />\n')
+            out.append("        </notations>\n")
+        out.append("      </note>\n")
+        return "".join(out)
+
+
+def _events(notes: list[tuple[float, float, int]], semitones: int):
+    """(시작, 길이, midi|None) 을 divisions 단위로 — 음표 사이 빈 곳은 쉼표로 채운다."""
+    cursor = 0
+    for offset, duration, midi in notes:
+        start = round(offset * DIVISIONS)
+        length = round(duration * DIVISIONS)
+        if start > cursor:
+            yield cursor, start - cursor, None
+        yield start, length, midi + semitones
+        cursor = start + length
+
+
+def write_musicxml(
+    notes: list[tuple[float, float, int]],
+    output_path: Path,
+    transposition: str,
+    tempo_bpm: int,
+    key_fifths: int,
+    key_mode: str,
+    semitones: int = 0,
+) -> Path:
+    """
+    양자화된 단선율 (offset_ql, duration_ql, concert midi)을 MusicXML 파일로 쓴다.
+
+    음표는 semitones만큼 이조해서 쓰고, 마디선에 걸치는 음은 나눠서 붙임줄로 잇는다.
+    마지막 마디는 music21과 마찬가지로 쉼표로 채우지 않는다.
+    """
+    part_name, abbreviation, program, transpose = INSTRUMENTS.get(transposition, INSTRUMENTS["concert"])
+    key_alters = _key_alters(key_fifths)
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<!DOCTYPE score-partwise  PUBLIC "-//Recordare//DTD MusicXML 4.0 Partwise//EN" '
+            '"http://www.musicxml.org/dtds/partwise.dtd">\n'
+            '<score-partwise version="4.0">\n'
+            "  <part-list>\n"
+            '    <score-part id="P1">\n'
+            f"      <part-name>{escape(part_name)}</part-name>\n"
+            f"      <part-abbreviation>{escape(abbreviation)}</part-abbreviation>\n"
+            '      <score-instrument id="P1-I1">\n'
+            f"        <instrument-name>{escape(part_name)}</instrument-name>\n"
+            "      </score-instrument>\n"
+            '      <midi-instrument id="P1-I1">\n'
+            "        <midi-channel>1</midi-channel>\n"
+            f"        <midi-program>{program}</midi-program>\n"
+            "      </midi-instrument>\n"
+            "    </score-part>\n"
+            "  </part-list>\n"
+            '  <part id="P1">\n'
+        )
+
+        measure_no = 0
+        measure: list[str] = []
+        writer: _MeasureWriter | None = None
+        position = MEASURE_DIVISIONS  # 첫 음표에서 1마디를 연다
+
+        def open_measure() -> None:
+            nonlocal measure_no, measure, writer, position
+            if measure:
+                f.write("".join(measure) + "    </measure>\n")
+            measure_no += 1
+            position = 0
+            writer = _MeasureWriter(key_alters)
+            measure = [f'    <measure number="{measure_no}">\n']
+            if measure_no == 1:
+                measure.append(
+                    "      <attributes>\n"
+                    f"        <divisions>{DIVISIONS}</divisions>\n"
+                    f"        <key>\n          <fifths>{key_fifths}</fifths>\n"
+                    f"          <mode>{key_mode}</mode>\n        </key>\n"
+                    "        <time>\n          <beats>4</beats>\n"
+                    "          <beat-type>4</beat-type>\n        </time>\n"
+                    "        <clef>\n          <sign>G</sign>\n          <line>2</line>\n        </clef>\n"
+                )
+                if transpose:
+                    diatonic, chromatic, octave_change = transpose
+                    measure.append(
+                        f"        <transpose>\n          <diatonic>{diatonic}</diatonic>\n"
+                        f"          <chromatic>{chromatic}</chromatic>\n"
+                    )
+                    if octave_change:
+                        measure.append(f"          <octave-change>{octave_change}</octave-change>\n")
+                    measure.append("        </transpose>\n")
+                measure.append(
+                    "      </attributes>\n"
+                    '      <direction placement="above">\n'
+                    "        <direction-type>\n"
+                    '          <metronome parentheses="no">\n'
+                    "            <beat-unit>quarter</beat-unit>\n"
+                    f"            <per-minute>{tempo_bpm}</per-minute>\n"
+                    "          </metronome>\n"
+                    "        </direction-type>\n"
+                    f'        <sound tempo="{tempo_bpm}" />\n'
+                    "      </direction>\n"
+                )
+
+        for _, length, midi in _events(notes, semitones):
+            tied_in = False
+            while length > 0:
+                if position >= MEASURE_DIVISIONS:
+                    open_measure()
+                chunk = min(length, MEASURE_DIVISIONS - position)
+                pieces = split_duration(chunk)
+                for i, piece in enumerate(pieces):
+                    last = i == len(pieces) - 1 and chunk == length
+                    is_note = midi is not None
+                    measure.append(writer.note(
+                        midi, piece,
+                        tie_start=is_note and not last,
+                        tie_stop=is_note and tied_in,
+                    ))
+                    tied_in = True
+                position += chunk
+                length -= chunk
+
+        if measure:
+            measure.append(
+                '      <barline location="right">\n'
+                "        <bar-style>light-heavy</bar-style>\n"
+                "      </barline>\n"
+            )
+            f.write("".join(measure) + "    </measure>\n")
+        f.write("  </part>\n</score-partwise>\n")
+
+    return output_path
@@ -1,67 +1,195 @@
+import functools
+import io
+import logging
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
 import verovio
 
-from utils.exceptions import ConversionError
+from config import VEROVIO_POOL_SIZE
+from utils.exceptions import ConversionError, PageNotFoundError
 
+logger = logging.getLogger(__name__)
 
-def generate_pdf(musicxml_path: Path, pdf_output_path: Path) -> Path:
-    tk = verovio.toolkit()
-    tk.setOptions({
-        "pageWidth": 2100,
-        "pageHeight": 2970,
-        "scale": 40,
-        "adjustPageHeight": True,
-        "footer": "none",
-        "header": "none",
-    })
-
-    musicxml_content = musicxml_path.read_text(encoding="utf-8")
-    if not tk.loadData(musicxml_content):
-        raise ConversionError("Verovio가 MusicXML을 로드할 수 없습니다.")
-
-    # Generate SVG pages
-    page_count = tk.getPageCount()
-    svg_pages = []
-    for i in range(1, page_count + 1):
-        svg = tk.renderToSVG(i)
-        svg_pages.append(svg)
-
-    # Convert SVGs to PDF using cairosvg
+# verovio의 기본 리소스(폰트) 경로는 스레드마다 따로라서, 다른 스레드에서 만든 toolkit에는
+# 직접 지정해야 한다
+RESOURCE_PATH = verovio.toolkit(False).getResourcePath()
+
+PAGE_OPTIONS = {
+    "pageWidth": 2100,
+    "pageHeight": 2970,
+    "scale": 40,
+    "adjustPageHeight": True,
+    "footer": "none",
+    "header": "none",
+}
+
+
+class ToolkitPool:
+    """
+    옵션을 미리 설정한 Verovio toolkit 풀.
+
+    toolkit마다 마지막으로 로드한 MusicXML(경로 + mtime + 크기)을 기억해서, 같은 악보의
+    다른 페이지/PDF 요청은 loadData(레이아웃 계산)를 다시 하지 않는다.
+    size개까지 만들고, 모두 사용 중이면 하나가 반납될 때까지 기다린다.
+    """
+
+    def __init__(self, size: int = VEROVIO_POOL_SIZE):
+        self.size = max(1, size)
+        self._idle: list[tuple[tuple | None, verovio.toolkit]] = []
+        self._created = 0
+        self._cond = threading.Condition()
+
+    def _new_toolkit(self) -> verovio.toolkit:
+        tk = verovio.toolkit(False)
+        tk.setResourcePath(RESOURCE_PATH)
+        tk.setOptions(PAGE_OPTIONS)
+        return tk
+
+    def warmup(self) -> None:
+        """toolkit을 모두 만들어 둔다 (리소스/폰트 로딩을 첫 요청 전에 끝낸다)."""
+        with self._cond:
+            while self._created < self.size:
+                self._idle.append((None, self._new_toolkit()))
+                self._created += 1
+
+    def _acquire(self, key: tuple) -> tuple[tuple | None, verovio.toolkit]:
+        with self._cond:
+            while True:
+                # 같은 악보가 이미 로드된 toolkit을 우선 쓴다
+                for i, (loaded, _) in enumerate(self._idle):
+                    if loaded == key:
+                        return self._idle.pop(i)
+                if self._idle:
+                    return self._idle.pop(0)
+                if self._created < self.size:
+                    self._created += 1
+                    return None, self._new_toolkit()
+                self._cond.wait()
+
+    def _release(self, loaded: tuple | None, tk: verovio.toolkit) -> None:
+        with self._cond:
+            self._idle.append((loaded, tk))
+            self._cond.notify()
+
+    @contextmanager
+    def document(self, musicxml_path: Path):
+        """musicxml_path가 로드된 toolkit을 빌려준다."""
+        stat = musicxml_path.stat()
+        key = (str(musicxml_path), stat.st_mtime_ns, stat.st_size)
+        loaded, tk = self._acquire(key)
+        try:
+            if loaded != key:
+                loaded = None
+                if not tk.loadData(musicxml_path.read_text(encoding="utf-8")):
+                    raise ConversionError("Verovio가 MusicXML을 로드할 수 없습니다.")
+                loaded = key
+            yield tk
+        finally:
+            self._release(loaded, tk)
+
+    def status(self) -> dict:
+        with self._cond:
+            return {"size": self.size, "created": self._created, "idle": len(self._idle)}
+
+
+toolkit_pool = ToolkitPool()
+
+
+def _svgs_to_pdf(svg_pages: list[str], pdf_output_path: Path) -> None:
+    """SVG 페이지들을 하나의 cairo PDF surface에 한 페이지씩 그려 여러 쪽 PDF를 만든다."""
+    import cairocffi
+    from cairosvg.parser import Tree
+    from cairosvg.surface import PDFSurface
+
+    class SharedPDFPage(PDFSurface):
+        """새 PDF 파일 대신 공유 surface의 현재 페이지에 그리는 cairosvg surface."""
+
+        def __init__(self, tree, target):
+            self._target = target
+            super().__init__(tree, None, 96)
+
+        def _create_surface(self, width, height):
+            self._target.set_size(width, height)
+            return self._target, width, height
+
+    with open(pdf_output_path, "wb") as f:
+        target = cairocffi.PDFSurface(f, 1, 1)
+        for svg in svg_pages:
+            SharedPDFPage(Tree(bytestring=svg.encode("utf-8")), target)
+            target.show_page()
+        target.finish()
+
+
+def _svgs_to_pdf_reportlab(svg_pages: list[str], pdf_output_path: Path) -> None:
+    from reportlab.graphics import renderPDF
+    from reportlab.pdfgen import canvas
+    from svglib.svglib import svg2rlg
+
+    pdf = canvas.Canvas(str(pdf_output_path))
+    for svg in svg_pages:
+        drawing = svg2rlg(io.BytesIO(svg.encode("utf-8")))
+        pdf.setPageSize((drawing.width, drawing.height))
+        renderPDF.draw(drawing, pdf, 0, 0)
+        pdf.showPage()
+    pdf.save()
+
+
+def render_page_svg(musicxml_path: Path, page: int) -> str:
+    """악보의 한 페이지(1부터)만 SVG로 렌더링한다."""
+    with toolkit_pool.document(musicxml_path) as tk:
+        page_count = tk.getPageCount()
+        if not 1 <= page <= page_count:
+            raise PageNotFoundError(page, page_count)
+        return tk.renderToSVG(page)
+
+
+def svg_to_png(svg: str, png_output_path: Path) -> Path:
     try:
         import cairosvg
+    except (ImportError, OSError) as e:
+        # PNG는 대체 경로가 없다 — SVG 미리보기를 쓰도록 알려준다
+        logger.warning("cairosvg 사용 불가 (%s), PNG 미리보기를 만들 수 없습니다.", e)
+        raise ConversionError("PNG 미리보기를 만들 수 없습니다. SVG 미리보기를 사용하세요.")
+    cairosvg.svg2png(bytestring=svg.encode("utf-8"), write_to=str(png_output_path))
+    return png_output_path
 
-        if len(svg_pages) == 1:
-            cairosvg.svg2pdf(bytestring=svg_pages[0].encode("utf-8"),
-                            write_to=str(pdf_output_path))
-        else:
-            # For multi-page, generate individual PDFs then merge
-            # For MVP, just use the first page or concatenate
-            from io import BytesIO
-            pdf_parts = []
-            for svg in svg_pages:
-                buf = BytesIO()
-                cairosvg.svg2pdf(bytestring=svg.encode("utf-8"), write_to=buf)
-                pdf_parts.append(buf.getvalue())
-
-            # Simple approach: write first page (multi-page merging needs pypdf)
-            # For MVP, concatenate is sufficient for most single-song sheets
-            pdf_output_path.write_bytes(pdf_parts[0])
 
+@functools.cache
+def pdf_backend() -> str | None:
+    """
+    PDF를 만들 백엔드: "cairo"(cairosvg + 시스템 libcairo), 없으면 "reportlab"(svglib), 둘 다 없으면 None.
+    import만으로 libcairo를 dlopen하므로 프로세스당 한 번만 확인한다.
+    """
+    try:
+        import cairocffi  # noqa: F401
+        import cairosvg  # noqa: F401
+        return "cairo"
+    except (ImportError, OSError) as e:
+        logger.warning("cairosvg 사용 불가 (%s), svglib로 PDF를 만듭니다.", e)
+    try:
+        import reportlab  # noqa: F401
+        import svglib  # noqa: F401
+        return "reportlab"
     except ImportError:
-        # Fallback: try svglib + reportlab
-        try:
-            from svglib.svglib import renderSVG
-            from reportlab.graphics import renderPDF
-            import tempfile
+        return None
+
 
-            with tempfile.NamedTemporaryFile(suffix=".svg", delete=False, mode="w", encoding="utf-8") as f:
-                f.write(svg_pages[0])
-                svg_temp = f.name
+def generate_pdf(musicxml_path: Path, pdf_output_path: Path) -> Path:
+    backend = pdf_backend()
+    if backend is None:
+        raise ConversionError("PDF 생성 실패: cairosvg(libcairo)와 svglib/reportlab이 모두 없습니다.")
 
-            drawing = renderSVG.render(svg_temp)
-            renderPDF.drawToFile(drawing, str(pdf_output_path))
-        except Exception as e:
-            raise ConversionError(f"PDF 생성 실패 (cairosvg, svglib 모두 실패): {e}")
+    # Generate SVG pages (한 번 로드한 문서에서 모든 페이지)
+    with toolkit_pool.document(musicxml_path) as tk:
+        svg_pages = [tk.renderToSVG(i) for i in range(1, tk.getPageCount() + 1)]
 
+    if backend == "cairo":
+        _svgs_to_pdf(svg_pages, pdf_output_path)
+        return pdf_output_path
+    try:
+        _svgs_to_pdf_reportlab(svg_pages, pdf_output_path)
+    except Exception as e:
+        raise ConversionError(f"PDF 생성 실패 (svglib): {e}")
     return pdf_output_path
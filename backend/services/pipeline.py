@@ -0,0 +1,336 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from services.audio_processor import AUDIO_SAMPLE_RATE, decode_audio
+from services.metrics import metrics
+from services.music_converter import TRANSPOSITION_MAP, quantize_note_events, write_score
+from services.midi_writer import write_midi
+from services.pdf_generator import generate_pdf, render_page_svg, svg_to_png
+from services.result_cache import link_or_copy, result_cache, score_variant
+from services.simplifier import DEFAULT_SIMPLIFY_LEVEL, SIMPLIFY_LEVELS, simplify_levels
+from services.voice_activity import trim_silence
+from utils.file_manager import append_job_event, read_job_status, record_artifact, write_job_status
+
+logger = logging.getLogger(__name__)
+
+# 작업 디렉토리의 악보 레벨: 원본(full) + 단순화 레벨들
+SCORE_LEVELS = ("full", *SIMPLIFY_LEVELS)
+
+
+def score_filename(transposition: str, level: str) -> str:
+    return f"score-{transposition}-{level}.musicxml"
+
+
+def _write_score_file(
+    job_dir: Path,
+    notes: list[tuple[float, float, int]],
+    transposition: str,
+    level: str,
+    tempo_bpm: int | None,
+) -> dict:
+    """악보 하나를 임시 파일에 쓰고 바꿔 넣는다 (같은 악보를 동시에 요청해도 반쯤 쓴 파일을 읽지 않게)."""
+    path = job_dir / score_filename(transposition, level)
+    tmp = job_dir / f".{path.stem}.{os.getpid()}.{threading.get_ident()}.musicxml"
+    metadata = write_score(notes, tmp, transposition, tempo_bpm)
+    os.replace(tmp, path)
+    return metadata
+
+
+def _select_score(job_dir: Path, metadata: dict, simplify: bool) -> dict:
+    """요청 옵션에 맞는 레벨을 대표 악보(score.musicxml)로 링크하고 응답용 메타데이터를 만든다."""
+    level = DEFAULT_SIMPLIFY_LEVEL if simplify else "full"
+    link_or_copy(job_dir / score_filename(metadata["transposition"], level), job_dir / "score.musicxml")
+    metadata = dict(metadata)
+    if simplify:
+        metadata["simplified"] = True
+    metadata["transpositions"] = list(TRANSPOSITION_MAP)
+    return metadata
+
+
+class JobReporter:
+    """
+    작업 진행 상황을 status.json(폴링용)과 events.jsonl(SSE 스트림용)에 함께 기록한다.
+
+    단계가 바뀔 때 이전 단계의 소요 시간을 재서 이벤트에 싣고, 끝나면 단계별 시간을 돌려준다.
+    """
+
+    def __init__(self, job_dir: Path):
+        self.job_dir = job_dir
+        self.t0 = time.time()
+        self.current: str | None = None
+        self.stage_t0 = self.t0
+        self.timings: dict[str, float] = {}
+
+    def _close_stage(self, now: float) -> None:
+        if self.current is not None:
+            self.timings[self.current] = round(now - self.stage_t0, 3)
+            metrics.observe("saxapp_stage_duration_seconds", now - self.stage_t0, stage=self.current)
+
+    def stage(self, name: str, progress: int) -> None:
+        now = time.time()
+        self._close_stage(now)
+        previous = self.current
+        self.current, self.stage_t0 = name, now
+        write_job_status(self.job_dir, status="running", stage=name, progress=progress)
+        append_job_event(self.job_dir, {
+            "type": "stage",
+            "stage": name,
+            "progress": progress,
+            "elapsed_sec": round(now - self.t0, 3),
+            "previous": previous,
+            "previous_sec": self.timings.get(previous),
+        })
+
+    def notes(self, index: int, total: int, note_events: list[tuple]) -> None:
+        """세그먼트 하나의 인식 결과(이어 붙이기 전)를 부분 결과로 내보낸다."""
+        append_job_event(self.job_dir, {
+            "type": "notes",
+            "segment": index,
+            "segments": total,
+            "notes": [
+                [round(start, 3), round(end, 3), pitch, round(amplitude, 3)]
+                for start, end, pitch, amplitude, _ in note_events
+            ],
+        })
+
+    def finish(self) -> dict[str, float]:
+        now = time.time()
+        self._close_stage(now)
+        self.current = None
+        self.timings["total"] = round(now - self.t0, 3)
+        return self.timings
+
+
+def restore_cached_result(
+    job_dir: Path,
+    audio_hash: str,
+    transposition: str,
+    simplify: bool,
+    tempo_bpm: int | None,
+) -> dict | None:
+    """같은 오디오 + 같은 옵션의 결과가 캐시에 있으면 작업 디렉토리로 링크하고 결과를 돌려준다."""
+    variant = score_variant(transposition, tempo_bpm)
+    metadata = result_cache.get_json(audio_hash, f"{variant}.json", "result")
+    if metadata is None:
+        return None
+
+    files = {
+        score_filename(transposition, level): f"{variant}-{level}.musicxml"
+        for level in metadata["levels"]
+    }
+    files["notes.json"] = "notes.json"
+    try:
+        for name, cached_name in files.items():
+            cached = result_cache.get_file(audio_hash, cached_name)
+            if cached is None:
+                return None
+            link_or_copy(cached, job_dir / name)
+        metadata = _select_score(job_dir, metadata, simplify)
+    except OSError:
+        # 링크 도중 LRU 정리로 지워졌으면 일반 경로로 처리한다
+        return None
+    return {"metadata": metadata}
+
+
+def run_conversion(
+    job_dir: Path,
+    upload_path: Path,
+    transposition: str = "concert",
+    simplify: bool = False,
+    tempo_bpm: int | None = None,
+    audio_hash: str | None = None,
+) -> dict:
+    """
+    업로드된 파일을 악보로 변환한다 (디코딩 → 무음 압축 → basic-pitch → 양자화/MusicXML → 단순화).
+    요청한 이조의 단순화 레벨(16분/8분/4분음표)은 항상 함께 만들어
+    score-<transposition>-<level>.musicxml로 두고, simplify 여부에 따라 하나를 score.musicxml로 링크한다.
+    다른 이조 악보와 MIDI는 다운로드를 요청받을 때 notes.json에서 만든다 (ensure_score, ensure_midi).
+
+    작업 워커 프로세스에서 실행되며, 단계가 바뀔 때마다 status.json에 진행률을,
+    events.jsonl에 단계 전환/세그먼트별 부분 음표를 기록한다.
+    audio_hash가 주어지면 음표 이벤트를 결과 캐시에서 재사용하므로
+    템포/이조만 바꾼 재변환은 디코딩과 음높이 인식을 건너뛴다.
+    """
+    # 음높이 인식(basic-pitch → TensorFlow)은 작업 워커에서만 필요하므로 여기서 불러온다
+    from services.pitch_detector import detect_note_events
+
+    job_id = job_dir.name
+    t0 = time.time()
+    reporter = JobReporter(job_dir)
+    report = reporter.stage
+
+    # Step 2+3: 캐시된 음표 이벤트가 있으면 디코딩과 음높이 인식을 모두 건너뛴다
+    note_events = result_cache.get_json(audio_hash, "notes.json", "notes") if audio_hash else None
+    if note_events:
+        logger.info("[%s] Step 2-3: 음표 이벤트 캐시 적중 (%.1fs)", job_id, time.time() - t0)
+        reporter.notes(0, 1, note_events)
+    else:
+        # Step 2: Decode to mono 22050Hz float32 (in memory, no intermediate WAV)
+        report("decode", 10)
+        audio = decode_audio(upload_path)
+        duration = len(audio) / AUDIO_SAMPLE_RATE
+        metrics.inc("saxapp_audio_seconds_total", duration)
+        logger.info("[%s] Step 2: 디코딩 완료 (%.1fs)", job_id, time.time() - t0)
+
+        # Step 2.5: 긴 무음/숨소리 구간을 잘라 연주한 부분만 모델에 넘긴다
+        report("vad", 25)
+        audio, active = trim_silence(audio, AUDIO_SAMPLE_RATE)
+        metrics.inc("saxapp_active_audio_seconds_total", active.active_seconds)
+        logger.info(
+            "[%s] Step 2.5: 무음 압축 %.1f초 → %.1f초 (%d개 구간)",
+            job_id, duration, active.active_seconds, len(active.regions),
+        )
+
+        # Step 3: Pitch detection (audio → note events, 원본 타임라인으로 되돌림)
+        report("detect", 30)
+        note_events = active.to_original(detect_note_events(
+            audio,
+            on_segment=lambda i, n, events: reporter.notes(i, n, active.to_original(events)),
+        ))
+        del audio
+        if audio_hash:
+            result_cache.put_json(audio_hash, "notes.json", note_events)
+        logger.info("[%s] Step 3: detect_pitch 완료 (%.1fs)", job_id, time.time() - t0)
+
+    (job_dir / "notes.json").write_text(json.dumps(note_events))
+
+    # Step 4: Note events → MusicXML (with transposition)
+    report("musicxml", 70)
+    notes = quantize_note_events(note_events, tempo_bpm if tempo_bpm else 120)
+    metadata = _write_score_file(job_dir, notes, transposition, "full", tempo_bpm)
+    logger.info("[%s] Step 4: musicxml 변환 완료 (%.1fs)", job_id, time.time() - t0)
+
+    # Step 5: Simplified levels from the same in-memory notes (no re-parse)
+    report("simplify", 85)
+    levels = ["full"]
+    for level, level_notes in simplify_levels(notes).items():
+        if level_notes:
+            _write_score_file(job_dir, level_notes, transposition, level, tempo_bpm)
+            levels.append(level)
+    metadata["levels"] = levels
+
+    if audio_hash:
+        variant = score_variant(transposition, tempo_bpm)
+        for level in levels:
+            result_cache.put_file(
+                audio_hash, f"{variant}-{level}.musicxml", job_dir / score_filename(transposition, level)
+            )
+        result_cache.put_json(audio_hash, f"{variant}.json", metadata)
+
+    metadata = _select_score(job_dir, metadata, simplify)
+    timings = reporter.finish()
+    logger.info("[%s] 전체 완료 (%.1fs)", job_id, time.time() - t0)
+    return {"metadata": metadata, "timings": timings}
+
+
+def ensure_midi(job_dir: Path) -> Path | None:
+    """작업의 MIDI 파일을 돌려준다. 처음 요청될 때 notes.json과 작업 템포로 만든다."""
+    midi_path = job_dir / "output.mid"
+    if midi_path.exists():
+        return midi_path
+
+    notes_path = job_dir / "notes.json"
+    status = read_job_status(job_dir) or {}
+    if not notes_path.exists() or status.get("status") != "done":
+        return None
+
+    tempo_bpm = status["result"]["metadata"].get("tempo_bpm")
+    tmp = job_dir / f".output.{os.getpid()}.{threading.get_ident()}.mid"
+    write_midi(json.loads(notes_path.read_text()), tmp, tempo_bpm)
+    os.replace(tmp, midi_path)
+    record_artifact(job_dir, midi_path)
+    return midi_path
+
+
+def ensure_score(job_dir: Path, transposition: str | None = None, level: str | None = None) -> Path | None:
+    """
+    (이조, 레벨) 악보 파일을 돌려준다. 변환 때 만들지 않은 조합은 처음 요청될 때
+    notes.json에서 만든다 — 음높이 인식 한 번으로 모든 이조 파트를 받을 수 있다.
+
+    transposition/level을 생략하면 작업을 요청할 때 고른 이조와 레벨을 쓴다.
+    """
+    status = read_job_status(job_dir) or {}
+    if status.get("status") != "done":
+        return None
+    metadata = status["result"]["metadata"]
+    transposition = transposition or metadata["transposition"]
+    level = level or (DEFAULT_SIMPLIFY_LEVEL if metadata.get("simplified") else "full")
+
+    path = job_dir / score_filename(transposition, level)
+    if path.exists():
+        return path
+
+    notes_path = job_dir / "notes.json"
+    if not notes_path.exists():
+        return None
+    tempo_bpm = metadata["tempo_bpm"]
+    notes = quantize_note_events(json.loads(notes_path.read_text()), tempo_bpm)
+    if level != "full":
+        notes = simplify_levels(notes, {level: SIMPLIFY_LEVELS[level]})[level]
+    if not notes:
+        return None
+    _write_score_file(job_dir, notes, transposition, level, tempo_bpm)
+    record_artifact(job_dir, path)
+    return path
+
+
+def ensure_pdf(job_dir: Path, transposition: str | None = None, level: str | None = None) -> Path | None:
+    """악보 PDF를 돌려준다. 처음 요청될 때 해당 MusicXML에서 렌더링해 작업 디렉토리에 둔다."""
+    musicxml_path = ensure_score(job_dir, transposition, level)
+    if musicxml_path is None:
+        return None
+
+    pdf_path = musicxml_path.with_suffix(".pdf")
+    if pdf_path.exists():
+        return pdf_path
+    tmp = job_dir / f".{pdf_path.stem}.{os.getpid()}.{threading.get_ident()}.pdf"
+    t0 = time.perf_counter()
+    try:
+        generate_pdf(musicxml_path, tmp)
+        os.replace(tmp, pdf_path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    metrics.observe("saxapp_stage_duration_seconds", time.perf_counter() - t0, stage="pdf")
+    record_artifact(job_dir, pdf_path)
+    return pdf_path
+
+
+def ensure_page(
+    job_dir: Path,
+    page: int,
+    fmt: str,
+    transposition: str | None = None,
+    level: str | None = None,
+) -> Path | None:
+    """
+    악보 한 페이지의 SVG/PNG 미리보기를 돌려준다. 요청된 페이지만 처음 요청될 때
+    렌더링해서 `<악보 파일>.page-<n>.svg|png`로 작업 디렉토리에 둔다.
+    """
+    musicxml_path = ensure_score(job_dir, transposition, level)
+    if musicxml_path is None:
+        return None
+
+    svg_path = musicxml_path.with_name(f"{musicxml_path.stem}.page-{page}.svg")
+    page_path = svg_path.with_suffix(f".{fmt}")
+    if page_path.exists():
+        return page_path
+
+    tmp = job_dir / f".{page_path.stem}.{os.getpid()}.{threading.get_ident()}.{fmt}"
+    try:
+        if svg_path.exists():
+            svg = svg_path.read_text(encoding="utf-8")
+        else:
+            svg = render_page_svg(musicxml_path, page)
+        if fmt == "svg":
+            tmp.write_text(svg, encoding="utf-8")
+        else:
+            svg_to_png(svg, tmp)
+        os.replace(tmp, page_path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    record_artifact(job_dir, page_path)
+    return page_path
@@ -1,44 +1,221 @@
 import logging
 import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-from basic_pitch.inference import predict
-from basic_pitch import ICASSP_2022_MODEL_PATH
+import librosa
+import numpy as np
+from basic_pitch import note_creation
+from basic_pitch.constants import AUDIO_N_SAMPLES, AUDIO_SAMPLE_RATE, FFT_HOP
+from basic_pitch.inference import unwrap_output, window_audio_file
 
+from services.inference_scheduler import inference_scheduler
+from services.midi_writer import write_midi
 from utils.exceptions import PitchDetectionError
-from config import PITCH_ONSET_THRESHOLD, PITCH_FRAME_THRESHOLD, PITCH_MIN_NOTE_LENGTH
+from config import (
+    LONG_AUDIO_WORKERS,
+    PITCH_FRAME_THRESHOLD,
+    PITCH_MIN_NOTE_LENGTH,
+    PITCH_ONSET_THRESHOLD,
+    SEGMENT_OVERLAP_SEC,
+    SEGMENT_SEC,
+)
 
 logger = logging.getLogger(__name__)
 
+# basic-pitch의 run_inference와 같은 윈도우 설정 (30 프레임 겹침)
+N_OVERLAPPING_FRAMES = 30
+OVERLAP_LEN = N_OVERLAPPING_FRAMES * FFT_HOP
+HOP_SIZE = AUDIO_N_SAMPLES - OVERLAP_LEN
+
+# 세그먼트 경계에서 같은 음으로 볼 onset 차이 (초)
+STITCH_TOLERANCE_SEC = 0.08
+
+
+def window_audio(audio: np.ndarray) -> np.ndarray:
+    """오디오를 모델 입력 크기의 겹치는 윈도우 (n_windows, AUDIO_N_SAMPLES, 1)로 자른다."""
+    padded = np.concatenate([np.zeros(OVERLAP_LEN // 2, dtype=np.float32), audio])
+    return np.stack([window for window, _ in window_audio_file(padded, HOP_SIZE)])
+
+
+def split_segments(
+    n_samples: int,
+    segment_sec: float = SEGMENT_SEC,
+    overlap_sec: float = SEGMENT_OVERLAP_SEC,
+) -> list[tuple[int, int, float, float]]:
+    """
+    긴 오디오를 겹치는 세그먼트로 나눈다.
+
+    Returns:
+        [(시작 샘플, 끝 샘플, core 시작 초, core 끝 초), ...]
+        core 구간은 겹치지 않고 전체를 덮으며, 각 세그먼트는 core 앞뒤로 overlap_sec씩 더 읽는다.
+    """
+    segment = int(segment_sec * AUDIO_SAMPLE_RATE)
+    overlap = int(overlap_sec * AUDIO_SAMPLE_RATE)
+    if n_samples <= segment + overlap:
+        return [(0, n_samples, 0.0, n_samples / AUDIO_SAMPLE_RATE)]
+
+    segments = []
+    for core_start in range(0, n_samples, segment):
+        core_end = min(core_start + segment, n_samples)
+        # 마지막 조각이 너무 짧으면 앞 세그먼트에 붙인다
+        if n_samples - core_end < overlap:
+            core_end = n_samples
+        segments.append((
+            max(0, core_start - overlap),
+            min(n_samples, core_end + overlap),
+            core_start / AUDIO_SAMPLE_RATE,
+            core_end / AUDIO_SAMPLE_RATE,
+        ))
+        if core_end == n_samples:
+            break
+    return segments
+
+
+def _transcribe(audio: np.ndarray) -> list[tuple]:
+    """한 구간의 오디오를 추론하고 basic-pitch 후처리로 음표 이벤트를 만든다."""
+    # 윈도우 단위 추론은 스케줄러가 다른 작업/세그먼트의 윈도우와 묶어서 실행한다
+    batched_output = inference_scheduler.infer(window_audio(audio))
+    model_output = {
+        k: unwrap_output(v, len(audio), N_OVERLAPPING_FRAMES)
+        for k, v in batched_output.items()
+    }
+    min_note_len = int(np.round(PITCH_MIN_NOTE_LENGTH / 1000 * (AUDIO_SAMPLE_RATE / FFT_HOP)))
+    _, note_events = note_creation.model_output_to_notes(
+        model_output,
+        onset_thresh=PITCH_ONSET_THRESHOLD,
+        frame_thresh=PITCH_FRAME_THRESHOLD,
+        min_note_len=min_note_len,
+    )
+    return [
+        (float(start), float(end), int(pitch), float(amplitude), [int(b) for b in bends] if bends else None)
+        for start, end, pitch, amplitude, bends in note_events
+    ]
+
+
+def _core_events(events: list[tuple], segment: tuple[int, int, float, float]) -> list[tuple]:
+    """세그먼트 기준 시간의 음표를 전체 타임라인으로 옮기고 core 구간의 것만 남긴다."""
+    start, _, core_start, core_end = segment
+    offset = start / AUDIO_SAMPLE_RATE
+    return [
+        (onset + offset, end + offset, pitch, amplitude, bends)
+        for onset, end, pitch, amplitude, bends in events
+        if core_start <= onset + offset < core_end
+    ]
 
-def detect_pitch(
-    wav_path: Path,
-    midi_output_path: Path,
-    tempo_bpm: int | None = None,
-) -> Path:
-    effective_tempo = float(tempo_bpm) if tempo_bpm else 120.0
 
-    logger.info("detect_pitch 시작: %s", wav_path)
+def stitch_note_events(
+    segment_events: list[list[tuple]],
+    segments: list[tuple[int, int, float, float]],
+) -> list[tuple]:
+    """
+    세그먼트별 음표 이벤트(세그먼트 기준 시간)를 전체 타임라인으로 합친다.
+
+    - 각 세그먼트에서는 onset이 자기 core 구간(± 허용 오차)에 있는 음만 남긴다.
+    - 앞 세그먼트 끝에서 잘린 음은 다음 세그먼트의 겹침 구간에서 이어지는 같은 음높이의
+      음으로 끝 시간을 늘린다 (경계를 넘는 음이 짧아지거나 사라지지 않게).
+    - 경계 양쪽에서 거의 같은 시각에 잡힌 같은 음은 하나로 합친다.
+    """
+    kept: list[list] = []
+    for i, (events, (start, end, core_start, core_end)) in enumerate(zip(segment_events, segments)):
+        offset = start / AUDIO_SAMPLE_RATE
+        seg_end_sec = end / AUDIO_SAMPLE_RATE
+        is_last = i == len(segments) - 1
+        next_events = segment_events[i + 1] if not is_last else []
+        next_offset = segments[i + 1][0] / AUDIO_SAMPLE_RATE if not is_last else 0.0
+
+        for onset, offset_end, pitch, amplitude, bends in events:
+            onset += offset
+            offset_end += offset
+            # 경계 바로 앞뒤에서 잡힌 음은 양쪽 세그먼트 모두 남기고 아래에서 하나로 합친다
+            if onset < core_start - STITCH_TOLERANCE_SEC:
+                continue
+            if not is_last and onset >= core_end + STITCH_TOLERANCE_SEC:
+                continue
+
+            # 세그먼트 끝에 닿은 음: 다음 세그먼트에서 같은 음높이로 이어지는 부분을 붙인다
+            if not is_last and offset_end >= seg_end_sec - STITCH_TOLERANCE_SEC:
+                for n_onset, n_end, n_pitch, _, _ in next_events:
+                    n_onset += next_offset
+                    n_end += next_offset
+                    if n_pitch == pitch and n_onset <= offset_end and n_end > offset_end:
+                        offset_end = n_end
+                        break
+            kept.append([onset, offset_end, pitch, amplitude, bends, i])
+
+    kept.sort(key=lambda e: (e[0], e[2]))
+    merged: list[list] = []
+    for event in kept:
+        # 서로 다른 세그먼트가 경계 근처에서 같은 음을 각각 잡은 경우만 합친다
+        duplicate = next(
+            (m for m in reversed(merged[-8:])
+             if m[5] != event[5] and m[2] == event[2] and abs(m[0] - event[0]) < STITCH_TOLERANCE_SEC),
+            None,
+        )
+        if duplicate is not None:
+            duplicate[1] = max(duplicate[1], event[1])
+            duplicate[3] = max(duplicate[3], event[3])
+            continue
+        merged.append(event)
+    return [tuple(e[:5]) for e in merged]
+
+
+def detect_note_events(
+    audio: np.ndarray,
+    on_segment: Callable[[int, int, list[tuple]], None] | None = None,
+) -> list[tuple]:
+    """
+    디코딩된 오디오(mono, AUDIO_SAMPLE_RATE float32)에서 음표 이벤트
+    (start_sec, end_sec, midi_pitch, amplitude, pitch_bends)를 추출한다.
+
+    SEGMENT_SEC보다 긴 오디오는 겹치는 세그먼트로 나눠 병렬로 인식한 뒤 경계를 이어 붙인다.
+    on_segment(index, total, events)는 세그먼트 하나가 끝날 때마다 그 구간의 음표
+    (전체 타임라인 기준, 이어 붙이기 전)로 호출되어 부분 결과를 먼저 보여 줄 수 있게 한다.
+    이벤트는 초 단위라 템포와 무관하므로 템포만 바뀐 재변환에서 그대로 재사용할 수 있다.
+    """
+    logger.info("detect_pitch 시작: %.1f초 오디오", len(audio) / AUDIO_SAMPLE_RATE)
     t0 = time.time()
 
     try:
-        model_output, midi_data, note_events = predict(
-            str(wav_path),
-            model_or_model_path=ICASSP_2022_MODEL_PATH,
-            onset_threshold=PITCH_ONSET_THRESHOLD,
-            frame_threshold=PITCH_FRAME_THRESHOLD,
-            minimum_note_length=PITCH_MIN_NOTE_LENGTH,
-            midi_tempo=effective_tempo,
-        )
+        segments = split_segments(len(audio))
+        if len(segments) == 1:
+            note_events = _transcribe(audio)
+            if on_segment:
+                on_segment(0, 1, note_events)
+        else:
+            segment_events: list[list[tuple] | None] = [None] * len(segments)
+            with ThreadPoolExecutor(max_workers=max(1, LONG_AUDIO_WORKERS)) as pool:
+                futures = {
+                    pool.submit(_transcribe, audio[start:end]): i
+                    for i, (start, end, _, _) in enumerate(segments)
+                }
+                for future in as_completed(futures):
+                    i = futures[future]
+                    segment_events[i] = future.result()
+                    if on_segment:
+                        on_segment(i, len(segments), _core_events(segment_events[i], segments[i]))
+            note_events = stitch_note_events(segment_events, segments)
+    except PitchDetectionError:
+        raise
     except Exception as e:
         raise PitchDetectionError(str(e))
 
-    elapsed = time.time() - t0
-
-    if not midi_data.instruments or not midi_data.instruments[0].notes:
+    if not note_events:
         raise PitchDetectionError("인식된 음표가 없습니다. 더 선명한 음원을 사용해 주세요.")
 
-    logger.info("detect_pitch 완료: %.1f초 소요, %d개 음표", elapsed, len(midi_data.instruments[0].notes))
+    logger.info(
+        "detect_pitch 완료: %.1f초 소요, %d개 음표 (%d개 세그먼트)",
+        time.time() - t0, len(note_events), len(segments),
+    )
+    return note_events
 
-    midi_data.write(str(midi_output_path))
-    return midi_output_path
+
+def detect_pitch(
+    wav_path: Path,
+    midi_output_path: Path,
+    tempo_bpm: int | None = None,
+) -> Path:
+    audio, _ = librosa.load(str(wav_path), sr=AUDIO_SAMPLE_RATE, mono=True)
+    note_events = detect_note_events(audio)
+    return write_midi(note_events, midi_output_path, tempo_bpm)
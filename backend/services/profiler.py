@@ -0,0 +1,125 @@
+import cProfile
+import io
+import itertools
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from config import (
+    PROFILING_ENABLED,
+    PROFILING_SAMPLE_EVERY,
+    PROFILING_TOP_N,
+    PROFILING_TRACEMALLOC_FRAMES,
+)
+
+logger = logging.getLogger(__name__)
+
+# 작업 디렉토리에 남기는 프로파일 파일 (download 라우트의 /profile/<name>)
+PROFILE_FILES = {
+    "stats": "profile.pstats",        # pstats 덤프 (snakeviz, python -m pstats 등으로 열기)
+    "summary": "profile.txt",         # 누적 시간 기준 상위 함수
+    "allocations": "allocations.txt", # tracemalloc 상위 할당 위치
+}
+
+# 할당 통계에서 뺄 프로파일러 자신의 프레임
+_ALLOCATION_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+class JobProfiler:
+    """
+    변환 작업 하나를 cProfile + tracemalloc으로 실행하고 결과를 작업 디렉토리에 쓴다.
+
+    cProfile은 작업을 실행하는 스레드만 본다. 추론 스케줄러/세그먼트 스레드에서 쓴 시간은
+    그 결과를 기다리는 호출(detect_note_events)의 누적 시간으로 나타난다.
+    tracemalloc은 프로세스 전체를 추적하므로 한 프로세스에서 한 번에 한 작업만 프로파일링한다.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = PROFILING_ENABLED,
+        sample_every: int = PROFILING_SAMPLE_EVERY,
+        top_n: int = PROFILING_TOP_N,
+    ):
+        self.enabled = enabled
+        self.sample_every = max(0, sample_every)
+        self.top_n = top_n
+        self._counter = itertools.count(1)
+        self._active = threading.Lock()
+
+    @property
+    def downloads_enabled(self) -> bool:
+        """프로파일 다운로드 허용 여부 (요청 플래그나 샘플링 중 하나라도 켜져 있으면)."""
+        return self.enabled or self.sample_every > 0
+
+    def should_sample(self) -> bool:
+        """N개 작업마다 하나씩 True (API 프로세스에서 작업을 넣을 때 부른다)."""
+        return self.sample_every > 0 and next(self._counter) % self.sample_every == 0
+
+    @contextmanager
+    def capture(self, job_dir: Path):
+        """블록을 프로파일링한다. 다른 작업을 프로파일링 중이면 그냥 실행하고 False를 넘긴다."""
+        if not self._active.acquire(blocking=False):
+            logger.warning("[%s] 다른 작업을 프로파일링 중이라 건너뜁니다.", job_dir.name)
+            yield False
+            return
+
+        try:
+            tracemalloc.start(PROFILING_TRACEMALLOC_FRAMES)
+            profiler = cProfile.Profile()
+            t0 = time.perf_counter()
+            profiler.enable()
+            try:
+                yield True
+            finally:
+                profiler.disable()
+                wall = time.perf_counter() - t0
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self._write(job_dir, profiler, snapshot, wall, peak)
+        finally:
+            self._active.release()
+
+    def _write(
+        self,
+        job_dir: Path,
+        profiler: cProfile.Profile,
+        snapshot: tracemalloc.Snapshot,
+        wall: float,
+        peak: int,
+    ) -> None:
+        try:
+            profiler.dump_stats(job_dir / PROFILE_FILES["stats"])
+
+            summary = io.StringIO()
+            summary.write(f"job {job_dir.name}  pid {os.getpid()}  wall {wall:.3f}s\n\n")
+            pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(self.top_n)
+            (job_dir / PROFILE_FILES["summary"]).write_text(summary.getvalue())
+
+            stats = snapshot.filter_traces(_ALLOCATION_FILTERS).statistics("lineno")
+            lines = [
+                f"job {job_dir.name}  peak traced {peak / 1024 / 1024:.1f} MiB  "
+                f"live at end {sum(s.size for s in stats) / 1024 / 1024:.1f} MiB",
+                "",
+                *(str(stat) for stat in stats[: self.top_n]),
+            ]
+            (job_dir / PROFILE_FILES["allocations"]).write_text("\n".join(lines) + "\n")
+            logger.info("[%s] 프로파일 저장 (%.1fs, 최대 %.1f MiB)", job_dir.name, wall, peak / 1024 / 1024)
+        except OSError as e:
+            logger.warning("[%s] 프로파일 저장 실패: %s", job_dir.name, e)
+
+    def status(self) -> dict:
+        return {"enabled": self.enabled, "sample_every": self.sample_every}
+
+
+job_profiler = JobProfiler()
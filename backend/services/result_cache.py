@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from contextlib import contextmanager, suppress
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경
+    fcntl = None
+
+from config import CACHE_DIR, CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+def score_variant(transposition: str, tempo_bpm: int | None) -> str:
+    """변환 옵션별 악보 캐시 이름 (단순화 레벨은 `<variant>-<level>.musicxml`로 함께 둔다)."""
+    return f"score-{transposition}-{tempo_bpm or 120}"
+
+
+def link_or_copy(src: Path, dst: Path) -> None:
+    """같은 파일시스템이면 하드링크(즉시), 아니면 복사. 캐시에서 꺼낸 파일은 읽기 전용으로 취급한다."""
+    try:
+        if dst.exists():
+            dst.unlink()
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class ResultCache:
+    """
+    오디오 바이트 해시(sha256)를 키로 하는 중간 산출물 캐시.
+
+    cache/<hash>/ 아래에 음표 이벤트(notes.json), 옵션별 MusicXML과 메타데이터 JSON을 둔다.
+    API 프로세스와 작업 워커가 함께 쓰므로 상태는 모두 디스크에 있고, 엔트리 디렉토리의
+    mtime을 마지막 사용 시각으로 삼아 max_bytes를 넘으면 오래된 엔트리부터 지운다.
+    적중/미스 카운터와 전체 바이트 수도 여러 프로세스가 공유하도록 .stats.json에 누적하고,
+    전체 스캔은 누적 바이트가 max_bytes를 넘었을 때만 한다.
+    """
+
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._seed_bytes()
+
+    def _seed_bytes(self) -> None:
+        """누적 바이트가 아직 없으면(첫 실행, 이전 버전 통계 파일) 한 번 재서 시작한다."""
+        try:
+            with self._stats_lock():
+                stats = self._read_stats()
+                if "bytes" not in stats:
+                    stats["bytes"] = sum(size for _, size, _ in self._entries())
+                    self._write_stats(stats)
+        except OSError as e:
+            logger.warning("캐시 통계 초기화 실패: %s", e)
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key
+
+    def get_file(self, key: str, name: str, kind: str | None = None) -> Path | None:
+        """kind가 주어진 조회만 적중/미스로 센다 (한 결과를 이루는 부속 파일은 세지 않는다)."""
+        path = self._entry(key) / name
+        if not path.is_file():
+            if kind:
+                self._count(kind, hit=False)
+            return None
+        try:
+            os.utime(self._entry(key))
+        except OSError:
+            pass
+        if kind:
+            self._count(kind, hit=True)
+        return path
+
+    def put_file(self, key: str, name: str, src: Path) -> None:
+        """캐시 저장 실패는 경고만 남긴다 — 이미 끝난 변환을 캐시 때문에 실패시키지 않는다."""
+        entry = self._entry(key)
+        tmp = entry / f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            entry.mkdir(parents=True, exist_ok=True)
+            # 작업 디렉토리 파일과 inode를 공유하지 않도록 복사해서 넣는다
+            shutil.copyfile(src, tmp)
+            self._replace(tmp, entry / name)
+        except OSError as e:
+            logger.warning("캐시 저장 실패 (%s/%s): %s", key[:12], name, e)
+            with suppress(OSError):
+                tmp.unlink(missing_ok=True)
+
+    def get_json(self, key: str, name: str, kind: str):
+        path = self.get_file(key, name, kind)
+        if path is None:
+            return None
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def put_json(self, key: str, name: str, obj) -> None:
+        entry = self._entry(key)
+        tmp = entry / f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            entry.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(obj, ensure_ascii=False))
+            self._replace(tmp, entry / name)
+        except OSError as e:
+            logger.warning("캐시 저장 실패 (%s/%s): %s", key[:12], name, e)
+            with suppress(OSError):
+                tmp.unlink(missing_ok=True)
+
+    def _replace(self, tmp: Path, dst: Path) -> None:
+        """tmp를 dst 자리에 넣고 바뀐 바이트만큼 누적 크기를 고친 뒤, 한도를 넘었을 때만 정리한다."""
+        try:
+            old_size = dst.stat().st_size
+        except OSError:
+            old_size = 0
+        new_size = tmp.stat().st_size
+        os.replace(tmp, dst)
+        if self._add_bytes(new_size - old_size) > self.max_bytes:
+            self.evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            size = 0
+            for f in os.scandir(entry.path):
+                try:
+                    size += f.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+            entries.append((entry.stat().st_mtime, size, Path(entry.path)))
+        return entries
+
+    def evict(self) -> int:
+        """
+        총 크기가 max_bytes를 넘으면 가장 오래 안 쓴 엔트리부터 지운다.
+
+        전체를 다시 재서 누적 바이트를 실제 값으로 맞추므로, 다른 프로세스와의 경합으로
+        생긴 오차도 여기서 바로잡힌다. 스캔과 삭제는 통계 락 안에서 해 동시에 두 번 돌지 않는다.
+        """
+        try:
+            with self._stats_lock():
+                entries = self._entries()
+                total = sum(size for _, size, _ in entries)
+                evicted = 0
+                for _, size, path in sorted(entries):
+                    if total <= self.max_bytes:
+                        break
+                    shutil.rmtree(path, ignore_errors=True)
+                    total -= size
+                    evicted += 1
+                stats = self._read_stats()
+                stats["bytes"] = total
+                stats["evictions"] = stats.get("evictions", 0) + evicted
+                self._write_stats(stats)
+        except OSError as e:
+            logger.warning("결과 캐시 정리 실패: %s", e)
+            return 0
+        if evicted:
+            logger.info("결과 캐시 LRU 정리: %d개 엔트리 삭제", evicted)
+        return evicted
+
+    @contextmanager
+    def _stats_lock(self):
+        with open(self.root / ".stats.lock", "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_stats(self) -> dict:
+        try:
+            return json.loads((self.root / ".stats.json").read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write_stats(self, stats: dict) -> None:
+        tmp = self.root / f".stats.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp.write_text(json.dumps(stats))
+        os.replace(tmp, self.root / ".stats.json")
+
+    def _bump(self, increments: dict[str, int]) -> dict:
+        """통계 카운터를 더하고 갱신된 통계를 돌려준다."""
+        try:
+            with self._stats_lock():
+                stats = self._read_stats()
+                for k, v in increments.items():
+                    stats[k] = stats.get(k, 0) + v
+                self._write_stats(stats)
+                return stats
+        except OSError as e:
+            logger.warning("캐시 통계 기록 실패: %s", e)
+            return {}
+
+    def _add_bytes(self, delta: int) -> int:
+        """누적 바이트에 delta를 더하고 새 합계를 돌려준다. 기록에 실패하면 정리를 시도하도록 큰 값을 준다."""
+        return self._bump({"bytes": delta}).get("bytes", self.max_bytes + 1)
+
+    def _count(self, kind: str, hit: bool) -> None:
+        outcome = "hits" if hit else "misses"
+        self._bump({outcome: 1, f"{kind}_{outcome}": 1})
+
+    def stats(self) -> dict:
+        stats = self._read_stats()
+        try:
+            entries = sum(1 for e in os.scandir(self.root) if e.is_dir(follow_symlinks=False))
+        except OSError:
+            entries = 0
+        return {
+            **stats,
+            "entries": entries,
+            "bytes": stats.get("bytes", 0),
+            "max_bytes": self.max_bytes,
+        }
+
+
+result_cache = ResultCache()
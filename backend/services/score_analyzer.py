@@ -0,0 +1,105 @@
+import numpy as np
+
+# music21 analyze("key")의 기본값(Aarden-Essen 가중치 Krumhansl-Schmuckler)과 같은 프로파일
+KEY_WEIGHTS = {
+    "major": [17.7661, 0.145624, 14.9265, 0.160186, 19.8049, 11.3587,
+              0.291248, 22.062, 0.145624, 8.15494, 0.232998, 4.95122],
+    "minor": [18.2648, 0.737619, 14.0499, 16.8599, 0.702494, 14.4362,
+              0.702494, 18.6161, 4.56621, 1.93186, 7.37619, 1.75623],
+}
+# 으뜸음 pitch class별 조표 (music21이 고르는 이명동음 표기 기준: D-/A- 장조, G#/B- 단조 등)
+KEY_FIFTHS = {
+    "major": [0, 7, 2, -3, 4, -1, 6, 1, -4, 3, -2, 5],
+    "minor": [-3, 4, -1, -6, 1, -4, 3, -2, 5, 0, -5, 2],
+}
+KEY_MODES = tuple(KEY_WEIGHTS)
+
+# KEY_PROFILES[pc, m] = 으뜸음 pc로 옮기고 평균을 뺀 모드 m의 프로파일 (12, 2, 12)
+KEY_PROFILES = np.stack(
+    [np.stack([np.roll(KEY_WEIGHTS[mode], pc) for mode in KEY_MODES]) for pc in range(12)]
+)
+KEY_PROFILES -= KEY_PROFILES.mean(axis=2, keepdims=True)
+KEY_PROFILE_SQUARES = (KEY_PROFILES ** 2).sum(axis=2)
+
+# 경고 기준
+MIN_NOTE_COUNT = 20
+MIN_DURATION_SEC = 5
+MIN_PITCH_SPAN = 6
+MAX_NOTE_DENSITY = 10.0   # 초당 음표 수 — 이보다 촘촘하면 잡음/반주가 섞였을 가능성이 크다
+
+
+def estimate_key(pitch_classes: np.ndarray, durations: np.ndarray) -> tuple[int, str]:
+    """
+    길이로 가중한 pitch class 분포와 24개 조성 프로파일의 상관계수를 한 번에 구해
+    가장 큰 조를 고른다.
+
+    Returns:
+        (조표의 fifths, "major" | "minor")
+    """
+    distribution = np.bincount(pitch_classes, weights=durations, minlength=12)
+    centered = distribution - distribution.mean()
+    denominator = np.sqrt(KEY_PROFILE_SQUARES * (centered ** 2).sum())
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation = np.where(denominator == 0, 0.0, KEY_PROFILES @ centered / denominator)
+    # 동점이면 뒤쪽(높은 pitch class, 단조)을 고른다 — 예전 max((상관, pc, 모드)) 동작과 같다
+    flat = correlation.ravel()
+    best = len(flat) - 1 - int(np.argmax(flat[::-1]))
+    tonic, mode = divmod(best, len(KEY_MODES))
+    return KEY_FIFTHS[KEY_MODES[mode]][tonic], KEY_MODES[mode]
+
+
+def analyze_notes(
+    notes: list[tuple[float, float, int]],
+    tempo_bpm: int,
+    semitones: int = 0,
+) -> dict:
+    """
+    양자화된 단선율 (offset_ql, duration_ql, concert midi)을 배열로 한 번에 분석한다.
+
+    조(이조된 표기 기준), 음역, 길이, 음표 밀도와 경고를 돌려준다.
+    """
+    warnings: list[str] = []
+    if notes:
+        onsets, durations, midi = np.asarray(notes, dtype=np.float64).T
+        pitches = midi.astype(int) + semitones
+        total_ql = float((onsets + durations).max())
+        lowest, highest = int(pitches.min()), int(pitches.max())
+        key_fifths, key_mode = estimate_key(pitches % 12, durations)
+    else:
+        pitches = np.empty(0, dtype=int)
+        total_ql, lowest, highest = 0.0, 0, 0
+        key_fifths, key_mode = 0, "major"
+
+    # Duration calculation: quarterLength / beatsPerMinute * 60
+    duration_seconds = total_ql / tempo_bpm * 60.0
+    note_count = len(pitches)
+    note_density = note_count / duration_seconds if duration_seconds > 0 else 0.0
+
+    if note_count < MIN_NOTE_COUNT:
+        warnings.append(
+            "인식된 음표가 너무 적습니다. 음질이 선명한 단선율 WAV를 사용해 주세요."
+        )
+    if duration_seconds < MIN_DURATION_SEC:
+        warnings.append(
+            "음원이 너무 짧아 악보 품질이 낮을 수 있습니다."
+        )
+    if note_count and (highest - lowest) < MIN_PITCH_SPAN:
+        warnings.append(
+            "음역 변화가 작아 인식 결과가 단순하게 나올 수 있습니다."
+        )
+    if note_density > MAX_NOTE_DENSITY:
+        warnings.append(
+            "음표가 지나치게 촘촘합니다. 반주나 잡음이 섞였을 수 있습니다."
+        )
+
+    return {
+        "note_count": note_count,
+        "duration_seconds": round(duration_seconds, 1),
+        "pitch_range": {
+            "lowest": lowest,
+            "highest": highest,
+        },
+        "note_density": round(note_density, 2),
+        "key": {"fifths": key_fifths, "mode": key_mode},
+        "warnings": warnings,
+    }
@@ -1,78 +1,58 @@
-from pathlib import Path
+import numpy as np
 
-import music21
-from music21 import converter, note, stream
+# 난이도별 단순화 격자 (quarterLength). 격자보다 짧은 음은 지운다.
+SIMPLIFY_LEVELS = {
+    "16th": 0.25,
+    "8th": 0.5,
+    "quarter": 1.0,
+}
+DEFAULT_SIMPLIFY_LEVEL = "16th"
 
-from utils.exceptions import ConversionError
+# Quantize durations to nearest standard value: 경계값 미만이면 해당 음가
+STANDARD_DURATIONS = np.array([0.25, 0.5, 1.0, 2.0, 4.0])   # 16th, 8th, quarter, half, whole
+DURATION_THRESHOLDS = np.array([0.375, 0.75, 1.5, 3.0])
 
 
-def simplify_score(
-    musicxml_path: Path,
-    output_path: Path,
-    minimum_note_length: float = 0.25,
-) -> Path:
+def simplify_levels(
+    notes: list[tuple[float, float, int]],
+    levels: dict[str, float] = SIMPLIFY_LEVELS,
+) -> dict[str, list[tuple[float, float, int]]]:
     """
-    Simplify a MusicXML score by quantizing durations and removing very short notes.
+    양자화된 단선율 (offset_ql, duration_ql, midi)에서 여러 난이도의 단순화 악보를 한 번에 만든다.
 
-    Args:
-        musicxml_path: Input MusicXML file path
-        output_path: Output MusicXML file path
-        minimum_note_length: Minimum quarterLength to keep (default 0.25 = 16th note).
-                             Use 0.125 for less aggressive filtering.
+    음길이는 표준 음가(16분/8분/4분/2분/온음표)로 맞춘 뒤, 레벨마다
+    - 격자(minimum_note_length)보다 짧은 음을 지우고
+    - 시작 시각을 격자에 맞추고 (같은 자리에 모이면 긴 음 하나만 남긴다)
+    - 다음 음이 시작하면 앞 음을 자른다.
+    그래서 음과 쉼표의 길이가 모두 격자의 배수가 된다.
     """
-    try:
-        score = converter.parse(str(musicxml_path))
-    except Exception as e:
-        raise ConversionError(f"MusicXML 파싱 실패: {e}")
-
-    for part in score.parts:
-        new_elements = []
-        for element in part.recurse().notesAndRests:
-            if isinstance(element, note.Note):
-                # Quantize durations to nearest standard value
-                ql = element.quarterLength
-                if ql < 0.375:
-                    element.quarterLength = 0.25    # 16th note
-                elif ql < 0.75:
-                    element.quarterLength = 0.5     # 8th note
-                elif ql < 1.5:
-                    element.quarterLength = 1.0     # quarter
-                elif ql < 3.0:
-                    element.quarterLength = 2.0     # half
-                else:
-                    element.quarterLength = 4.0     # whole
-
-            elif isinstance(element, note.Rest):
-                # Remove very short rests (merge into surrounding notes)
-                if element.quarterLength < minimum_note_length:
-                    continue
-
-            new_elements.append(element)
-
-        # Remove notes shorter than minimum_note_length
-        filtered = []
-        for el in new_elements:
-            if isinstance(el, note.Note) and el.quarterLength < minimum_note_length:
-                continue
-            filtered.append(el)
-
-        # Replace part content
-        part.elements = []
-        measure = stream.Measure()
-        current_ql = 0.0
-        for el in filtered:
-            if current_ql + el.quarterLength > 4.0:
-                part.append(measure)
-                measure = stream.Measure()
-                current_ql = 0.0
-            measure.append(el)
-            current_ql += el.quarterLength
-        if measure.elements:
-            part.append(measure)
-
-    try:
-        score.write("musicxml", fp=str(output_path))
-    except Exception as e:
-        raise ConversionError(f"단순화된 MusicXML 쓰기 실패: {e}")
-
-    return output_path
+    if not notes:
+        return {level: [] for level in levels}
+
+    onsets, durations, pitches = np.asarray(notes, dtype=np.float64).T
+    standard = STANDARD_DURATIONS[np.searchsorted(DURATION_THRESHOLDS, durations, side="right")]
+
+    result = {}
+    for level, grid in levels.items():
+        keep = standard >= grid
+        level_onsets = np.round(onsets[keep] / grid) * grid
+        level_durations = standard[keep]
+        level_pitches = pitches[keep].astype(int)
+
+        # 시작 시각 오름차순, 같은 시각이면 긴 음 먼저 → 첫 음만 남긴다
+        order = np.lexsort((-level_durations, level_onsets))
+        level_onsets, level_durations, level_pitches = (
+            level_onsets[order], level_durations[order], level_pitches[order]
+        )
+        first = np.ones(len(level_onsets), dtype=bool)
+        first[1:] = level_onsets[1:] != level_onsets[:-1]
+        level_onsets, level_durations, level_pitches = (
+            level_onsets[first], level_durations[first], level_pitches[first]
+        )
+
+        ends = level_onsets + level_durations
+        ends[:-1] = np.minimum(ends[:-1], level_onsets[1:])
+        result[level] = list(zip(
+            level_onsets.tolist(), (ends - level_onsets).tolist(), level_pitches.tolist()
+        ))
+    return result
@@ -0,0 +1,154 @@
+"""
+음높이 인식 전 무음 구간 압축 (에너지 + spectral flux VAD).
+
+프레임별 RMS 에너지와 양의 spectral flux(스펙트럼이 커진 양)를 NumPy로 한 번에 구해
+연주가 있는 구간을 찾고, 그 사이의 긴 무음/숨소리 구간을 잘라낸 오디오만 모델에 넘긴다.
+잘라낸 오디오에서 나온 음표 시각은 ActiveRegions.to_original()로 원래 타임라인에 되돌리므로
+앞뒤 무음과 프레이즈 사이 쉼표는 악보에 그대로 남는다.
+"""
+import numpy as np
+
+from config import (
+    VAD_DYNAMIC_RANGE_DB,
+    VAD_ENABLED,
+    VAD_MIN_SILENCE_SEC,
+    VAD_NOISE_MARGIN_DB,
+    VAD_PAD_SEC,
+)
+
+FRAME_LENGTH = 1024
+HOP_LENGTH = 512
+# 한 번에 FFT 할 프레임 수 (긴 음원에서도 스펙트럼 메모리를 일정하게)
+FFT_CHUNK_FRAMES = 2048
+# 이보다 조용한 프레임은 무조건 무음 (dBFS)
+ABSOLUTE_FLOOR_DB = -60.0
+# 남는 길이가 원본의 이 비율을 넘으면 자르지 않고 그대로 쓴다
+MIN_SAVING_RATIO = 0.9
+
+
+class ActiveRegions:
+    """잘라낸 오디오와 원본 사이의 시간 대응 (연주 구간들의 원본/압축 시작 샘플)."""
+
+    def __init__(self, regions: list[tuple[int, int]], sample_rate: int):
+        self.regions = regions
+        self.sample_rate = sample_rate
+        lengths = np.array([end - start for start, end in regions], dtype=np.int64)
+        self.original_starts = np.array([start for start, _ in regions], dtype=np.int64) / sample_rate
+        self.compressed_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]) / sample_rate
+        self.lengths = lengths / sample_rate
+
+    @property
+    def active_seconds(self) -> float:
+        return float(self.lengths.sum())
+
+    def compress(self, audio: np.ndarray) -> np.ndarray:
+        if len(self.regions) == 1 and self.regions[0] == (0, len(audio)):
+            return audio
+        return np.concatenate([audio[start:end] for start, end in self.regions])
+
+    def to_original(self, note_events: list[tuple]) -> list[tuple]:
+        """압축 타임라인의 음표 이벤트를 원본 타임라인으로 옮긴다."""
+        if not note_events:
+            return note_events
+        starts = np.array([event[0] for event in note_events], dtype=np.float64)
+        ends = np.array([event[1] for event in note_events], dtype=np.float64)
+        index = np.clip(np.searchsorted(self.compressed_starts, starts, side="right") - 1, 0, None)
+        shift = self.original_starts[index] - self.compressed_starts[index]
+        # 잘라낸 무음을 가로지르는 음은 없으므로 끝은 시작과 같은 구간 안에 둔다
+        region_end = self.compressed_starts[index] + self.lengths[index]
+        ends = np.maximum(np.minimum(ends, region_end), starts)
+        return [
+            (float(start), float(end), *event[2:])
+            for start, end, event in zip((starts + shift).tolist(), (ends + shift).tolist(), note_events)
+        ]
+
+
+def frame_features(audio: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """프레임별 RMS 에너지(dBFS)와 정규화한 양의 spectral flux."""
+    if len(audio) < FRAME_LENGTH:
+        audio = np.pad(audio, (0, FRAME_LENGTH - len(audio)))
+    frames = np.lib.stride_tricks.sliding_window_view(audio, FRAME_LENGTH)[::HOP_LENGTH]
+    energy_db = 10 * np.log10(np.mean(np.square(frames, dtype=np.float64), axis=1) + 1e-12)
+
+    window = np.hanning(FRAME_LENGTH).astype(np.float32)
+    flux = np.zeros(len(frames))
+    previous = None
+    for i in range(0, len(frames), FFT_CHUNK_FRAMES):
+        magnitude = np.abs(np.fft.rfft(frames[i:i + FFT_CHUNK_FRAMES] * window, axis=1))
+        if previous is not None:
+            magnitude = np.vstack([previous, magnitude])
+        rise = np.maximum(np.diff(magnitude, axis=0), 0).sum(axis=1)
+        total = magnitude[1:].sum(axis=1) + 1e-9
+        offset = i if previous is not None else i + 1
+        flux[offset:offset + len(rise)] = rise / total
+        previous = magnitude[-1:]
+    return energy_db, flux
+
+
+def _dilate(mask: np.ndarray, width: int) -> np.ndarray:
+    """True 프레임 앞뒤 width 프레임까지 True로 넓힌다."""
+    if width <= 0 or not mask.any():
+        return mask
+    counts = np.convolve(mask.astype(np.int32), np.ones(2 * width + 1, dtype=np.int32), mode="same")
+    return counts > 0
+
+
+def find_active_regions(
+    audio: np.ndarray,
+    sample_rate: int,
+    min_silence_sec: float = VAD_MIN_SILENCE_SEC,
+    pad_sec: float = VAD_PAD_SEC,
+) -> list[tuple[int, int]]:
+    """
+    연주 구간 [(시작 샘플, 끝 샘플), ...]. min_silence_sec보다 긴 무음만 잘라내고
+    각 연주 구간 앞뒤로 pad_sec씩 남겨 어택 앞의 숨과 음의 잔향을 보존한다.
+    """
+    n = len(audio)
+    energy_db, flux = frame_features(audio)
+
+    # 잡음 바닥(하위 10% 에너지)보다 충분히 크고, 가장 큰 소리에서 너무 멀지 않은 프레임이 연주
+    noise_floor = np.percentile(energy_db, 10)
+    peak = energy_db.max()
+    threshold = max(noise_floor + VAD_NOISE_MARGIN_DB, peak - VAD_DYNAMIC_RANGE_DB, ABSOLUTE_FLOOR_DB)
+    active = energy_db > threshold
+    # 작게 시작하는 음의 어택: 에너지가 문턱 근처여도 스펙트럼이 크게 늘면 연주로 본다
+    flux_threshold = np.median(flux) + 3 * np.median(np.abs(flux - np.median(flux)))
+    active |= (energy_db > threshold - VAD_NOISE_MARGIN_DB / 2) & (flux > flux_threshold)
+    if not active.any():
+        return [(0, n)]
+
+    frames_per_sec = sample_rate / HOP_LENGTH
+    active = _dilate(active, int(round(pad_sec * frames_per_sec)))
+
+    # 연속 구간 경계 (프레임 단위) → 짧은 무음은 메운다
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], active.astype(np.int8), [0]])))
+    runs = edges.reshape(-1, 2)
+    min_gap = int(round(min_silence_sec * frames_per_sec))
+    merged = [list(runs[0])]
+    for start, end in runs[1:]:
+        if start - merged[-1][1] < min_gap:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    regions = [
+        (int(start * HOP_LENGTH), min(n, int((end - 1) * HOP_LENGTH + FRAME_LENGTH)))
+        for start, end in merged
+    ]
+    # 처음/끝의 짧은 무음은 남겨도 비용이 거의 없으므로 그대로 둔다
+    if regions[0][0] < min_silence_sec * sample_rate:
+        regions[0] = (0, regions[0][1])
+    if n - regions[-1][1] < min_silence_sec * sample_rate:
+        regions[-1] = (regions[-1][0], n)
+    return regions
+
+
+def trim_silence(audio: np.ndarray, sample_rate: int, enabled: bool = VAD_ENABLED) -> tuple[np.ndarray, ActiveRegions]:
+    """긴 무음을 잘라낸 오디오와 원본 시간 대응. 줄어드는 양이 적으면 원본을 그대로 돌려준다."""
+    regions = [(0, len(audio))]
+    if enabled and len(audio):
+        found = find_active_regions(audio, sample_rate)
+        if sum(end - start for start, end in found) < MIN_SAVING_RATIO * len(audio):
+            regions = found
+    active = ActiveRegions(regions, sample_rate)
+    return active.compress(audio), active
@@ -0,0 +1,169 @@
+import logging
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from config import (
+    ARTIFACT_MEMORY_MAX_BYTES,
+    ARTIFACT_MEMORY_MAX_ITEM_BYTES,
+    ARTIFACT_STORE,
+    ARTIFACT_TMPFS_DIR,
+    TEMP_DIR,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class FileSystemArtifactStore:
+    """
+    작업 산출물(업로드, 음표, 악보, PDF, 미리보기)을 root/<job_id>/ 아래에 두는 저장소.
+
+    변환 워커는 별도 프로세스라서 산출물은 항상 이 디렉토리에 파일로 쓴다.
+    load()가 None이면 다운로드 라우트는 파일을 그대로 스트리밍한다.
+    """
+
+    name = "filesystem"
+
+    def __init__(self, root: Path = TEMP_DIR):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def create_job(self, prefix: str = "") -> tuple[str, Path]:
+        job_id = prefix + uuid.uuid4().hex[:12]
+        job_dir = self.root / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        return job_id, job_dir
+
+    def job_dir(self, job_id: str) -> Path | None:
+        job_dir = self.root / job_id
+        if job_dir.is_dir():
+            return job_dir
+        return None
+
+    def job_ids(self) -> list[str]:
+        return [p.name for p in self.root.iterdir() if p.is_dir()]
+
+    def remove_job(self, job_id: str) -> None:
+        shutil.rmtree(self.root / job_id, ignore_errors=True)
+
+    def load(self, path: Path) -> bytes | None:
+        """메모리에 올라와 있는 산출물의 바이트. 파일시스템 저장소는 항상 None."""
+        return None
+
+    def status(self) -> dict:
+        return {"backend": self.name, "root": str(self.root)}
+
+
+class TmpfsArtifactStore(FileSystemArtifactStore):
+    """
+    작업 디렉토리를 tmpfs(/dev/shm 등 RAM 위의 파일시스템)에 두는 저장소.
+
+    워커 프로세스와 그대로 공유되면서 디스크 쓰기/fsync 지연이 없다. 작업 파일의 총량은
+    TEMP_MAX_MB(job reaper)로 제한하므로 RAM 크기에 맞게 잡아야 한다.
+    """
+
+    name = "tmpfs"
+
+    def __init__(self, root: Path = ARTIFACT_TMPFS_DIR):
+        super().__init__(root)
+
+
+class MemoryArtifactStore(FileSystemArtifactStore):
+    """
+    파일시스템 저장소 위에 작은 산출물을 RAM에 올려 두는 LRU 계층.
+
+    max_item_bytes 이하인 파일은 처음 읽을 때 메모리에 올리고, 이후 다운로드는 파일을
+    다시 열지 않고 같은 bytes 객체를 그대로 응답한다. 파일이 바뀌었는지는 (mtime, 크기)로
+    확인하고, 전체 크기가 max_bytes를 넘으면 가장 오래 안 쓴 것부터 내린다.
+    """
+
+    name = "memory"
+
+    def __init__(
+        self,
+        root: Path = TEMP_DIR,
+        max_bytes: int = ARTIFACT_MEMORY_MAX_BYTES,
+        max_item_bytes: int = ARTIFACT_MEMORY_MAX_ITEM_BYTES,
+    ):
+        super().__init__(root)
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self._items: OrderedDict[Path, tuple[tuple[int, int], bytes]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def load(self, path: Path) -> bytes | None:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            item = self._items.get(path)
+            if item is not None and item[0] == stamp:
+                self._items.move_to_end(path)
+                self._hits += 1
+                return item[1]
+            self._misses += 1
+        if stat.st_size > self.max_item_bytes:
+            return None
+
+        try:
+            content = path.read_bytes()
+        except OSError:
+            return None
+        with self._lock:
+            old = self._items.pop(path, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._items[path] = (stamp, content)
+            self._bytes += len(content)
+            while self._bytes > self.max_bytes and self._items:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+        return content
+
+    def remove_job(self, job_id: str) -> None:
+        job_dir = self.root / job_id
+        with self._lock:
+            for path in [p for p in self._items if p.parent == job_dir]:
+                self._bytes -= len(self._items.pop(path)[1])
+        super().remove_job(job_id)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                **super().status(),
+                "resident_items": len(self._items),
+                "resident_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+ARTIFACT_STORES = {
+    "filesystem": FileSystemArtifactStore,
+    "tmpfs": TmpfsArtifactStore,
+    "memory": MemoryArtifactStore,
+}
+
+
+def create_artifact_store(backend: str = ARTIFACT_STORE) -> FileSystemArtifactStore:
+    store_cls = ARTIFACT_STORES.get(backend)
+    if store_cls is None:
+        logger.warning("알 수 없는 ARTIFACT_STORE=%s, filesystem을 사용합니다.", backend)
+        store_cls = FileSystemArtifactStore
+    try:
+        return store_cls()
+    except OSError as e:
+        # tmpfs 경로를 만들 수 없는 환경 (예: /dev/shm이 없는 macOS)
+        logger.warning("%s 저장소를 사용할 수 없어 filesystem을 사용합니다: %s", backend, e)
+        return FileSystemArtifactStore()
+
+
+artifact_store = create_artifact_store()
@@ -1,9 +1,20 @@
+def _rebuild_app_error(cls, message: str, status_code: int, attrs: dict):
+    err = cls.__new__(cls)
+    AppError.__init__(err, message, status_code)
+    err.__dict__.update(attrs)
+    return err
+
+
 class AppError(Exception):
     def __init__(self, message: str, status_code: int = 400):
         self.message = message
         self.status_code = status_code
         super().__init__(self.message)
 
+    def __reduce__(self):
+        # 워커 프로세스에서 발생한 에러가 서브클래스/상태 코드를 유지한 채 전달되도록 한다
+        return _rebuild_app_error, (type(self), self.message, self.status_code, self.__dict__)
+
 
 class AudioTooLargeError(AppError):
     def __init__(self, max_mb: int = 50):
@@ -42,3 +53,27 @@ class YouTubeDownloadError(AppError):
 class JobNotFoundError(AppError):
     def __init__(self, job_id: str):
         super().__init__(f"작업을 찾을 수 없습니다: {job_id}", 404)
+
+
+class PageNotFoundError(AppError):
+    def __init__(self, page: int, page_count: int):
+        super().__init__(f"악보에 {page}쪽이 없습니다. (전체 {page_count}쪽)", 404)
+
+
+class NodeUnavailableError(AppError):
+    def __init__(self, detail: str = ""):
+        msg = "작업을 가진 서버에 연결할 수 없습니다."
+        if detail:
+            msg += f" ({detail})"
+        super().__init__(msg, 502)
+
+
+class WorkerCrashedError(AppError):
+    def __init__(self):
+        super().__init__("변환 워커가 비정상 종료되었습니다. 잠시 후 다시 시도해 주세요.", 503)
+
+
+class QueueFullError(AppError):
+    def __init__(self, retry_after: int):
+        super().__init__("변환 대기열이 가득 찼습니다. 잠시 후 다시 시도해 주세요.", 429)
+        self.retry_after = retry_after
@@ -1,37 +1,261 @@
-import uuid
+import heapq
+import json
+import logging
+import os
+import threading
 import time
-import shutil
+from contextlib import contextmanager
 from pathlib import Path
 
-from config import TEMP_DIR, TEMP_FILE_TTL_SECONDS
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경
+    fcntl = None
+
+from config import JOB_REAPER_INTERVAL_SEC, TEMP_FILE_TTL_SECONDS, TEMP_MAX_BYTES
+from utils.artifact_store import artifact_store
+from utils.job_registry import job_registry
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("done", "error")
 
 
 def create_job_dir() -> tuple[str, Path]:
-    job_id = uuid.uuid4().hex[:12]
-    job_dir = TEMP_DIR / job_id
-    job_dir.mkdir(parents=True, exist_ok=True)
+    job_id, job_dir = artifact_store.create_job(job_registry.job_id_prefix)
     # Write a timestamp file for TTL tracking
-    (job_dir / ".created").write_text(str(time.time()))
+    created = time.time()
+    (job_dir / ".created").write_text(str(created))
+    job_registry.register(job_id, job_dir, created)
+    job_reaper.track(job_id, created)
     return job_id, job_dir
 
 
 def get_job_dir(job_id: str) -> Path | None:
-    job_dir = TEMP_DIR / job_id
-    if job_dir.is_dir():
-        return job_dir
-    return None
-
-
-def cleanup_expired_jobs():
-    now = time.time()
-    for job_dir in TEMP_DIR.iterdir():
-        if not job_dir.is_dir():
-            continue
-        ts_file = job_dir / ".created"
-        if ts_file.exists():
+    """레지스트리에 기록된 작업 디렉토리. 만료/삭제됐거나 이 노드에 없는 작업이면 None."""
+    row = job_registry.lookup(job_id)
+    if row is None:
+        # 레지스트리에 없는 작업(다른 노드의 작업, 레지스트리 오류)은 디렉토리로만 확인한다
+        return artifact_store.job_dir(job_id)
+    if job_registry.is_gone(row) or row["node"] != job_registry.node:
+        return None
+    job_dir = Path(row["job_dir"])
+    return job_dir if job_dir.is_dir() else None
+
+
+@contextmanager
+def _status_lock(job_dir: Path):
+    """status.json 읽기-수정-쓰기를 프로세스/스레드 사이에서 직렬화한다."""
+    with open(job_dir / ".status.lock", "a") as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def write_job_status(job_dir: Path, **fields) -> dict:
+    """
+    작업 상태 파일(status.json)을 갱신한다. 워커 프로세스와 API 프로세스가 함께 사용한다.
+
+    done/error로 끝난 작업에 늦게 도착한 진행 상황 갱신은 버린다.
+    """
+    with _status_lock(job_dir):
+        status = read_job_status(job_dir) or {}
+        if status.get("status") in FINISHED_STATUSES and fields.get("status") not in FINISHED_STATUSES:
+            return status
+        if "status" in fields and fields["status"] != status.get("status"):
+            job_registry.update_status(job_dir.name, fields["status"])
+        status.update(fields)
+        status["updated_at"] = time.time()
+        tmp_path = job_dir / f".status.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_path.write_text(json.dumps(status, ensure_ascii=False))
+        os.replace(tmp_path, job_dir / "status.json")
+    if fields.get("status") in FINISHED_STATUSES:
+        job_reaper.record(job_dir.name, job_dir)
+    return status
+
+
+def record_artifact(job_dir: Path, path: Path) -> None:
+    """끝난 작업에 나중에 렌더링한 산출물(MIDI, PDF, 미리보기)을 디렉토리 사용량에 더한다."""
+    try:
+        job_reaper.add(job_dir.name, path.stat().st_size)
+    except OSError:
+        pass
+
+
+def read_job_status(job_dir: Path) -> dict | None:
+    try:
+        return json.loads((job_dir / "status.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def append_job_event(job_dir: Path, event: dict) -> None:
+    """진행 이벤트를 events.jsonl에 한 줄씩 덧붙인다 (SSE 스트림이 이 파일을 따라 읽는다)."""
+    line = json.dumps({**event, "time": time.time()}, ensure_ascii=False)
+    with open(job_dir / "events.jsonl", "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    total += _dir_size(Path(entry.path))
+                else:
+                    total += entry.stat(follow_symlinks=False).st_size
+    except OSError:
+        pass
+    return total
+
+
+class JobReaper:
+    """
+    만료된 작업 디렉토리를 주기적으로 지우고 작업 디렉토리 전체 크기를 max_bytes 아래로 유지한다.
+
+    create_job_dir가 생성 시각을 힙에 넣으므로 매번 저장소 전체를 훑거나 .created를
+    읽지 않는다 (시작할 때 한 번만 기존 디렉토리를 읽어 들인다). 사용량도 다시 재지 않고
+    누적한다: 작업이 끝날 때(done/error) 그 디렉토리만 한 번 재고, 나중에 렌더링한 산출물은
+    record_artifact()로 더하고, 지울 때 뺀다. 용량을 넘으면 끝난 작업을 오래된 것부터
+    지운다 — 진행 중인 작업은 크기를 세지 않고 만료 전까지 남긴다.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = TEMP_FILE_TTL_SECONDS,
+        max_bytes: int = TEMP_MAX_BYTES,
+        interval_sec: float = JOB_REAPER_INTERVAL_SEC,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.interval_sec = interval_sec
+        self._heap: list[tuple[float, str]] = []   # (생성 시각, job_id)
+        self._created: dict[str, float] = {}
+        self._sizes: dict[str, int] = {}           # 끝난 작업의 디렉토리 크기
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._usage_bytes = 0
+        self._reclaimed_bytes = 0
+        self._expired_jobs = 0
+        self._evicted_jobs = 0
+
+    def track(self, job_id: str, created: float) -> None:
+        with self._lock:
+            self._created[job_id] = created
+            heapq.heappush(self._heap, (created, job_id))
+
+    def record(self, job_id: str, job_dir: Path) -> None:
+        """끝난 작업의 디렉토리 크기를 한 번 재서 사용량에 반영한다 (이 프로세스가 추적하는 작업만)."""
+        with self._lock:
+            if job_id not in self._created:
+                return
+        size = _dir_size(job_dir)
+        with self._lock:
+            if job_id not in self._created:
+                return
+            self._usage_bytes += size - self._sizes.get(job_id, 0)
+            self._sizes[job_id] = size
+
+    def add(self, job_id: str, nbytes: int) -> None:
+        with self._lock:
+            if job_id in self._sizes:
+                self._sizes[job_id] += nbytes
+                self._usage_bytes += nbytes
+
+    def load_existing(self) -> None:
+        """시작할 때 한 번, 이전 실행에서 남은 작업 디렉토리를 힙에 넣고 끝난 작업의 크기를 잰다."""
+        for job_id in artifact_store.job_ids():
+            job_dir = artifact_store.root / job_id
             try:
-                created = float(ts_file.read_text().strip())
-                if now - created > TEMP_FILE_TTL_SECONDS:
-                    shutil.rmtree(job_dir, ignore_errors=True)
+                created = float((job_dir / ".created").read_text().strip())
             except (ValueError, OSError):
-                pass
+                continue
+            self.track(job_id, created)
+            if (read_job_status(job_dir) or {}).get("status") in FINISHED_STATUSES:
+                self.record(job_id, job_dir)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self.load_existing()
+        self.reap()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="job-reaper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.reap()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            try:
+                self.reap()
+            except Exception as e:
+                logger.error("작업 디렉토리 정리 실패: %s", e)
+
+    def _remove(self, job_id: str) -> int:
+        artifact_store.remove_job(job_id)
+        job_registry.remove(job_id)
+        with self._lock:
+            self._created.pop(job_id, None)
+            size = self._sizes.pop(job_id, 0)
+            self._usage_bytes -= size
+            self._reclaimed_bytes += size
+        return size
+
+    def reap(self) -> dict:
+        """만료된 작업을 지우고, 그래도 용량을 넘으면 끝난 작업을 오래된 것부터 지운다."""
+        deadline = time.time() - self.ttl_seconds
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] < deadline:
+                created, job_id = heapq.heappop(self._heap)
+                if self._created.get(job_id) == created:
+                    expired.append(job_id)
+        for job_id in expired:
+            self._remove(job_id)
+        job_registry.purge_expired()
+
+        evicted = 0
+        with self._lock:
+            self._expired_jobs += len(expired)
+            over_quota = self.max_bytes > 0 and self._usage_bytes > self.max_bytes
+            finished = sorted(self._sizes, key=self._created.get) if over_quota else []
+        for job_id in finished:
+            if self._usage_bytes <= self.max_bytes:
+                break
+            self._remove(job_id)
+            evicted += 1
+        usage = self._usage_bytes
+        if over_quota and usage > self.max_bytes:
+            logger.warning("임시 파일 용량 초과: %.1fMB (진행 중인 작업만 남음)", usage / 1024 / 1024)
+
+        with self._lock:
+            self._evicted_jobs += evicted
+        if expired or evicted:
+            logger.info("작업 디렉토리 정리: 만료 %d개, 용량 초과 %d개", len(expired), evicted)
+        return {"expired": len(expired), "evicted": evicted, "usage_bytes": usage}
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "jobs": len(self._created),
+                "usage_bytes": self._usage_bytes,
+                "max_bytes": self.max_bytes,
+                "reclaimed_bytes": self._reclaimed_bytes,
+                "expired_jobs": self._expired_jobs,
+                "evicted_jobs": self._evicted_jobs,
+            }
+
+
+job_reaper = JobReaper()
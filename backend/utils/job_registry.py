@@ -0,0 +1,139 @@
+import logging
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from config import JOB_NODE_ID, JOB_PEERS, JOB_REGISTRY_PATH, TEMP_FILE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    node TEXT NOT NULL,
+    job_dir TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at);
+"""
+
+
+class JobRegistry:
+    """
+    작업 상태, 작업 디렉토리 위치, 만료 시각을 SQLite(WAL)에 기록하는 호스트 로컬 레지스트리.
+
+    같은 호스트의 uvicorn 워커들과 변환 워커 프로세스가 한 DB 파일을 함께 쓰고, 어느 워커든
+    lookup()으로 작업 디렉토리와 만료 여부를 찾는다. 지운 작업은 행을 'removed'로 남겨 두어
+    만료/삭제된 작업(410)과 처음부터 없던 작업(404)을 구분한다.
+    WAL은 네트워크 파일시스템에서 동작하지 않으므로 호스트끼리 DB를 나누지 않는다 —
+    다른 호스트의 작업은 작업 ID 앞의 노드 이름(JOB_NODE_ID)과 JOB_PEERS로 찾는다.
+    레지스트리 오류는 로그만 남기고 변환/다운로드를 막지 않는다.
+    """
+
+    def __init__(
+        self,
+        path: Path = JOB_REGISTRY_PATH,
+        node_id: str = JOB_NODE_ID,
+        peers: dict[str, str] = JOB_PEERS,
+    ):
+        self.path = path
+        self.node_id = node_id
+        self.node = node_id or f"local:{socket.gethostname()}"
+        self.peers = peers
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    @property
+    def proxy_enabled(self) -> bool:
+        return bool(self.node_id and self.peers)
+
+    @property
+    def job_id_prefix(self) -> str:
+        """이 노드가 만드는 작업 ID의 접두어 (여러 호스트로 나눌 때만)."""
+        return f"{self.node_id}-" if self.proxy_enabled else ""
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        try:
+            return self._connect().execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("작업 레지스트리 오류: %s", e)
+            return []
+
+    def register(self, job_id: str, job_dir: Path, created: float) -> None:
+        self._execute(
+            "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, 'created', ?, ?, ?)",
+            (job_id, self.node, str(job_dir), created, created, created + TEMP_FILE_TTL_SECONDS),
+        )
+
+    def update_status(self, job_id: str, status: str) -> None:
+        self._execute(
+            "UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+            (status, time.time(), job_id),
+        )
+
+    def remove(self, job_id: str) -> None:
+        """디렉토리를 지운 작업을 'removed'로 표시한다 (purge_expired가 나중에 행을 지운다)."""
+        self._execute(
+            "UPDATE jobs SET status = 'removed', updated_at = ? WHERE job_id = ?",
+            (time.time(), job_id),
+        )
+
+    def purge_expired(self) -> None:
+        """만료 후 TTL이 한 번 더 지난 행을 지운다. 그 사이에는 410으로 답할 수 있게 남겨 둔다."""
+        self._execute("DELETE FROM jobs WHERE expires_at < ?", (time.time() - TEMP_FILE_TTL_SECONDS,))
+
+    def lookup(self, job_id: str) -> sqlite3.Row | None:
+        """작업 행 (node, job_dir, status, expires_at). 모르는 작업이거나 레지스트리 오류면 None."""
+        rows = self._execute(
+            "SELECT node, job_dir, status, expires_at FROM jobs WHERE job_id = ?", (job_id,)
+        )
+        return rows[0] if rows else None
+
+    @staticmethod
+    def is_gone(row: sqlite3.Row) -> bool:
+        """만료됐거나 job reaper가 지운 작업인지."""
+        return row["status"] == "removed" or row["expires_at"] < time.time()
+
+    def owner_url(self, job_id: str) -> str | None:
+        """작업 ID의 노드 이름으로 찾은 주인 노드 주소. 이 노드의 작업이거나 모르는 노드면 None."""
+        node, sep, _ = job_id.partition("-")
+        if not sep or node == self.node_id:
+            return None
+        return self.peers.get(node)
+
+    def status(self) -> dict:
+        rows = self._execute(
+            "SELECT status, COUNT(*) AS n FROM jobs WHERE expires_at >= ? AND status != 'removed' "
+            "GROUP BY status",
+            (time.time(),),
+        )
+        return {
+            "node": self.node,
+            "proxy": self.proxy_enabled,
+            "peers": sorted(self.peers),
+            "jobs": {row["status"]: row["n"] for row in rows},
+        }
+
+
+job_registry = JobRegistry()
@@ -0,0 +1,55 @@
+import time
+import zipfile
+from pathlib import Path
+
+from config import UPLOAD_CHUNK_SIZE
+
+
+class _Sink:
+    """ZipFile이 쓰는 바이트를 모았다가 drain()에서 넘겨주는 쓰기 전용 스트림 (seek 불가)."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStream:
+    """
+    zip 아카이브를 만들면서 조각씩 내보낸다.
+
+    출력이 seek 불가능하므로 zipfile이 각 항목 뒤에 data descriptor를 붙여 쓰고,
+    메모리에는 아직 내보내지 않은 조각(대략 항목 하나의 압축 결과)만 남는다.
+    add_*() 다음에 drain()한 바이트를 응답으로 흘려보내고, 마지막에 close()의 반환값을 보낸다.
+    """
+
+    def __init__(self):
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def add_file(self, path: Path, arcname: str) -> None:
+        info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with open(path, "rb") as src, self._zip.open(info, "w") as dst:
+            while chunk := src.read(UPLOAD_CHUNK_SIZE):
+                dst.write(chunk)
+
+    def add_bytes(self, data: bytes, arcname: str) -> None:
+        self._zip.writestr(arcname, data)
+
+    def drain(self) -> bytes:
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._zip.close()
+        return self._sink.drain()
@@ -14,7 +14,7 @@ export default function FileUpload({ onFileSelected, disabled, wavOnly }: FileUp
   const [showFfmpegGuide, setShowFfmpegGuide] = useState(false);
 
   const acceptTypes = wavOnly
-    ? { "audio/wav": [".wav"] }
+    ? { "audio/wav": [".wav"], "audio/flac": [".flac"], "audio/ogg": [".ogg"] }
     : ACCEPTED_AUDIO_TYPES;
 
   const onDrop = useCallback(
@@ -61,7 +61,7 @@ export default function FileUpload({ onFileSelected, disabled, wavOnly }: FileUp
             </p>
             <p className="text-sm text-gray-500 mt-1">
               {wavOnly ? (
-                <>WAV (최대 {MAX_FILE_SIZE_MB}MB)</>
+                <>WAV, OGG, FLAC (최대 {MAX_FILE_SIZE_MB}MB)</>
               ) : (
                 <>WAV, MP3, OGG, FLAC, M4A (최대 {MAX_FILE_SIZE_MB}MB)</>
               )}
@@ -74,7 +74,7 @@ export default function FileUpload({ onFileSelected, disabled, wavOnly }: FileUp
       {wavOnly && (
         <div className="mt-2 flex items-center gap-2">
           <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-yellow-100 text-yellow-800">
-            WAV만 지원
+            WAV/FLAC/OGG만 지원
           </span>
           <button
             type="button"